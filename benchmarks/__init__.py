@@ -0,0 +1,11 @@
+import os
+
+# Keep pygame's import banner out of the JSON on stdout.
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from .benchmark import Benchmark as Benchmark
+from .benchmark import Regression as Regression
+from .benchmark import Result as Result
+from .benchmark import compare as compare
+from .benchmark import run as run
+from .scenarios import BENCHMARKS as BENCHMARKS
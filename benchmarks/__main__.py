@@ -0,0 +1,66 @@
+"""Run the benchmarks and print the results as JSON.
+
+With --baseline, compare against an earlier run's JSON and exit with status 1 if anything
+got slower than the threshold allows.
+"""
+
+import argparse
+import json
+import platform
+import sys
+
+from .benchmark import Result, compare, run
+from .scenarios import BENCHMARKS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-k", "--filter", default="", help="only run names containing this")
+    parser.add_argument("--quick", action="store_true", help="only run the smallest sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown")
+    args = parser.parse_args()
+
+    results: list[Result] = []
+    for benchmark in BENCHMARKS:
+        if args.filter not in benchmark.name:
+            continue
+        for size in benchmark.sizes[:1] if args.quick else benchmark.sizes:
+            result = run(benchmark, size, repeat=args.repeat, min_time=args.min_time)
+            print(f"{result.key}: {result.seconds * 1e6:.1f}us", file=sys.stderr)
+            results.append(result)
+
+    output = json.dumps(
+        {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": [result.to_json() for result in results],
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = [Result.from_json(result) for result in json.load(f)["results"]]
+        if regressions := compare(results, baseline, args.threshold):
+            for regression in regressions:
+                print(
+                    f"regression: {regression.result.key} {regression.ratio:.2f}x "
+                    f"({regression.baseline.seconds * 1e6:.1f}us -> "
+                    f"{regression.result.seconds * 1e6:.1f}us)",
+                    file=sys.stderr,
+                )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
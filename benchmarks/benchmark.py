@@ -0,0 +1,97 @@
+import contextlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Sequence
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """A scenario timed at several sizes.
+
+    setup builds the scenario for a size and returns the operation to time. Setup isn't
+    timed.
+    """
+
+    name: str
+    setup: Callable[[int], Callable[[], object]]
+    sizes: Sequence[int]
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    size: int
+    # Best time for one call of the operation, over all repeats.
+    seconds: float
+    calls: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+    def to_json(self) -> dict[str, Any]:
+        return {"name": self.name, "size": self.size, "seconds": self.seconds, "calls": self.calls}
+
+    @staticmethod
+    def from_json(json: Mapping[str, Any]) -> "Result":
+        return Result(
+            name=str(json["name"]),
+            size=int(json["size"]),
+            seconds=float(json["seconds"]),
+            calls=int(json["calls"]),
+        )
+
+
+@dataclass(frozen=True)
+class Regression:
+    result: Result
+    baseline: Result
+
+    @property
+    def ratio(self) -> float:
+        return self.result.seconds / self.baseline.seconds
+
+
+def run(benchmark: Benchmark, size: int, repeat: int = 5, min_time: float = 0.05) -> Result:
+    """Time one call of benchmark's operation at size.
+
+    The operation is called in batches big enough to take min_time, and the best of repeat
+    batches is kept. Anything the operation prints is discarded.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        operation = benchmark.setup(size)
+        number = 1
+        while True:
+            seconds = _time(operation, number)
+            if seconds >= min_time:
+                break
+            number *= 2 if seconds <= 0 else max(2, min(10, int(min_time / seconds) + 1))
+        best = seconds
+        for _ in range(repeat - 1):
+            best = min(best, _time(operation, number))
+    return Result(name=benchmark.name, size=size, seconds=best / number, calls=number)
+
+
+def _time(operation: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return time.perf_counter() - start
+
+
+def compare(
+    results: Iterable[Result], baseline: Iterable[Result], threshold: float
+) -> list[Regression]:
+    """Find results more than threshold slower than their baseline.
+
+    threshold is a fraction, so 0.2 flags anything over 20% slower. Results are matched to
+    the baseline by key, and results missing from the baseline are ignored.
+    """
+    baseline_by_key = {result.key: result for result in baseline}
+    return [
+        Regression(result, baseline_result)
+        for result in results
+        if (baseline_result := baseline_by_key.get(result.key)) is not None
+        and result.seconds > baseline_result.seconds * (1 + threshold)
+    ]
@@ -0,0 +1,48 @@
+from typing import Callable
+
+from pytest_subtests import SubTests
+
+from benchmarks import BENCHMARKS, Benchmark, Result, compare, run
+
+
+def test_run() -> None:
+    calls: list[int] = []
+
+    def setup(size: int) -> Callable[[], object]:
+        return lambda: calls.append(size)
+
+    result = run(Benchmark("append", setup, [3]), 3, repeat=2, min_time=0.001)
+    assert result.name == "append"
+    assert result.size == 3
+    assert result.key == "append[3]"
+    assert result.seconds > 0
+    assert result.calls >= 1
+    assert set(calls) == {3}
+
+
+def test_json_round_trip() -> None:
+    result = Result("a", 1, 0.5, 10)
+    assert Result.from_json(result.to_json()) == result
+
+
+def test_compare(subtests: SubTests) -> None:
+    baseline = [Result("a", 1, 1.0, 1), Result("b", 1, 1.0, 1)]
+    for results, expected in list[tuple[list[Result], list[str]]](
+        [
+            ([Result("a", 1, 1.1, 1)], []),
+            ([Result("a", 1, 1.3, 1)], ["a[1]"]),
+            ([Result("a", 1, 0.5, 1), Result("b", 1, 2.0, 1)], ["b[1]"]),
+            ([Result("a", 2, 9.0, 1)], []),
+        ]
+    ):
+        with subtests.test(results=results, expected=expected):
+            regressions = compare(results, baseline, threshold=0.2)
+            assert [regression.result.key for regression in regressions] == expected
+            for regression in regressions:
+                assert regression.ratio > 1.2
+
+
+def test_scenarios(subtests: SubTests) -> None:
+    for benchmark in BENCHMARKS:
+        with subtests.test(benchmark=benchmark.name):
+            benchmark.setup(benchmark.sizes[0])()
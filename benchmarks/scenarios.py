@@ -0,0 +1,177 @@
+import importlib.util
+import io
+from typing import Callable
+
+from tracky.cars import Car, CarManager, Collider, Train
+from tracky.track import Connection, Direction, Grid, GridPosition, Layout, Piece, TrackPosition
+from tracky.visuals import Position, Projection, Rectangle
+
+from .benchmark import Benchmark
+
+# Side of the loop used by scenarios that need a track but don't scale it.
+LOOP_SIZE = 100
+# Cars in each train of the train scenarios.
+TRAIN_CARS = 100
+
+
+def _loop_connections(size: int) -> tuple[Grid, list[Connection]]:
+    """A square loop, and its connections in one direction of travel."""
+    grid = Grid.create_loop(size, size)
+    connection = next(iter(grid[GridPosition(0, 0)].connections))
+    connections = [connection]
+    while (next_connection := connections[-1].forward_connection) is not connection:
+        assert next_connection is not None
+        connections.append(next_connection)
+    return grid, connections
+
+
+def _create_loop(size: int) -> Callable[[], object]:
+    return lambda: Grid.create_loop(size, size)
+
+
+def _pieces_in(size: int) -> Callable[[], object]:
+    grid = Grid.create_loop(size, size)
+    return lambda: list(grid.pieces_in(GridPosition(0, 0), GridPosition(9, 9)))
+
+
+def _grid_get(size: int) -> Callable[[], object]:
+    grid = Grid(pieces=Piece.create_line(GridPosition(0, 0), Direction.RIGHT, size))
+    position = GridPosition(0, size // 2)
+    return lambda: grid.get(position)
+
+
+def _layout_read(size: int) -> Callable[[], object]:
+    file = io.BytesIO()
+    Layout.write(Grid.create_loop(size, size), file)
+    data = file.getvalue()
+    return lambda: Layout.read(io.BytesIO(data))
+
+
+def _forward_connection_chain(size: int) -> Callable[[], object]:
+    _, connections = _loop_connections(LOOP_SIZE)
+    start = connections[0]
+
+    def walk() -> None:
+        connection = start
+        for _ in range(size):
+            connection = connection.forward_connection
+            assert connection is not None
+
+    return walk
+
+
+def _with_u(size: int) -> Callable[[], object]:
+    _, connections = _loop_connections(LOOP_SIZE)
+    position = TrackPosition(connections[0], 0.5)
+    return lambda: position.with_u(size + 0.5)
+
+
+def _cars(size: int) -> tuple[Grid, list[Car]]:
+    grid, connections = _loop_connections(LOOP_SIZE)
+    cars = [
+        Car(TrackPosition(connections[i % len(connections)], 0.5), velocity_damping=0)
+        for i in range(size)
+    ]
+    for car in cars:
+        car.apply_impulse(1)
+    return grid, cars
+
+
+def _car_manager_update(size: int) -> Callable[[], object]:
+    _, cars = _cars(size)
+    car_manager = CarManager(cars=cars)
+    return lambda: car_manager.update(0, 0.01)
+
+
+def _train_update(size: int) -> Callable[[], object]:
+    # The same cars as car_manager.update, coupled into trains.
+    _, cars = _cars(size)
+    trains = [Train(cars[i : i + TRAIN_CARS]) for i in range(0, size, TRAIN_CARS)]
+    for train in trains:
+        train.apply_impulse(train.mass)
+    car_manager = CarManager(cars=cars)
+    return lambda: car_manager.update(0, 0.01)
+
+
+def _engine_update(size: int) -> Callable[[], object]:
+    from tracky.cars.engine import Engine
+
+    grid, cars = _cars(size)
+    car_manager = CarManager(cars=cars, engine=Engine(grid, capacity=size))
+    return lambda: car_manager.update(0, 0.01)
+
+
+def _collider_update(engine: bool) -> Callable[[int], Callable[[], object]]:
+    def setup(size: int) -> Callable[[], object]:
+        # A car on every connection of a loop big enough for them all, each just
+        # overlapping the next.
+        grid, connections = _loop_connections(size // 4 + 2)
+        cars = [
+            Car(TrackPosition(connection, 0.5), length=1.25, velocity_damping=0)
+            for connection in connections[:size]
+        ]
+        engine_ = None
+        if engine:
+            from tracky.cars.engine import Engine
+
+            engine_ = Engine(grid, capacity=size)
+        collider = Collider(grid, CarManager(cars=cars, engine=engine_))
+        return lambda: collider.update(0, 0.01)
+
+    return setup
+
+
+def _track_to_screen(size: int) -> Callable[[], object]:
+    _, cars = _cars(size)
+    positions = [car.position for car in cars]
+    projection = Projection(
+        screen_rect=Rectangle(Position(0, 0), Position(LOOP_SIZE * 32, LOOP_SIZE * 32)),
+        grid_origin=GridPosition(0, 0),
+        tile_size=32,
+    )
+
+    def project() -> None:
+        for position in positions:
+            projection.track_to_screen(position)
+
+    return project
+
+
+def _batch_track_to_screen(size: int) -> Callable[[], object]:
+    from tracky.cars.engine import Engine
+    from tracky.visuals.batch_projection import BatchProjection
+
+    grid, cars = _cars(size)
+    engine = Engine(grid, capacity=size)
+    CarManager(cars=cars, engine=engine)
+    batch = BatchProjection(
+        Projection(
+            screen_rect=Rectangle(Position(0, 0), Position(LOOP_SIZE * 32, LOOP_SIZE * 32)),
+            grid_origin=GridPosition(0, 0),
+            tile_size=32,
+        )
+    )
+    graph, connection_ids, us = engine.graph, engine.connection_ids, engine.us
+    return lambda: batch.track_to_screen(graph, connection_ids, us)
+
+
+BENCHMARKS = [
+    Benchmark("grid.create_loop", _create_loop, [10, 100, 1000]),
+    Benchmark("grid.get", _grid_get, [10, 1000, 100000]),
+    Benchmark("grid.pieces_in", _pieces_in, [10, 100, 1000]),
+    Benchmark("layout.read", _layout_read, [10, 100, 1000]),
+    Benchmark("connection.forward_connection", _forward_connection_chain, [100, 1000, 10000]),
+    Benchmark("track_position.with_u", _with_u, [10, 1000, 100000, 1000000]),
+    Benchmark("car_manager.update", _car_manager_update, [10, 1000, 100000]),
+    Benchmark("car_manager.train_update", _train_update, [10, 1000, 100000]),
+    Benchmark("collider.update", _collider_update(False), [10, 1000, 100000]),
+    Benchmark("projection.track_to_screen", _track_to_screen, [10, 100, 1000]),
+] + (
+    [
+        Benchmark("engine.update", _engine_update, [10, 1000, 100000]),
+        Benchmark("collider.engine_update", _collider_update(True), [10, 1000, 100000]),
+        Benchmark("batch_projection.track_to_screen", _batch_track_to_screen, [10, 100, 1000]),
+    ]
+    if importlib.util.find_spec("numpy") is not None
+    else []
+)
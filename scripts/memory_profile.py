@@ -0,0 +1,66 @@
+"""Report per-object memory of the core value types and memory churn per sim tick."""
+
+import tracemalloc
+from typing import Callable
+
+from tracky.cars import Car, CarManager
+from tracky.sim import Sim
+from tracky.track import Direction, Grid, GridPosition, GridRotation, TrackPosition
+from tracky.visuals import Offset, Position
+
+
+def bytes_per_object(create: Callable[[int], object], n: int = 10_000) -> float:
+    tracemalloc.start()
+    try:
+        objects = [create(i) for i in range(n)]
+        size, _ = tracemalloc.get_traced_memory()
+        # Don't count the list holding them.
+        size -= objects.__sizeof__()
+    finally:
+        tracemalloc.stop()
+    return size / n
+
+
+def bytes_per_tick(cars: int = 1_000, ticks: int = 10) -> float:
+    """Peak memory allocated while running a tick, over what was live before it."""
+    grid = Grid.create_loop(10, 10)
+    connection = next(iter(grid[GridPosition(0, 0)].connections))
+    car_manager = CarManager(
+        cars=[Car(TrackPosition(connection, i / cars), velocity_damping=0) for i in range(cars)]
+    )
+    for car in car_manager:
+        car.apply_impulse(1)
+    sim = Sim(grid, car_manager)
+    sim.update(0, 0.01)
+    total = 0
+    tracemalloc.start()
+    try:
+        for tick in range(ticks):
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            sim.update(tick * 0.01, 0.01)
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - start
+    finally:
+        tracemalloc.stop()
+    return total / ticks
+
+
+def main() -> None:
+    connection = next(iter(Grid.create_loop(3, 3)[GridPosition(0, 0)].connections))
+    for name, create in list[tuple[str, Callable[[int], object]]](
+        [
+            ("GridPosition", lambda i: GridPosition(i, i)),
+            ("GridRotation", lambda i: GridRotation(i)),
+            ("TrackPosition", lambda i: TrackPosition(connection, i / 10_000)),
+            ("Offset", lambda i: Offset(i, i)),
+            ("Position", lambda i: Position(i, i)),
+            ("GridPosition + Direction", lambda i: GridPosition(i, i) + Direction.UP),
+        ]
+    ):
+        print(f"{name}: {bytes_per_object(create):.0f} bytes/object")
+    print(f"sim tick: {bytes_per_tick():.0f} peak bytes/tick (1000 cars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Run a loop of cars headlessly and report throughput.
+
+For capacity studies on machines without a display.
+"""
+
+import argparse
+
+from tracky.cars import Car, CarManager
+from tracky.sim import Runner, Sim
+from tracky.track import Grid, TrackPosition
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10, help="rows and cols of the loop")
+    parser.add_argument("--cars", type=int, default=1000)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--substeps", type=int, default=1)
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks")
+    parser.add_argument("--until", type=float, help="stop at this simulated time")
+    parser.add_argument("--seconds", type=float, help="stop after this much wall time")
+    parser.add_argument("--engine", action="store_true", help="use the numpy engine")
+    args = parser.parse_args()
+
+    grid = Grid.create_loop(args.size, args.size)
+    connections = sorted(
+        (connection for piece in grid.pieces for connection in piece.connections),
+        key=lambda connection: grid.graph.id(connection),
+    )
+    engine = None
+    if args.engine:
+        from tracky.cars.engine import Engine
+
+        engine = Engine(grid, capacity=args.cars)
+    car_manager = CarManager(
+        cars=[
+            Car(TrackPosition(connections[i % len(connections)], 0.5), velocity_damping=0)
+            for i in range(args.cars)
+        ],
+        engine=engine,
+    )
+    for car in car_manager:
+        car.apply_impulse(1)
+    runner = Runner(Sim(grid, car_manager), args.dt, args.substeps)
+    if args.ticks is None and args.until is None and args.seconds is None:
+        args.seconds = 5
+    stats = runner.run(ticks=args.ticks, until=args.until, wall_time=args.seconds)
+
+    print(f"ticks: {stats.ticks} ({stats.steps} steps)")
+    print(f"sim time: {stats.sim_time:.3f}s")
+    print(f"wall time: {stats.wall_time:.3f}s")
+    print(f"ticks/s: {stats.ticks_per_second:.1f}")
+    print(f"car updates/s: {stats.car_updates_per_second:.0f}")
+    for name, seconds in stats.phase_times.items():
+        print(f"phase {name}: {seconds:.3f}s ({seconds / stats.wall_time:.0%})")
+
+
+if __name__ == "__main__":
+    main()
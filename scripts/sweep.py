@@ -0,0 +1,84 @@
+"""Run a sweep of sims across worker processes and report each as it finishes.
+
+Every combination of the given loop sizes, car counts, masses and velocity dampings is a
+scenario. Results print as CSV in the order scenarios finish.
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+
+from tracky.sim import Scenario, Sweep
+from tracky.track import Grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10], help="loop sizes")
+    parser.add_argument("--cars", type=int, nargs="+", default=[1000])
+    parser.add_argument("--masses", type=float, nargs="+", default=[1])
+    parser.add_argument("--velocity-dampings", type=float, nargs="+", default=[-0.1])
+    parser.add_argument("--impulse", type=float, default=1)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--engine", action="store_true", help="use the numpy engine")
+    parser.add_argument("--workers", type=int, help="worker processes, default one per core")
+    args = parser.parse_args()
+
+    sweep = Sweep(
+        {f"loop{size}": Grid.create_loop(size, size) for size in args.sizes}, args.workers
+    )
+    scenarios = [
+        Scenario(
+            f"loop{size}",
+            cars,
+            mass=mass,
+            velocity_damping=velocity_damping,
+            impulse=args.impulse,
+            dt=args.dt,
+            ticks=args.ticks,
+            engine=args.engine,
+        )
+        for size, cars, mass, velocity_damping in itertools.product(
+            args.sizes, args.cars, args.masses, args.velocity_dampings
+        )
+    ]
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(
+        [
+            "layout",
+            "cars",
+            "mass",
+            "velocity_damping",
+            "wall_time",
+            "car_updates_per_second",
+            "mean_velocity",
+            "min_velocity",
+            "max_velocity",
+        ]
+    )
+    start = time.perf_counter()
+    for result in sweep.run(scenarios):
+        scenario = result.scenario
+        writer.writerow(
+            [
+                scenario.layout,
+                scenario.cars,
+                scenario.mass,
+                scenario.velocity_damping,
+                f"{result.stats.wall_time:.3f}",
+                f"{result.stats.car_updates_per_second:.0f}",
+                f"{result.mean_velocity:.6g}",
+                f"{result.min_velocity:.6g}",
+                f"{result.max_velocity:.6g}",
+            ]
+        )
+        sys.stdout.flush()
+    print(f"{len(scenarios)} scenarios in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,4 @@
 from .car import Car as Car
 from .car_manager import CarManager as CarManager
+from .collider import Collider as Collider
+from .train import Train as Train
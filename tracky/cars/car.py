@@ -1,8 +1,12 @@
-from typing import Optional, override
+from typing import TYPE_CHECKING, Optional, override
 
 from tracky.core import Validatable
 from tracky.track import Connection, Grid, GridPosition, Piece, TrackPosition
 
+if TYPE_CHECKING:
+    # The engine needs the optional numpy dependency, so only import it for typing.
+    from tracky.cars.engine import Engine
+
 
 class Car(Validatable):
     def __init__(
@@ -21,6 +25,8 @@ class Car(Validatable):
         self.__force: float = 0
         self.__velocity_damping = velocity_damping
         self.__manager: Optional[car_manager.CarManager] = None
+        self.__engine: Optional["Engine"] = None
+        self.__train: Optional[train_lib.Train] = None
         with self._pause_validation():
             self.manager = manager
 
@@ -35,32 +41,79 @@ class Car(Validatable):
     @override
     def __repr__(self) -> str:
         return (
-            f"Car(position={self.__position}, "
+            f"Car(position={self.position}, "
             f"length={self.__length}, "
             f"mass={self.__mass}, "
             f"velocity_damping={self.__velocity_damping}, "
-            f"velocity={self.__velocity})"
+            f"velocity={self.velocity})"
         )
 
     @property
     def position(self) -> TrackPosition:
+        if self.__engine is not None:
+            return self.__engine.position(self)
+        if self.__train is not None:
+            return self.__train.position(self)
         return self.__position
 
+    def __set_position(self, position: TrackPosition) -> None:
+        if self.__engine is not None:
+            # The engine tells the manager if the car changes connection.
+            self.__engine.set_position(self, position)
+            return
+        if self.__train is not None:
+            # The train tells the manager which connections it moves on and off.
+            self.__train.set_position(self, position)
+            return
+        old_connection = self.__position.connection
+        self.__position = position
+        if self.__manager is not None and position.connection is not old_connection:
+            self.__manager.car_moved(self, old_connection, position.connection)
+
     @property
     def velocity(self) -> float:
+        if self.__engine is not None:
+            return self.__engine.velocity(self)
+        if self.__train is not None:
+            return self.__train.velocity
         return self.__velocity
 
+    def __set_velocity(self, velocity: float) -> None:
+        if self.__engine is not None:
+            self.__engine.set_velocity(self, velocity)
+        elif self.__train is not None:
+            self.__train.velocity = velocity
+        else:
+            self.__velocity = velocity
+
+    @property
+    def force(self) -> float:
+        """Force accumulated since the last update."""
+        if self.__engine is not None:
+            return self.__engine.force(self)
+        if self.__train is not None:
+            return self.__train.force
+        return self.__force
+
+    def __set_force(self, force: float) -> None:
+        if self.__engine is not None:
+            self.__engine.set_force(self, force)
+        elif self.__train is not None:
+            self.__train.force = force
+        else:
+            self.__force = force
+
     @property
     def u(self) -> float:
-        return self.__position.u
+        return self.position.u
 
     @u.setter
     def u(self, u: float) -> None:
-        self.__position = self.__position.with_u(u)
+        self.__set_position(self.position.with_u(u))
 
     @property
     def connection(self) -> "Connection":
-        return self.__position.connection
+        return self.position.connection
 
     @property
     def piece(self) -> Optional["Piece"]:
@@ -82,7 +135,8 @@ class Car(Validatable):
 
     @property
     def ends(self) -> tuple[TrackPosition, TrackPosition]:
-        return self.__position - self.length / 2, self.__position + self.length / 2
+        position = self.position
+        return position - self.length / 2, position + self.length / 2
 
     @property
     def mass(self) -> float:
@@ -92,11 +146,24 @@ class Car(Validatable):
     def velocity_damping(self) -> float:
         return self.__velocity_damping
 
+    def set_state(self, position: TrackPosition, velocity: float, force: float) -> None:
+        """Set position, velocity and accumulated force, as when restoring a checkpoint."""
+        self.__set_position(position)
+        self.__set_velocity(velocity)
+        self.__set_force(force)
+
     def advance(self, du: float) -> None:
-        self.__position += du
+        if self.__train is not None:
+            self.__train.advance(du)
+        else:
+            self.__set_position(self.position + du)
 
     def apply_impulse(self, impulse: float) -> None:
-        self.__velocity += impulse / self.__mass
+        if self.__train is not None:
+            # Impulses act on the whole train.
+            self.__train.apply_impulse(impulse)
+            return
+        self.__set_velocity(self.velocity + impulse / self.__mass)
 
     def apply_force(self, force: float) -> None:
         """Apply a per-second force to the car.
@@ -106,15 +173,17 @@ class Car(Validatable):
         frame. To apply a total of n units of force, call this method every fram for
         1 second with force=n.
         """
-        self.__force += force
+        self.__set_force(self.force + force)
 
     def update(self, t: float, dt: float) -> None:
+        if self.__train is not None:
+            raise self._error(f"updated apart from train {self.__train}")
         # Apply velocity damping as a friction-like force.
-        self.apply_force(self.__velocity * self.__velocity_damping)
+        self.apply_force(self.velocity * self.__velocity_damping)
         # Apply accumulated force as an impulse.
-        self.apply_impulse(self.__force * dt)
-        self.__force = 0
-        self.advance(self.__velocity * dt)
+        self.apply_impulse(self.force * dt)
+        self.__set_force(0)
+        self.advance(self.velocity * dt)
 
     @property
     def manager(self) -> Optional["car_manager.CarManager"]:
@@ -127,13 +196,54 @@ class Car(Validatable):
                 if self.__manager is not None:
                     self.__manager.remove_car(self)
                 self.__manager = manager
+                self.engine = manager.engine if manager is not None else None
                 if self.__manager is not None:
                     self.__manager.add_car(self)
 
+    @property
+    def engine(self) -> Optional["Engine"]:
+        """The engine holding this car's state, if its manager has one."""
+        return self.__engine
+
+    @engine.setter
+    def engine(self, engine: Optional["Engine"]) -> None:
+        if engine is not self.__engine:
+            with self._pause_validation():
+                if self.__engine is not None:
+                    # Copy state back out of the engine before leaving it.
+                    self.__position = self.position
+                    self.__velocity = self.velocity
+                    self.__force = self.force
+                    self.__engine.detach(self)
+                    self.__engine = None
+                if engine is not None:
+                    engine.attach(self)
+                    self.__engine = engine
+
+    @property
+    def train(self) -> Optional["train_lib.Train"]:
+        """The train this car is coupled into, which holds its velocity and force.
+
+        Set by Train when it couples the car.
+        """
+        return self.__train
+
+    @train.setter
+    def train(self, train: Optional["train_lib.Train"]) -> None:
+        with self._pause_validation():
+            self.__train = train
+
     @override
     def _validate(self) -> None:
         if self.__manager is not None and self not in self.__manager.cars:
             raise self._validation_error(f"not in manager {self.__manager}")
+        if self.__engine is not None and (
+            self.__manager is None or self.__manager.engine is not self.__engine
+        ):
+            raise self._validation_error(f"engine {self.__engine} not from manager")
+        if self.__train is not None and self.__engine is not None:
+            raise self._validation_error(f"train {self.__train} can't be in engine")
 
 
 from tracky.cars import car_manager
+from tracky.cars import train as train_lib
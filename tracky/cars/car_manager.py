@@ -1,16 +1,42 @@
 from collections.abc import Set
-from typing import Iterable, Iterator, Optional, override
+from typing import TYPE_CHECKING, Collection, Iterable, Iterator, Optional, override
 
-from tracky.core import Validatable
+from tracky.core import SetView, Validatable
+from tracky.track import Connection, Piece
+
+if TYPE_CHECKING:
+    # The engine needs the optional numpy dependency, so only import it for typing.
+    from tracky.cars.engine import Engine
 
 
 class CarManager(Validatable, Set["car.Car"]):
-    def __init__(self, cars: Optional[Iterable["car.Car"]] = None) -> None:
+    def __init__(
+        self,
+        cars: Optional[Iterable["car.Car"]] = None,
+        engine: Optional["Engine"] = None,
+    ) -> None:
+        """Create a manager.
+
+        If engine is given, the manager's cars keep their state in it and are updated
+        together as arrays rather than one at a time.
+        """
         Validatable.__init__(self)
-        self.__cars = frozenset[car.Car]()
+        # Cars in the order they were added, so they're iterated in the same order every run.
+        self.__cars: dict[car.Car, None] = {}
+        self.__engine = engine
+        # Cars added or removed since the last validation.
+        self.__changed_cars = set[car.Car]()
+        # Cars by the connection they're on. Connections with no cars are left out.
+        self.__occupancy: dict[Connection, set[car.Car]] = {}
+        # Cars not in a train, which update and index themselves.
+        self.__loose_cars: dict[car.Car, None] = {}
+        # Trains by how many of their cars are in the manager, and by the connections
+        # their cars could be on.
+        self.__trains: dict[train_lib.Train, int] = {}
+        self.__train_occupancy: dict[Connection, set[train_lib.Train]] = {}
         with self._pause_validation():
             if cars is not None:
-                self.cars = frozenset(cars)
+                self.add_cars(cars)
 
     @override
     def __eq__(self, other: object) -> bool:
@@ -22,40 +48,181 @@ class CarManager(Validatable, Set["car.Car"]):
 
     @override
     def __repr__(self) -> str:
-        return f"CarManager(cars={self.__cars})"
+        return f"CarManager(cars={frozenset(self.__cars)})"
 
     @property
-    def cars(self) -> frozenset["car.Car"]:
-        return self.__cars
+    def cars(self) -> Set["car.Car"]:
+        """Live read-only view of the manager's cars."""
+        return SetView(self.__cars.keys())
 
     @cars.setter
     def cars(self, cars: Iterable["car.Car"]) -> None:
-        cars_ = frozenset(cars)
-        if cars_ != self.__cars:
-            with self._pause_validation():
-                added_cars = cars_ - self.__cars
-                removed_cars = self.__cars - cars_
-                self.__cars = cars_
+        cars_ = dict.fromkeys(cars)
+        self.__update(
+            [car_ for car_ in cars_ if car_ not in self.__cars],
+            [car_ for car_ in self.__cars if car_ not in cars_],
+        )
+
+    def __update(
+        self,
+        added_cars: Collection["car.Car"],
+        removed_cars: Collection["car.Car"],
+    ) -> None:
+        if added_cars or removed_cars:
+            with self._pause_validation(incremental=True):
+                for car_ in removed_cars:
+                    del self.__cars[car_]
+                self.__cars.update(dict.fromkeys(added_cars))
+                for car_ in removed_cars:
+                    if car_.train is not None:
+                        self.__remove_train_car(car_.train)
+                    else:
+                        del self.__loose_cars[car_]
+                        self.__leave(car_, car_.connection)
+                for car_ in added_cars:
+                    if car_.train is not None:
+                        self.__add_train_car(car_.train)
+                    else:
+                        self.__loose_cars[car_] = None
+                        self.__enter(car_, car_.connection)
+                self.__changed_cars.update(added_cars, removed_cars)
                 for car in added_cars:
                     car.manager = self
                 for car in removed_cars:
                     car.manager = None
 
+    def add_cars(self, cars: Iterable["car.Car"]) -> None:
+        self.__update({car: None for car in cars if car not in self.__cars}.keys(), ())
+
+    def remove_cars(self, cars: Iterable["car.Car"]) -> None:
+        self.__update((), {car: None for car in cars if car in self.__cars}.keys())
+
     def add_car(self, car: "car.Car") -> None:
-        self.cars |= {car}
+        if car not in self.__cars:
+            self.__update((car,), ())
 
     def remove_car(self, car: "car.Car") -> None:
-        self.cars -= {car}
+        if car in self.__cars:
+            self.__update((), (car,))
+
+    @property
+    def engine(self) -> Optional["Engine"]:
+        return self.__engine
+
+    @property
+    def trains(self) -> Set["train_lib.Train"]:
+        """Live read-only view of the trains the manager's cars are in."""
+        return self.__trains.keys()
+
+    def __add_train_car(self, train: "train_lib.Train") -> None:
+        if (count := self.__trains.get(train, 0)) == 0:
+            self.__index_train(train, train.connections, ())
+        self.__trains[train] = count + 1
+
+    def __remove_train_car(self, train: "train_lib.Train") -> None:
+        if (count := self.__trains[train] - 1) == 0:
+            self.__index_train(train, (), train.connections)
+            del self.__trains[train]
+        else:
+            self.__trains[train] = count
+
+    def __enter(self, car_: "car.Car", connection: Connection) -> None:
+        if (cars := self.__occupancy.get(connection)) is None:
+            cars = self.__occupancy[connection] = set()
+        cars.add(car_)
+
+    def __leave(self, car_: "car.Car", connection: Connection) -> None:
+        cars = self.__occupancy[connection]
+        cars.remove(car_)
+        if not cars:
+            del self.__occupancy[connection]
+
+    def car_moved(
+        self, car_: "car.Car", old_connection: Connection, connection: Connection
+    ) -> None:
+        """Move car from old_connection to connection in the occupancy index.
+
+        Called by Car and Engine when a car crosses onto another connection.
+        """
+        self.__leave(car_, old_connection)
+        self.__enter(car_, connection)
+
+    def train_moved(
+        self,
+        train: "train_lib.Train",
+        entered: Iterable[Connection],
+        left: Iterable[Connection],
+    ) -> None:
+        """Update the connections train's cars could be on in the occupancy index.
+
+        Called by Train when its chain of connections changes.
+        """
+        if train in self.__trains:
+            self.__index_train(train, entered, left)
+
+    def __index_train(
+        self,
+        train: "train_lib.Train",
+        entered: Iterable[Connection],
+        left: Iterable[Connection],
+    ) -> None:
+        for connection in left:
+            trains = self.__train_occupancy[connection]
+            trains.remove(train)
+            if not trains:
+                del self.__train_occupancy[connection]
+        for connection in entered:
+            if (trains := self.__train_occupancy.get(connection)) is None:
+                trains = self.__train_occupancy[connection] = set()
+            trains.add(train)
+
+    def cars_on(self, connection: Connection) -> frozenset["car.Car"]:
+        """The cars on connection.
+
+        Takes time in the number of cars on connection, not the number of cars, plus the
+        log of the length of each train that might be on it.
+        """
+        cars = frozenset(self.__occupancy.get(connection, ()))
+        if (trains := self.__train_occupancy.get(connection)) is not None:
+            cars = cars.union(*(train.cars_on(connection) for train in trains))
+        return cars
+
+    def cars_on_piece(self, piece: Piece) -> frozenset["car.Car"]:
+        """The cars on any of piece's connections."""
+        return frozenset["car.Car"]().union(
+            *(self.cars_on(connection) for connection in piece.connections)
+        )
 
     def update(self, t: float, dt: float) -> None:
-        for car_ in self.cars:
-            car_.update(t, dt)
+        """Update every car, with each train updated once for all of its cars."""
+        if self.__engine is not None:
+            self.__engine.update(t, dt)
+        else:
+            for car_ in self.__loose_cars:
+                car_.update(t, dt)
+            for train in self.__trains:
+                train.update(t, dt)
 
     @override
     def _validate(self) -> None:
+        self.__changed_cars.clear()
         for car_ in self.__cars:
-            if car_.manager != self:
-                raise self._validation_error(f"car {car_} not in manager")
+            self.__validate_car(car_)
+
+    @override
+    def _validate_changes(self) -> None:
+        changed_cars, self.__changed_cars = self.__changed_cars, set[car.Car]()
+        for car_ in changed_cars:
+            if car_ in self.__cars:
+                self.__validate_car(car_)
+            elif car_.train is not None and car_.train in self.__trains:
+                raise self._validation_error(f"train {car_.train} only partly in manager")
+
+    def __validate_car(self, car_: "car.Car") -> None:
+        if car_.manager != self:
+            raise self._validation_error(f"car {car_} not in manager")
+        if car_.train is not None and self.__trains.get(car_.train) != len(car_.train.cars):
+            raise self._validation_error(f"train {car_.train} only partly in manager")
 
     @override
     def __len__(self) -> int:
@@ -71,3 +238,4 @@ class CarManager(Validatable, Set["car.Car"]):
 
 
 from tracky.cars import car
+from tracky.cars import train as train_lib
@@ -2,7 +2,7 @@ import pytest
 from pytest import approx  # type: ignore
 
 from tracky.cars import Car, CarManager
-from tracky.track import Direction, Grid, GridPosition, Piece, TrackPosition
+from tracky.track import Connection, Direction, Grid, GridPosition, Piece, TrackPosition
 
 
 def test_ctor_empty() -> None:
@@ -46,6 +46,41 @@ def test_set_cars() -> None:
     assert car.manager is None
 
 
+def test_order() -> None:
+    p = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
+    Grid(pieces=[p])
+    cars = [Car(TrackPosition(p.connection(Direction.LEFT), 0)) for _ in range(20)]
+    # Cars are iterated in the order they were added, not in memory order.
+    manager = CarManager(cars=cars[::-1])
+    assert list(manager) == cars[::-1]
+    manager.remove_car(cars[5])
+    manager.add_car(cars[5])
+    assert list(manager.cars) == [*cars[:5:-1], *cars[4::-1], cars[5]]
+    manager.cars = cars
+    assert list(manager) == [*cars[:5:-1], *cars[4::-1], cars[5]]
+    manager.cars = cars[:10]
+    assert list(manager) == [*cars[9:5:-1], *cars[4::-1], cars[5]]
+
+
+def test_add_remove_cars() -> None:
+    p = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
+    Grid(pieces=[p])
+    pos = TrackPosition(p.connection(Direction.LEFT), 0)
+    c1 = Car(pos)
+    c2 = Car(pos)
+    manager = CarManager()
+    cars = manager.cars
+    manager.add_cars([c1, c2, c1])
+    assert cars == {c1, c2}
+    assert c1.manager is manager and c2.manager is manager
+    manager.remove_cars([c1, Car(pos)])
+    assert cars == {c2}
+    assert c1.manager is None
+    manager.remove_car(c2)
+    manager.remove_car(c2)
+    assert cars == set()
+
+
 def test_update() -> None:
     p = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
     Grid(pieces=[p])
@@ -83,3 +118,59 @@ def test_len() -> None:
     assert len(manager) == 1
     manager.remove_car(car)
     assert len(manager) == 0
+
+
+def _occupancy(manager: CarManager) -> dict[Connection, frozenset[Car]]:
+    """The occupancy index, found by scanning every car."""
+    connections = {car.connection for car in manager}
+    return {
+        connection: frozenset(car for car in manager if car.connection is connection)
+        for connection in connections
+    }
+
+
+def test_cars_on() -> None:
+    grid = Grid.create_loop(3, 3)
+    piece = grid[GridPosition(0, 0)]
+    connection = piece.connection(Direction.DOWN)
+    c1 = Car(TrackPosition(connection, 0.25), velocity_damping=0)
+    c2 = Car(TrackPosition(connection, 0.75), velocity_damping=0)
+    manager = CarManager(cars=[c1, c2])
+    assert manager.cars_on(connection) == {c1, c2}
+    assert manager.cars_on_piece(piece) == {c1, c2}
+    assert manager.cars_on(piece.connection(Direction.RIGHT)) == set()
+    c2.apply_impulse(0.5)
+    manager.update(0, 1)
+    assert manager.cars_on(connection) == {c1}
+    assert manager.cars_on(c2.connection) == {c2}
+    assert manager.cars_on_piece(piece) == {c1}
+    assert manager.cars_on_piece(c2.piece or piece) == {c2}
+    c1.apply_impulse(1.5)
+    for tick in range(20):
+        manager.update(tick, 0.7)
+        for occupied, cars in _occupancy(manager).items():
+            assert manager.cars_on(occupied) == cars
+    c1.u = 5.5
+    assert {connection: manager.cars_on(connection) for connection in grid.graph.connections} == {
+        connection: _occupancy(manager).get(connection, frozenset())
+        for connection in grid.graph.connections
+    }
+
+
+def test_cars_on_add_remove() -> None:
+    grid = Grid.create_loop(3, 3)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    car = Car(TrackPosition(connection, 0.5))
+    manager = CarManager()
+    manager.add_car(car)
+    assert manager.cars_on(connection) == {car}
+    other = CarManager()
+    car.manager = other
+    assert manager.cars_on(connection) == set()
+    assert other.cars_on(connection) == {car}
+    other.cars = []
+    assert other.cars_on(connection) == set()
+    # Cars out of a manager move without it.
+    car.u = 1.5
+    manager.add_car(car)
+    assert manager.cars_on(car.connection) == {car}
@@ -36,6 +36,17 @@ def test_set_u() -> None:
     assert car.u == 0.5
 
 
+def test_set_state() -> None:
+    p1, p2 = Piece.create_line(GridPosition(0, 0), Direction.RIGHT, 2)
+    Grid(pieces=[p1, p2])
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5))
+    position = TrackPosition(p2.connection(Direction.RIGHT), 0.25)
+    car.set_state(position, 2, 3)
+    assert car.position == position
+    assert car.velocity == 2
+    assert car.force == 3
+
+
 def test_apply_force() -> None:
     p1, p2 = Piece.create_line(GridPosition(0, 0), Direction.RIGHT, 2)
     Grid(pieces=[p1, p2])
@@ -114,6 +125,16 @@ def test_ends_long() -> None:
     )
 
 
+def test_advance_far_on_loop() -> None:
+    grid = Grid.create_loop(10, 10)
+    car = Car(TrackPosition(grid[GridPosition(0, 1)].connection(Direction.LEFT), 0.5))
+    # How long this takes is covered by the track_position.with_u benchmark.
+    car.advance(10**6)
+    # 10**6 % 36 == 28 tiles clockwise from the top edge.
+    assert car.grid_position == GridPosition(7, 0)
+    assert car.u == approx(0.5)
+
+
 def test_ctor_manager() -> None:
     p = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
     Grid(pieces=[p])
@@ -162,4 +183,4 @@ def test_invalid_manager() -> None:
         manager._pause_validation(),  # type:ignore
         car._pause_validation(),  # type:ignore
     ):
-        manager._CarManager__cars = frozenset[Car]()  # type:ignore
+        manager._CarManager__cars = dict[Car, None]()  # type:ignore
@@ -0,0 +1,326 @@
+from typing import TYPE_CHECKING, Any, Optional, Sequence, override
+
+from tracky.core import Error, Errorable
+from tracky.track import Graph, Grid
+
+if TYPE_CHECKING:
+    # Contacts between engine cars are found with the optional numpy dependency, so only
+    # import it for typing.
+    import numpy as np
+    import numpy.typing as npt
+
+# An interval of track a car covers: its segment, where it starts and ends along the
+# segment, the car's index, the car's direction along the segment, 1 or -1, and where the
+# car's middle is along the segment, even if it's off the segment's end.
+type _Interval = tuple[int, float, float, int, int, float]
+# Two cars in contact: the indices of the car behind and the car ahead along their segment,
+# and their directions along it.
+type _Contact = tuple[int, int, int, int]
+
+
+class Collider(Errorable):
+    """Sweep-and-prune collision detection and response between a manager's cars.
+
+    Each car covers the track from length / 2 behind it to length / 2 ahead, cut into
+    intervals on the segments of track it spans. A connection and the connection running
+    the other way across the same piece are one segment, so cars meeting head on collide
+    as well as cars catching up. Intervals are sorted by segment and position along it,
+    and each is only checked against the earlier intervals that still overlap it, so
+    finding contacts takes O(n log n + k) for n cars with k contacts.
+
+    Cars in contact that are closing on each other get equal and opposite impulses, as in
+    a one-dimensional collision with the given restitution: 1 is elastic, and 0 leaves
+    them moving together. Contacts are resolved one at a time in sweep order. Which car is
+    behind is decided by where the cars' middles are along the segment they meet on, not
+    by the parts of them on it, so cars that both cover a whole segment are still told
+    apart. Cars with their middles at exactly the same place are taken in the order they
+    were added to the manager, or to the engine. Cars only collide with cars on the same
+    segment, not with cars on track crossing it, and cars are cut off where the track
+    dead-ends. Cars in a train collide with the whole train's mass, and not with each
+    other.
+
+    With an engine, contacts are found with array operations over the engine's state.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(
+        self, grid: Grid, car_manager: "car_manager_lib.CarManager", restitution: float = 1
+    ) -> None:
+        self.__grid = grid
+        self.__car_manager = car_manager
+        self.__restitution = restitution
+        # Segments are found per graph, and only again after the grid changes.
+        self.__segments: Optional[tuple[Graph, list[int], list[int]]] = None
+        self.__arrays: Optional[tuple[Graph, tuple["npt.NDArray[np.int64]", ...]]] = None
+        if not 0 <= restitution <= 1:
+            raise self._error(f"invalid restitution {restitution}", self.ValueError)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Collider(restitution={self.__restitution})"
+
+    @property
+    def grid(self) -> Grid:
+        return self.__grid
+
+    @property
+    def car_manager(self) -> "car_manager_lib.CarManager":
+        return self.__car_manager
+
+    @property
+    def restitution(self) -> float:
+        return self.__restitution
+
+    def __segments_of(self, graph: Graph) -> tuple[list[int], list[int]]:
+        """The segment of each connection in graph, and its direction along the segment.
+
+        A segment is named by the lower id of its connections, and runs in that
+        connection's direction.
+        """
+        if self.__segments is not None and self.__segments[0] is graph:
+            return self.__segments[1], self.__segments[2]
+        segments = list(range(len(graph)))
+        signs = [1] * len(graph)
+        for id_, connection in enumerate(graph.connections):
+            if (
+                (piece := connection.piece) is not None
+                and (opposite := piece.get_connection(connection.forward_direction)) is not None
+                and opposite.forward_direction is connection.reverse_direction
+                and (opposite_id := graph.get_id(opposite)) != Graph.NONE
+                and opposite_id < id_
+            ):
+                segments[id_] = opposite_id
+                signs[id_] = -1
+        self.__segments = graph, segments, signs
+        return segments, signs
+
+    def contacts(self) -> list[tuple["car.Car", "car.Car"]]:
+        """Cars that overlap, as (behind, ahead) along their segment, in resolution order."""
+        cars, contacts = self.__contacts()
+        return [(cars[behind], cars[ahead]) for behind, ahead, _, _ in contacts]
+
+    def update(self, t: float, dt: float) -> None:
+        """Resolve every contact between cars closing on each other."""
+        cars, contacts = self.__contacts()
+        if (engine := self.__car_manager.engine) is not None:
+            # Reading and writing engine cars one at a time is slow, so work on copies of
+            # the engine's arrays.
+            velocities, masses = engine.velocities.tolist(), engine.masses.tolist()
+            for behind, ahead, behind_sign, ahead_sign in contacts:
+                if impulse := self.__impulse(
+                    velocities[behind] * behind_sign,
+                    velocities[ahead] * ahead_sign,
+                    masses[behind],
+                    masses[ahead],
+                ):
+                    velocities[behind] -= impulse * behind_sign / masses[behind]
+                    velocities[ahead] += impulse * ahead_sign / masses[ahead]
+            engine.velocities[:] = velocities
+            return
+        for behind, ahead, behind_sign, ahead_sign in contacts:
+            behind_car, ahead_car = cars[behind], cars[ahead]
+            if impulse := self.__impulse(
+                behind_car.velocity * behind_sign,
+                ahead_car.velocity * ahead_sign,
+                self.__mass(behind_car),
+                self.__mass(ahead_car),
+            ):
+                behind_car.apply_impulse(-impulse * behind_sign)
+                ahead_car.apply_impulse(impulse * ahead_sign)
+
+    @staticmethod
+    def __mass(car_: "car.Car") -> float:
+        # A car in a train moves with the whole train.
+        return car_.train.mass if car_.train is not None else car_.mass
+
+    def __impulse(
+        self, behind_velocity: float, ahead_velocity: float, behind_mass: float, ahead_mass: float
+    ) -> float:
+        """The impulse pushing apart two cars with these velocities along their segment.
+
+        Zero if they aren't closing on each other.
+        """
+        if behind_velocity <= ahead_velocity:
+            return 0
+        return (
+            (1 + self.__restitution)
+            * (behind_velocity - ahead_velocity)
+            * behind_mass
+            * ahead_mass
+            / (behind_mass + ahead_mass)
+        )
+
+    def __contacts(self) -> tuple[Sequence["car.Car"], list[_Contact]]:
+        if (engine := self.__car_manager.engine) is not None:
+            return engine.cars, self.__engine_contacts(engine)
+        cars = list(self.__car_manager)
+        contacts = self.__sweep(sorted(self.__intervals(cars)))
+        if self.__car_manager.trains:
+            # Cars coupled in a train can't collide with each other.
+            contacts = [
+                contact
+                for contact in contacts
+                if cars[contact[0]].train is None
+                or cars[contact[0]].train is not cars[contact[1]].train
+            ]
+        return cars, contacts
+
+    def __intervals(self, cars: Sequence["car.Car"]) -> list[_Interval]:
+        graph = self.__grid.graph
+        forward, reverse = graph.forward, graph.reverse
+        segments, signs = self.__segments_of(graph)
+        intervals: list[_Interval] = []
+        for index, car_ in enumerate(cars):
+            position = car_.position
+            id_ = graph.id(position.connection)
+            half = car_.length / 2
+            rear, front = position.u - half, position.u + half
+            # Walk back to the connection the rear of the car is on, offset connections
+            # behind the car's own.
+            offset = 0
+            while rear < offset and (previous := reverse[id_]) != Graph.NONE:
+                id_ = previous
+                offset -= 1
+            while True:
+                lo, hi = max(rear - offset, 0), min(front - offset, 1)
+                middle = position.u - offset
+                if (sign := signs[id_]) < 0:
+                    lo, hi, middle = 1 - hi, 1 - lo, 1 - middle
+                intervals.append((segments[id_], lo, hi, index, sign, middle))
+                if front <= offset + 1 or (id_ := forward[id_]) == Graph.NONE:
+                    break
+                offset += 1
+        return intervals
+
+    @staticmethod
+    def __contact(earlier: _Interval, later: _Interval) -> _Contact:
+        # Whichever car's middle is further back along the segment is behind, and the car
+        # added first if they're level.
+        if (later[5], later[3]) < (earlier[5], earlier[3]):
+            earlier, later = later, earlier
+        return earlier[3], later[3], earlier[4], later[4]
+
+    @staticmethod
+    def __sweep(intervals: Sequence[_Interval]) -> list[_Contact]:
+        """Contacts between sorted intervals, each pair of cars once."""
+        contacts: dict[tuple[int, int], _Contact] = {}
+        # Earlier intervals on the current segment that reach past where the next starts.
+        active: list[_Interval] = []
+        segment = Graph.NONE
+        for interval in intervals:
+            if interval[0] != segment:
+                segment = interval[0]
+                active.clear()
+            active = [earlier for earlier in active if earlier[2] > interval[1]]
+            for earlier in active:
+                if earlier[3] != interval[3]:
+                    pair = min(earlier[3], interval[3]), max(earlier[3], interval[3])
+                    if pair not in contacts:
+                        contacts[pair] = Collider.__contact(earlier, interval)
+            active.append(interval)
+        return list(contacts.values())
+
+    def __arrays_of(self, graph: Graph) -> tuple["npt.NDArray[np.int64]", ...]:
+        """Graph links and segments as arrays, for finding contacts between engine cars."""
+        import numpy as np
+
+        if self.__arrays is None or self.__arrays[0] is not graph:
+            segments, signs = self.__segments_of(graph)
+            self.__arrays = graph, tuple(
+                np.array(column, dtype=np.int64)
+                for column in (graph.forward, graph.reverse, segments, signs)
+            )
+        return self.__arrays[1]
+
+    def __engine_contacts(self, engine: "Engine") -> list[_Contact]:
+        """Find the same contacts as __sweep over __intervals, with array operations."""
+        import numpy as np
+
+        if not len(engine):
+            return []
+        ids = engine.connection_ids.copy()
+        forward, reverse, segments, signs = self.__arrays_of(engine.graph)
+        half = engine.lengths / 2
+        rear, front = engine.us - half, engine.us + half
+        offsets = np.zeros(len(ids))
+        # Walk back to the connection the rear of each car is on.
+        while (back := np.flatnonzero(rear < offsets)).size:
+            previous = reverse[ids[back]]
+            back, previous = back[previous != Graph.NONE], previous[previous != Graph.NONE]
+            if not back.size:
+                break
+            ids[back] = previous
+            offsets[back] -= 1
+        # Then cut each car into intervals, one connection at a time.
+        parts: list[tuple["npt.NDArray[Any]", ...]] = []
+        cars = np.arange(len(ids))
+        while cars.size:
+            lo = np.maximum(rear[cars] - offsets[cars], 0)
+            hi = np.minimum(front[cars] - offsets[cars], 1)
+            middle = engine.us[cars] - offsets[cars]
+            sign = signs[ids[cars]]
+            flipped = sign < 0
+            lo, hi = np.where(flipped, 1 - hi, lo), np.where(flipped, 1 - lo, hi)
+            middle = np.where(flipped, 1 - middle, middle)
+            parts.append((segments[ids[cars]], lo, hi, cars, sign, middle))
+            cars = cars[front[cars] > offsets[cars] + 1]
+            cars = cars[forward[ids[cars]] != Graph.NONE]
+            ids[cars] = forward[ids[cars]]
+            offsets[cars] += 1
+        segment, lo, hi, car_, sign, middle = (
+            np.concatenate([part[i] for part in parts]) for i in range(6)
+        )
+        order = np.lexsort((car_, hi, lo, segment))
+        segment, lo, hi, car_, sign, middle = (
+            column[order] for column in (segment, lo, hi, car_, sign, middle)
+        )
+        # Pair each interval with the later ones that start before it ends. Sorted by
+        # start, so once one doesn't, none further along do.
+        earlier: list["npt.NDArray[np.int64]"] = []
+        later: list["npt.NDArray[np.int64]"] = []
+        candidates = np.arange(len(segment))
+        step = 1
+        while candidates.size:
+            candidates = candidates[candidates + step < len(segment)]
+            next_ = candidates + step
+            candidates = candidates[
+                (segment[next_] == segment[candidates]) & (lo[next_] < hi[candidates])
+            ]
+            pairs = candidates[car_[candidates] != car_[candidates + step]]
+            earlier.append(pairs)
+            later.append(pairs + step)
+            step += 1
+        # Take pairs in the order __sweep finds them, by later interval and then earlier,
+        # and keep the first for each pair of cars.
+        earlier_, later_ = np.concatenate(earlier), np.concatenate(later)
+        order = np.lexsort((earlier_, later_))
+        earlier_, later_ = earlier_[order], later_[order]
+        pairs = np.minimum(car_[earlier_], car_[later_]) * len(ids) + np.maximum(
+            car_[earlier_], car_[later_]
+        )
+        first = np.sort(np.unique(pairs, return_index=True)[1])
+        earlier_, later_ = earlier_[first], later_[first]
+        # Whichever car's middle is further back along the segment is behind, and the car
+        # added first if they're level.
+        swap = (middle[later_] < middle[earlier_]) | (
+            (middle[later_] == middle[earlier_]) & (car_[later_] < car_[earlier_])
+        )
+        behind = np.where(swap, later_, earlier_)
+        ahead = np.where(swap, earlier_, later_)
+        return list(
+            zip(
+                car_[behind].tolist(),
+                car_[ahead].tolist(),
+                sign[behind].tolist(),
+                sign[ahead].tolist(),
+                strict=True,
+            )
+        )
+
+
+from tracky.cars import car
+from tracky.cars import car_manager as car_manager_lib
+
+if TYPE_CHECKING:
+    from tracky.cars.engine import Engine
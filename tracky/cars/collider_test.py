@@ -0,0 +1,237 @@
+import random
+
+import pytest
+from pytest import approx  # type: ignore
+
+from tracky.cars import Car, CarManager, Collider
+from tracky.track import Connection, Direction, Grid, GridPosition, Piece, TrackPosition
+
+
+def _line(length: int) -> tuple[Grid, list[Piece]]:
+    pieces = list(Piece.create_line(GridPosition(0, 0), Direction.RIGHT, length))
+    return Grid(pieces=pieces), pieces
+
+
+def _collider(grid: Grid, cars: list[Car], engine: bool, restitution: float = 1) -> Collider:
+    engine_ = None
+    if engine:
+        from tracky.cars.engine import Engine
+
+        engine_ = Engine(grid)
+    return Collider(grid, CarManager(cars=cars, engine=engine_), restitution)
+
+
+def _car(
+    piece: Piece,
+    direction: Direction,
+    u: float,
+    velocity: float,
+    length: float = 1,
+    mass: float = 1,
+) -> Car:
+    car = Car(
+        TrackPosition(piece.connection(direction), u),
+        length=length,
+        mass=mass,
+        velocity_damping=0,
+    )
+    car.apply_impulse(velocity * mass)
+    return car
+
+
+def test_ctor() -> None:
+    grid, _ = _line(1)
+    car_manager = CarManager()
+    collider = Collider(grid, car_manager, 0.5)
+    assert collider.grid is grid
+    assert collider.car_manager is car_manager
+    assert collider.restitution == 0.5
+    for restitution in [-0.1, 1.1]:
+        with pytest.raises(Collider.ValueError):
+            Collider(grid, car_manager, restitution)
+
+
+def test_catch_up(engine: bool) -> None:
+    grid, pieces = _line(3)
+    behind = _car(pieces[0], Direction.LEFT, 0.5, 2)
+    ahead = _car(pieces[1], Direction.LEFT, 0.25, 1)
+    collider = _collider(grid, [ahead, behind], engine)
+    assert collider.contacts() == [(behind, ahead)]
+    collider.update(0, 0.1)
+    # Equal masses swap velocities in an elastic collision.
+    assert behind.velocity == approx(1)
+    assert ahead.velocity == approx(2)
+    # Separating cars are left alone.
+    collider.update(0, 0.1)
+    assert behind.velocity == approx(1)
+    assert ahead.velocity == approx(2)
+
+
+def test_covering_segment(engine: bool) -> None:
+    # Both cars cover the whole corner they first meet on, so only where their middles
+    # are tells which is behind, whichever order they're added in.
+    grid = Grid.create_loop(5, 5)
+    contacts: list[tuple[float, float]] = []
+    for order in [1, -1]:
+        front = _car(grid[GridPosition(0, 0)], Direction.DOWN, 0.5, 1, length=1.3)
+        back = _car(grid[GridPosition(0, 0)], Direction.DOWN, 0.4, 0, length=1.3)
+        collider = _collider(grid, [front, back][::order], engine)
+        ((behind, ahead),) = collider.contacts()
+        contacts.append((behind.u, ahead.u))
+        # They're moving apart, so they're left alone.
+        collider.update(0, 0.1)
+        assert (back.velocity, front.velocity) == (0, 1)
+    assert contacts[0] == contacts[1]
+
+
+def test_coincident(engine: bool) -> None:
+    # Cars level with each other are taken in the order they were added.
+    grid, pieces = _line(2)
+    for velocities in [(1, 0), (0, 1)]:
+        first, second = (_car(pieces[0], Direction.LEFT, 0.5, v) for v in velocities)
+        assert _collider(grid, [first, second], engine).contacts() == [(first, second)]
+
+
+def test_head_on(engine: bool) -> None:
+    grid, pieces = _line(2)
+    left = _car(pieces[0], Direction.LEFT, 0.75, 1, mass=3)
+    right = _car(pieces[1], Direction.RIGHT, 0.5, 1)
+    collider = _collider(grid, [left, right], engine)
+    assert collider.contacts() == [(left, right)]
+    collider.update(0, 0.1)
+    # Momentum 3 * 1 - 1 * 1 along the track is kept, and so is energy.
+    assert left.velocity == approx(0)
+    assert right.velocity == approx(-2)
+
+
+def test_restitution(engine: bool) -> None:
+    grid, pieces = _line(2)
+    behind = _car(pieces[0], Direction.LEFT, 0.5, 3, mass=2)
+    ahead = _car(pieces[0], Direction.LEFT, 0.75, 0)
+    collider = _collider(grid, [behind, ahead], engine, restitution=0)
+    collider.update(0, 0.1)
+    assert behind.velocity == approx(2)
+    assert ahead.velocity == approx(2)
+
+
+def test_no_contact(engine: bool) -> None:
+    grid, pieces = _line(4)
+    cars = [
+        _car(pieces[0], Direction.LEFT, 0.5, 1),
+        # Just touching isn't a contact.
+        _car(pieces[1], Direction.LEFT, 0.5, 0),
+        # Nor is being on the next segment, going either way.
+        _car(pieces[3], Direction.RIGHT, 0.5, 2),
+    ]
+    assert _collider(grid, cars, engine).contacts() == []
+
+
+def test_crossing(engine: bool) -> None:
+    piece = Piece(
+        GridPosition(0, 0),
+        [
+            Connection(Direction.LEFT, Direction.RIGHT),
+            Connection(Direction.UP, Direction.DOWN),
+        ],
+    )
+    grid = Grid(pieces=[piece])
+    cars = [
+        _car(piece, Direction.LEFT, 0.5, 1, length=0.5),
+        _car(piece, Direction.UP, 0.5, 1, length=0.5),
+    ]
+    assert _collider(grid, cars, engine).contacts() == []
+
+
+def test_long_cars(engine: bool) -> None:
+    grid, pieces = _line(6)
+    # Spans pieces 0 to 3, and is cut off where the track ends.
+    long = _car(pieces[1], Direction.LEFT, 0.5, 1, length=5)
+    # Spans pieces 3 and 4, going the other way.
+    other = _car(pieces[4], Direction.RIGHT, 0.75, 1, length=1.5)
+    # Inside long, and overlapping both.
+    inside = _car(pieces[3], Direction.LEFT, 0.5, 0, length=0.5)
+    collider = _collider(grid, [long, other, inside], engine)
+    assert set(collider.contacts()) == {(long, other), (long, inside), (inside, other)}
+
+
+def test_loop(engine: bool) -> None:
+    grid = Grid.create_loop(2, 2)
+    piece = grid[GridPosition(0, 0)]
+    # Longer than the loop, so it overlaps itself.
+    car = _car(piece, Direction.DOWN, 0.5, 1, length=10)
+    assert _collider(grid, [car], engine).contacts() == []
+
+
+def test_grid_change(engine: bool) -> None:
+    grid, pieces = _line(2)
+    behind = _car(pieces[0], Direction.LEFT, 0.5, 1)
+    ahead = _car(pieces[1], Direction.LEFT, 0.5, 0)
+    collider = _collider(grid, [behind, ahead], engine)
+    assert collider.contacts() == []
+    grid.add_piece(Piece.create(GridPosition(0, -1), Direction.LEFT, Direction.RIGHT))
+    ahead.u = 0.25
+    behind.u = 0.75
+    assert collider.contacts() == [(behind, ahead)]
+
+
+def test_empty(engine: bool) -> None:
+    grid, _ = _line(1)
+    assert _collider(grid, [], engine).contacts() == []
+
+
+def test_engine_matches() -> None:
+    pytest.importorskip("numpy")
+    from tracky.cars.engine import Engine
+
+    rng = random.Random(1)
+    grid = Grid.create_loop(6, 6)
+    connections = grid.graph.connections
+    states = [
+        (
+            rng.randrange(len(connections)),
+            rng.random(),
+            rng.uniform(-2, 2),
+            rng.uniform(0.5, 2),
+            # Shorter than a connection, so no two intervals are the same and contacts
+            # come in the same order.
+            rng.uniform(0.2, 0.9),
+        )
+        for _ in range(80)
+    ]
+
+    def collider(engine: bool) -> tuple[Collider, list[Car]]:
+        cars = [
+            Car(TrackPosition(connections[id_], u), length=length, mass=mass)
+            for id_, u, _, mass, length in states
+        ]
+        for car, (_, _, velocity, _, _) in zip(cars, states, strict=True):
+            car.apply_impulse(velocity * car.mass)
+        car_manager = CarManager(cars=cars, engine=Engine(grid) if engine else None)
+        return Collider(grid, car_manager), cars
+
+    (python, python_cars), (engine, engine_cars) = collider(False), collider(True)
+    python_contacts = [(python_cars.index(a), python_cars.index(b)) for a, b in python.contacts()]
+    assert python_contacts
+    assert python_contacts == [
+        (engine_cars.index(a), engine_cars.index(b)) for a, b in engine.contacts()
+    ]
+    python.update(0, 0.1)
+    engine.update(0, 0.1)
+    assert [car.velocity for car in python_cars] == approx([car.velocity for car in engine_cars])
+
+
+def test_engine_matches_long_cars() -> None:
+    pytest.importorskip("numpy")
+    from tracky.cars.engine import Engine
+
+    rng = random.Random(2)
+    grid = Grid.create_loop(4, 4)
+    connections = grid.graph.connections
+    states = [(rng.randrange(len(connections)), rng.random(), rng.uniform(1, 3)) for _ in range(30)]
+
+    def contacts(engine: bool) -> set[tuple[int, int]]:
+        cars = [Car(TrackPosition(connections[id_], u), length=length) for id_, u, length in states]
+        car_manager = CarManager(cars=cars, engine=Engine(grid) if engine else None)
+        return {(cars.index(a), cars.index(b)) for a, b in Collider(grid, car_manager).contacts()}
+
+    assert contacts(False) == contacts(True)
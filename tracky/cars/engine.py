@@ -0,0 +1,315 @@
+from typing import override
+
+import numpy as np
+import numpy.typing as npt
+
+from tracky.core import Error, Errorable
+from tracky.track import Graph, Grid, TrackPosition
+
+
+class Engine(Errorable):
+    """Structure-of-arrays car physics.
+
+    Requires the optional numpy dependency.
+
+    Attached cars keep their state in contiguous arrays indexed by slot: the id of their
+    connection in the grid's compiled graph, u, velocity, accumulated force, mass, damping
+    and length. update() integrates every car with a handful of batched array operations.
+    The cars themselves become views that read and write their slot, so the Car API works
+    unchanged.
+
+    Cars are attached by giving their CarManager an engine.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    # Moves longer than this many connections go through Graph.advance one car at a time.
+    LONG_MOVE = 8
+
+    def __init__(self, grid: Grid, capacity: int = 64) -> None:
+        self.__grid = grid
+        self.__graph = grid.graph
+        self.__links = self.__compile_links(self.__graph)
+        self.__cars: list["car_lib.Car"] = []
+        self.__slots: dict["car_lib.Car", int] = {}
+        capacity = max(capacity, 1)
+        self.__connection_id = np.zeros(capacity, dtype=np.int64)
+        self.__u = np.zeros(capacity)
+        self.__velocity = np.zeros(capacity)
+        self.__force = np.zeros(capacity)
+        self.__mass = np.ones(capacity)
+        self.__velocity_damping = np.zeros(capacity)
+        self.__length = np.zeros(capacity)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Engine(cars={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__cars)
+
+    def __contains__(self, car: object) -> bool:
+        return car in self.__slots
+
+    @property
+    def grid(self) -> Grid:
+        return self.__grid
+
+    @property
+    def graph(self) -> Graph:
+        """The compiled graph that connection ids refer to, recompiled if the grid changed."""
+        self.__sync_graph()
+        return self.__graph
+
+    @property
+    def connection_ids(self) -> npt.NDArray[np.int64]:
+        self.__sync_graph()
+        return self.__connection_id[: len(self)]
+
+    @property
+    def us(self) -> npt.NDArray[np.float64]:
+        return self.__u[: len(self)]
+
+    @property
+    def velocities(self) -> npt.NDArray[np.float64]:
+        return self.__velocity[: len(self)]
+
+    @property
+    def forces(self) -> npt.NDArray[np.float64]:
+        return self.__force[: len(self)]
+
+    @property
+    def masses(self) -> npt.NDArray[np.float64]:
+        return self.__mass[: len(self)]
+
+    @property
+    def velocity_dampings(self) -> npt.NDArray[np.float64]:
+        return self.__velocity_damping[: len(self)]
+
+    @property
+    def lengths(self) -> npt.NDArray[np.float64]:
+        return self.__length[: len(self)]
+
+    @property
+    def cars(self) -> list["car_lib.Car"]:
+        """Attached cars, in slot order."""
+        return list(self.__cars)
+
+    @staticmethod
+    def __compile_links(graph: Graph) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        return (
+            np.array(graph.forward, dtype=np.int64),
+            np.array(graph.reverse, dtype=np.int64),
+        )
+
+    def __sync_graph(self) -> None:
+        if (graph := self.__grid.graph) is self.__graph:
+            return
+        # The grid changed, so connection ids were reassigned. Map every car over to its
+        # connection's new id.
+        old_graph = self.__graph
+        ids = self.__connection_id[: len(self)].copy()
+        for slot, old_id in enumerate(ids.tolist()):
+            connection = old_graph.connection(old_id)
+            if (id_ := graph.get_id(connection)) == Graph.NONE:
+                raise self._error(f"car connection {connection} is no longer in {self.__grid}")
+            ids[slot] = id_
+        self.__connection_id[: len(self)] = ids
+        self.__graph = graph
+        self.__links = self.__compile_links(graph)
+
+    def __grow(self) -> None:
+        def grown[T: np.generic](array: npt.NDArray[T]) -> npt.NDArray[T]:
+            result = np.zeros(len(array) * 2, dtype=array.dtype)
+            result[: len(array)] = array
+            return result
+
+        self.__connection_id = grown(self.__connection_id)
+        self.__u = grown(self.__u)
+        self.__velocity = grown(self.__velocity)
+        self.__force = grown(self.__force)
+        self.__mass = grown(self.__mass)
+        self.__velocity_damping = grown(self.__velocity_damping)
+        self.__length = grown(self.__length)
+
+    def attach(self, car: "car_lib.Car") -> None:
+        """Copy car's state into a new slot.
+
+        Called by Car when its engine is set. Use CarManager to attach cars.
+        """
+        if car in self.__slots:
+            return
+        self.__sync_graph()
+        id_ = self.__graph.id(car.position.connection)
+        slot = len(self.__cars)
+        if slot == len(self.__u):
+            self.__grow()
+        self.__cars.append(car)
+        self.__slots[car] = slot
+        self.__connection_id[slot] = id_
+        self.__u[slot] = car.position.u
+        self.__velocity[slot] = car.velocity
+        self.__force[slot] = car.force
+        self.__mass[slot] = car.mass
+        self.__velocity_damping[slot] = car.velocity_damping
+        self.__length[slot] = car.length
+
+    def detach(self, car: "car_lib.Car") -> None:
+        """Free car's slot, moving the last car into it.
+
+        Called by Car when its engine is unset, after it has copied its state back out.
+        """
+        if (slot := self.__slots.pop(car, None)) is None:
+            return
+        last = len(self.__cars) - 1
+        last_car = self.__cars.pop()
+        if slot != last:
+            self.__cars[slot] = last_car
+            self.__slots[last_car] = slot
+            for array in (
+                self.__connection_id,
+                self.__u,
+                self.__velocity,
+                self.__force,
+                self.__mass,
+                self.__velocity_damping,
+                self.__length,
+            ):
+                array[slot] = array[last]
+
+    def __slot(self, car: "car_lib.Car") -> int:
+        try:
+            return self.__slots[car]
+        except KeyError as e:
+            raise self._error(f"car {car} not attached", self.ValueError) from e
+
+    def position(self, car: "car_lib.Car") -> TrackPosition:
+        slot = self.__slot(car)
+        connection = self.graph.connections[int(self.__connection_id[slot])]
+        return TrackPosition(connection, float(self.__u[slot]))
+
+    def set_position(self, car: "car_lib.Car", position: TrackPosition) -> None:
+        slot = self.__slot(car)
+        id_ = self.graph.id(position.connection)
+        old_id = int(self.__connection_id[slot])
+        self.__connection_id[slot] = id_
+        self.__u[slot] = position.u
+        if id_ != old_id:
+            self.__moved([slot], [old_id])
+
+    def velocity(self, car: "car_lib.Car") -> float:
+        return float(self.__velocity[self.__slot(car)])
+
+    def set_velocity(self, car: "car_lib.Car", velocity: float) -> None:
+        self.__velocity[self.__slot(car)] = velocity
+
+    def force(self, car: "car_lib.Car") -> float:
+        return float(self.__force[self.__slot(car)])
+
+    def set_force(self, car: "car_lib.Car", force: float) -> None:
+        self.__force[self.__slot(car)] = force
+
+    def set_state(
+        self,
+        connection_ids: npt.ArrayLike,
+        us: npt.ArrayLike,
+        velocities: npt.ArrayLike,
+        forces: npt.ArrayLike,
+    ) -> None:
+        """Set the connection id, u, velocity and force of every car, in slot order.
+
+        Connection ids refer to the current graph.
+        """
+        n = len(self)
+        columns = [np.asarray(column) for column in (connection_ids, us, velocities, forces)]
+        if any(len(column) != n for column in columns):
+            raise self._error(
+                f"state for {[len(c) for c in columns]} cars, not {n}", self.ValueError
+            )
+        if n and ((ids := columns[0]).min() < 0 or ids.max() >= len(self.graph)):
+            raise self._error("connection id not in graph", self.ValueError)
+        old_ids = self.__connection_id[:n].copy()
+        self.__connection_id[:n] = columns[0]
+        self.__u[:n] = columns[1]
+        self.__velocity[:n] = columns[2]
+        self.__force[:n] = columns[3]
+        moved = np.flatnonzero(old_ids != self.__connection_id[:n])
+        self.__moved(moved.tolist(), old_ids[moved].tolist())
+
+    def update(self, t: float, dt: float) -> None:
+        """Integrate every attached car by dt, matching Car.update."""
+        n = len(self)
+        if n == 0:
+            return
+        self.__sync_graph()
+        velocity = self.__velocity[:n]
+        force = self.__force[:n]
+        # Apply velocity damping as a friction-like force.
+        force += velocity * self.__velocity_damping[:n]
+        # Apply accumulated force as an impulse.
+        velocity += force * dt / self.__mass[:n]
+        force[:] = 0
+        self.__advance(velocity * dt)
+
+    def __advance(self, du: npt.NDArray[np.float64]) -> None:
+        n = len(du)
+        u = self.__u[:n] + du
+        hops = np.floor(u)
+        u -= hops
+        hops = hops.astype(np.int64)
+        while (stuck := np.flatnonzero((ids := self.__step(hops)) == Graph.NONE)).size:
+            # Paged grids can load more track where the moves ran out. Load it for every
+            # stuck car at once, then retry every move against the new graph.
+            graph = self.__graph
+            if not self.__grid.load_towards(
+                (graph.connections[int(self.__connection_id[slot])], int(hops[slot]))
+                for slot in stuck.tolist()
+            ):
+                slot = int(stuck[0])
+                raise self._error(
+                    f"car {self.__cars[slot]} has no "
+                    f"{'forward' if hops[slot] > 0 else 'reverse'} connection",
+                    TrackPosition.ValueError,
+                )
+            self.__sync_graph()
+        # Only cars that crossed onto another connection need the occupancy index updated,
+        # which on most ticks is few or none of them.
+        moved = np.flatnonzero(ids != self.__connection_id[:n])
+        old_ids: list[int] = self.__connection_id[moved].tolist() if moved.size else []
+        self.__connection_id[:n] = ids
+        self.__u[:n] = u
+        if old_ids:
+            self.__moved(moved.tolist(), old_ids)
+
+    def __step(self, hops: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+        """The connection each car ends up on after hops, or NONE where the track ends."""
+        hops = hops.copy()
+        ids = self.__connection_id[: len(hops)].copy()
+        forward, reverse = self.__links
+        # Most cars cross at most a boundary or two per tick, so step those with array
+        # ops and leave the rare long moves to the graph's path skipping.
+        long = np.abs(hops) > self.LONG_MOVE
+        for slot in np.flatnonzero(long).tolist():
+            ids[slot] = self.__graph.advance(int(ids[slot]), int(hops[slot]))
+        hops[long] = 0
+        for links, step in ((forward, 1), (reverse, -1)):
+            while (moving := np.flatnonzero(hops * step > 0)).size:
+                moving = moving[ids[moving] != Graph.NONE]
+                if not moving.size:
+                    break
+                ids[moving] = links[ids[moving]]
+                hops[moving] -= step
+        return ids
+
+    def __moved(self, slots: list[int], old_ids: list[int]) -> None:
+        """Tell the managers of the cars in slots that they left the connections old_ids."""
+        connections = self.__graph.connections
+        for slot, old_id in zip(slots, old_ids, strict=True):
+            car = self.__cars[slot]
+            if (manager := car.manager) is not None:
+                manager.car_moved(
+                    car, connections[old_id], connections[int(self.__connection_id[slot])]
+                )
+
+
+from tracky.cars import car as car_lib
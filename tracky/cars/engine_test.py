@@ -0,0 +1,272 @@
+from pathlib import Path
+
+import pytest
+from pytest import approx  # type: ignore
+
+pytest.importorskip("numpy")
+
+from tracky.cars import Car, CarManager
+from tracky.cars.engine import Engine
+from tracky.core import Error
+from tracky.track import Direction, Grid, GridPosition, Layout, Piece, TrackPosition
+
+
+def _line(length: int) -> tuple[Grid, list[Piece]]:
+    pieces = list(Piece.create_line(GridPosition(0, 0), Direction.RIGHT, length))
+    return Grid(pieces=pieces), pieces
+
+
+def test_attach() -> None:
+    grid, (p1, _) = _line(2)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5), mass=2)
+    car.apply_impulse(1)
+    car.apply_force(3)
+    engine = Engine(grid)
+    manager = CarManager(cars=[car], engine=engine)
+    assert car.engine is engine
+    assert manager.engine is engine
+    assert car in engine
+    assert len(engine) == 1
+    assert car.position == TrackPosition(p1.connection(Direction.LEFT), 0.5)
+    assert car.velocity == 0.5
+    assert car.force == 3
+    assert engine.grid is grid
+    assert engine.cars == [car]
+    assert list(engine.velocities) == [0.5]
+    assert list(engine.forces) == [3]
+    assert list(engine.us) == [0.5]
+    engine.attach(car)
+    assert len(engine) == 1
+
+
+def test_detach() -> None:
+    grid, (p1, p2) = _line(2)
+    engine = Engine(grid)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5), velocity_damping=0)
+    manager = CarManager(cars=[car], engine=engine)
+    car.apply_impulse(1)
+    manager.update(0, 1)
+    manager.remove_car(car)
+    assert car.engine is None
+    assert car not in engine
+    assert car.piece is p2
+    assert car.velocity == 1
+    car.update(0, 0.25)
+    assert car.u == 0.75
+    engine.detach(car)
+    manager.update(0, 1)
+
+
+def test_detach_moves_last_car() -> None:
+    grid, pieces = _line(3)
+    cars = [Car(TrackPosition(p.connection(Direction.LEFT), 0.5)) for p in pieces]
+    manager = CarManager(cars=cars, engine=Engine(grid, capacity=1))
+    for i, car in enumerate(cars):
+        car.apply_impulse(i)
+    manager.remove_car(cars[0])
+    for i, car in enumerate(cars):
+        assert car.piece is pieces[i]
+        assert car.velocity == i
+
+
+def test_update_matches_car_update() -> None:
+    def run(engine: bool) -> list[tuple[GridPosition | None, float, float]]:
+        grid = Grid.create_loop(5, 5)
+        cars = [
+            Car(
+                TrackPosition(grid[GridPosition(0, col)].connection(Direction.LEFT), 0.25),
+                mass=col,
+                velocity_damping=-0.1 * col,
+            )
+            for col in range(1, 4)
+        ]
+        manager = CarManager(cars=cars, engine=Engine(grid) if engine else None)
+        for i, car in enumerate(cars):
+            car.apply_impulse(10 * i - 5)
+        for i in range(100):
+            cars[i % 3].apply_force(i)
+            manager.update(i * 0.1, 0.1)
+        cars[0].advance(100.5)
+        cars[1].u -= 50
+        return [(car.grid_position, car.u, car.velocity) for car in cars]
+
+    assert run(engine=True) == run(engine=False)
+
+
+def test_update_long_move() -> None:
+    grid = Grid.create_loop(10, 10)
+    car = Car(
+        TrackPosition(grid[GridPosition(0, 1)].connection(Direction.LEFT), 0.5),
+        velocity_damping=0,
+    )
+    manager = CarManager(cars=[car], engine=Engine(grid))
+    car.apply_impulse(10**6)
+    manager.update(0, 1)
+    assert car.grid_position == GridPosition(7, 0)
+    assert car.u == approx(0.5)
+
+
+def test_update_paged_grid(tmp_path: Path) -> None:
+    path = tmp_path / "loop.trky"
+    Layout.save(Grid.create_loop(10, 10), path)
+    grid = Grid.open(path, chunk_size=4)
+    cars = [
+        Car(
+            TrackPosition(grid[GridPosition(0, 1)].connection(Direction.LEFT), 0.5),
+            velocity_damping=0,
+        ),
+        Car(
+            TrackPosition(grid[GridPosition(0, 2)].connection(Direction.RIGHT), 0.5),
+            velocity_damping=0,
+        ),
+    ]
+    manager = CarManager(cars=cars, engine=Engine(grid))
+    cars[0].apply_impulse(5)
+    cars[1].apply_impulse(20)
+    manager.update(0, 1)
+    assert cars[0].grid_position == GridPosition(0, 6)
+    assert cars[1].grid_position == GridPosition(9, 9)
+    # Neither car went near the right side of the loop.
+    assert GridPosition(5, 9) not in grid.storage
+
+
+def test_update_paged_far(tmp_path: Path) -> None:
+    # Far more chunks than a retry per chunk could recurse through.
+    path = tmp_path / "line.trky"
+    Layout.save(Grid(Piece.create_line(GridPosition(0, 0), Direction.RIGHT, 1500)), path)
+    with Grid.open(path, chunk_size=1) as grid:
+        car = Car(
+            TrackPosition(grid[GridPosition(0, 0)].connection(Direction.LEFT), 0.5),
+            velocity_damping=0,
+        )
+        manager = CarManager(cars=[car], engine=Engine(grid))
+        car.apply_impulse(1400)
+        manager.update(0, 1)
+        assert car.grid_position == GridPosition(0, 1400)
+
+
+def test_update_dead_end() -> None:
+    grid, (p1, _) = _line(2)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5), velocity_damping=0)
+    manager = CarManager(cars=[car], engine=Engine(grid))
+    car.apply_impulse(-1)
+    with pytest.raises(TrackPosition.ValueError):
+        manager.update(0, 1)
+    assert car.piece is p1
+    car.apply_impulse(4)
+    with pytest.raises(TrackPosition.ValueError):
+        manager.update(0, 1)
+    assert car.piece is p1
+
+
+def test_grid_change_remaps_ids() -> None:
+    grid, (_, p2) = _line(2)
+    engine = Engine(grid)
+    car = Car(TrackPosition(p2.connection(Direction.LEFT), 0.5), velocity_damping=0)
+    CarManager(cars=[car], engine=engine)
+    p0 = Piece.create(GridPosition(0, -1), Direction.LEFT, Direction.RIGHT)
+    grid.add_piece(p0)
+    assert car.piece is p2
+    assert engine.graph.connection(int(engine.connection_ids[0])) is car.connection
+    car.u -= 2
+    assert car.piece is p0
+
+
+def test_grid_change_removes_car_track() -> None:
+    grid, (_, p2) = _line(2)
+    engine = Engine(grid)
+    car = Car(TrackPosition(p2.connection(Direction.LEFT), 0.5))
+    manager = CarManager(cars=[car], engine=engine)
+    grid.remove_piece(p2)
+    with pytest.raises(Error):
+        manager.update(0, 1)
+
+
+def test_set_state() -> None:
+    grid, (p1, p2) = _line(2)
+    cars = [
+        Car(TrackPosition(p1.connection(Direction.LEFT), 0.5)),
+        Car(TrackPosition(p2.connection(Direction.LEFT), 0.5)),
+    ]
+    engine = Engine(grid)
+    CarManager(cars=cars, engine=engine)
+    engine.set_state(
+        [
+            grid.graph.id(p2.connection(Direction.RIGHT)),
+            grid.graph.id(p1.connection(Direction.LEFT)),
+        ],
+        [0.25, 0.75],
+        [1, 2],
+        [3, 4],
+    )
+    assert cars[0].position == TrackPosition(p2.connection(Direction.RIGHT), 0.25)
+    assert cars[1].position == TrackPosition(p1.connection(Direction.LEFT), 0.75)
+    assert [car.velocity for car in cars] == [1, 2]
+    assert [car.force for car in cars] == [3, 4]
+    assert list(engine.masses) == [1, 1]
+    assert list(engine.velocity_dampings) == [-0.1, -0.1]
+    assert list(engine.lengths) == [1, 1]
+    with pytest.raises(Engine.ValueError):
+        engine.set_state([0], [0], [0], [0])
+    with pytest.raises(Engine.ValueError):
+        engine.set_state([0, len(grid.graph)], [0, 0], [0, 0], [0, 0])
+    with pytest.raises(Engine.ValueError):
+        engine.set_state([0, -1], [0, 0], [0, 0], [0, 0])
+
+
+def test_not_attached() -> None:
+    grid, (p1,) = _line(1)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5))
+    with pytest.raises(Engine.ValueError):
+        Engine(grid).velocity(car)
+
+
+def test_engine_not_from_manager() -> None:
+    grid, (p1,) = _line(1)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5))
+    with pytest.raises(Car.ValidationError):
+        car.engine = Engine(grid)
+
+
+def test_cars_on() -> None:
+    grid = Grid.create_loop(4, 4)
+    connections = grid.graph.connections
+    cars = [
+        Car(TrackPosition(connections[i % len(connections)], i / 10), velocity_damping=0)
+        for i in range(10)
+    ]
+    manager = CarManager(cars=cars, engine=Engine(grid))
+
+    def check() -> None:
+        for connection in connections:
+            assert manager.cars_on(connection) == {
+                car for car in cars if car.connection is connection
+            }
+
+    check()
+    for i, car in enumerate(cars):
+        car.apply_impulse(i / 3 - 1)
+    for tick in range(10):
+        manager.update(tick, 0.9)
+        check()
+    cars[0].u = 20.5
+    check()
+    cars[1].u = 0.5
+    check()
+    assert manager.engine is not None
+    manager.engine.set_state(
+        [(id_ + 3) % len(connections) for id_ in manager.engine.connection_ids.tolist()],
+        manager.engine.us,
+        manager.engine.velocities,
+        manager.engine.forces,
+    )
+    check()
+
+
+def test_cars_on_without_manager() -> None:
+    grid, (p1, p2) = _line(2)
+    car = Car(TrackPosition(p1.connection(Direction.LEFT), 0.5))
+    engine = Engine(grid)
+    engine.attach(car)
+    engine.set_position(car, TrackPosition(p2.connection(Direction.LEFT), 0.5))
+    assert engine.position(car) == TrackPosition(p2.connection(Direction.LEFT), 0.5)
@@ -0,0 +1,267 @@
+import bisect
+import itertools
+import math
+from collections import deque
+from typing import Iterable, Sequence, override
+
+from tracky.core import Error, Errorable
+from tracky.track import Connection, TrackPosition
+
+
+class Train(Errorable):
+    """Rigidly coupled cars, integrated as one body.
+
+    A train has one velocity and one force accumulator, and its cars' masses and
+    velocity dampings add up, so each update advances only the lead car however long
+    the train is. Cars are given lead first, each coupled gap behind the one ahead of it,
+    and keep fixed offsets behind the lead along the track the train has covered.
+    Coupling places the followers there, moving them from wherever they were.
+
+    The train keeps the chain of connections from its last car to its lead, so a car's
+    position is found in constant time and the train backs up along the track it came
+    in on. Cars in a train report the train's velocity and force, and forces and
+    impulses applied to any of them act on the whole train.
+
+    Couple cars before adding them to a manager, and add all of a train's cars to the
+    same manager. Trains don't keep their state in an engine.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(self, cars: Iterable["car.Car"], gap: float = 0) -> None:
+        self.__cars = tuple(cars)
+        self.__gap = gap
+        self.__velocity: float = 0
+        self.__force: float = 0
+        if not self.__cars:
+            raise self._error("no cars", self.ValueError)
+        if gap < 0:
+            raise self._error(f"invalid gap {gap}", self.ValueError)
+        self.__indices = {car_: i for i, car_ in enumerate(self.__cars)}
+        if len(self.__indices) != len(self.__cars):
+            raise self._error("car coupled twice", self.ValueError)
+        for car_ in self.__cars:
+            if car_.train is not None or car_.manager is not None:
+                raise self._error(f"car {car_} already in a train or manager", self.ValueError)
+        # How far each car is behind the lead, in increasing order.
+        self.__offsets = [0.0]
+        for ahead, behind in itertools.pairwise(self.__cars):
+            self.__offsets.append(self.__offsets[-1] + ahead.length / 2 + gap + behind.length / 2)
+        self.__mass = sum(car_.mass for car_ in self.__cars)
+        self.__velocity_damping = sum(car_.velocity_damping for car_ in self.__cars)
+        # The connections from the last car's to the lead's, and the index of the first
+        # along the track the train has covered. Indices only change relative to each
+        # other, so the chain can grow and shrink at both ends.
+        self.__chain = deque[Connection]()
+        self.__base = 0
+        self.__lead_u: float = 0
+        # The indices in the chain of each connection on it. A train longer than a loop
+        # covers some connections more than once.
+        self.__chain_indices: dict[Connection, list[int]] = {}
+        # Whether each connection changed since the manager was last told was on the chain.
+        self.__was_on: dict[Connection, bool] = {}
+        self.__place(self.__cars[0].position)
+        for car_ in self.__cars:
+            car_.train = self
+
+    @override
+    def __repr__(self) -> str:
+        return f"Train(cars={len(self.__cars)}, gap={self.__gap}, velocity={self.__velocity})"
+
+    @property
+    def cars(self) -> Sequence["car.Car"]:
+        """The train's cars, lead first."""
+        return self.__cars
+
+    @property
+    def gap(self) -> float:
+        return self.__gap
+
+    @property
+    def mass(self) -> float:
+        return self.__mass
+
+    @property
+    def velocity_damping(self) -> float:
+        return self.__velocity_damping
+
+    @property
+    def velocity(self) -> float:
+        return self.__velocity
+
+    @velocity.setter
+    def velocity(self, velocity: float) -> None:
+        self.__velocity = velocity
+
+    @property
+    def force(self) -> float:
+        """Force accumulated since the last update."""
+        return self.__force
+
+    @force.setter
+    def force(self, force: float) -> None:
+        self.__force = force
+
+    @property
+    def length(self) -> float:
+        """How far the train reaches from the front of its lead to the back of its last car."""
+        return self.__offsets[-1] + (self.__cars[0].length + self.__cars[-1].length) / 2
+
+    @property
+    def connections(self) -> Iterable[Connection]:
+        """The connections the train's cars could be on, each once."""
+        return self.__chain_indices.keys()
+
+    @property
+    def positions(self) -> Sequence[TrackPosition]:
+        """Every car's position, lead first."""
+        return [self.__position(offset) for offset in self.__offsets]
+
+    def position(self, car_: "car.Car") -> TrackPosition:
+        return self.__position(self.__offsets[self.__index(car_)])
+
+    def __position(self, offset: float) -> TrackPosition:
+        u = self.__lead_u - offset
+        hops = math.floor(u)
+        return TrackPosition(self.__chain[len(self.__chain) - 1 + hops], u - hops)
+
+    def __index(self, car_: "car.Car") -> int:
+        if (index := self.__indices.get(car_)) is None:
+            raise self._error(f"car {car_} not in train", self.ValueError)
+        return index
+
+    def set_position(self, car_: "car.Car", position: TrackPosition) -> None:
+        """Move the whole train so that car is at position."""
+        self.__place(position + self.__offsets[self.__index(car_)])
+
+    def cars_on(self, connection: Connection) -> frozenset["car.Car"]:
+        """The train's cars on connection.
+
+        Takes time in the log of the number of cars plus the number on connection.
+        """
+        cars: list[car.Car] = []
+        lead = self.__base + len(self.__chain) - 1
+        for index in self.__chain_indices.get(connection, ()):
+            # Cars on the connection hops back from the lead's are between hops - 1 and
+            # hops behind the lead's u.
+            hops = lead - index
+            cars.extend(
+                self.__cars[
+                    bisect.bisect_right(
+                        self.__offsets, self.__lead_u + hops - 1
+                    ) : bisect.bisect_right(self.__offsets, self.__lead_u + hops)
+                ]
+            )
+        return frozenset(cars)
+
+    def apply_impulse(self, impulse: float) -> None:
+        self.__velocity += impulse / self.__mass
+
+    def apply_force(self, force: float) -> None:
+        """Apply a per-second force to the train, as with Car.apply_force."""
+        self.__force += force
+
+    def update(self, t: float, dt: float) -> None:
+        """Integrate the train as one car with its total mass and velocity damping."""
+        # Apply velocity damping as a friction-like force.
+        self.apply_force(self.__velocity * self.__velocity_damping)
+        # Apply accumulated force as an impulse.
+        self.apply_impulse(self.__force * dt)
+        self.__force = 0
+        self.advance(self.__velocity * dt)
+
+    def advance(self, du: float) -> None:
+        """Move the train du along the track.
+
+        Backing up follows the chain the train came in on, rather than whichever way the
+        track behind the lead leads.
+        """
+        u = self.__lead_u + du
+        hops = math.floor(u)
+        first, last = self.__base, self.__base + len(self.__chain) - 1
+        lead = last + hops
+        tail = lead + math.floor(u - hops - self.__offsets[-1])
+        if lead == last and tail == first:
+            # Most updates don't move any end of the train onto another connection.
+            self.__lead_u = u
+            return
+        # Find new connections before changing anything, so running out of track leaves
+        # the train where it was.
+        ahead: list[Connection] = []
+        for _ in range(last, lead):
+            ahead.append(_step(ahead[-1] if ahead else self.__chain[-1], 1))
+        behind: list[Connection] = []
+        for _ in range(tail, first):
+            behind.append(_step(behind[-1] if behind else self.__chain[0], -1))
+        for connection in ahead:
+            self.__push(connection)
+        for connection in behind:
+            self.__push_back(connection)
+        while self.__base + len(self.__chain) - 1 > lead:
+            self.__pop()
+        while self.__base < tail:
+            self.__pop_back()
+        self.__lead_u = u - hops
+        self.__moved()
+
+    def __place(self, lead: TrackPosition) -> None:
+        """Put the lead at lead, and the rest of the train on the track behind it."""
+        behind: list[Connection] = []
+        for _ in range(math.floor(lead.u - self.__offsets[-1]), 0):
+            behind.append(_step(behind[-1] if behind else lead.connection, -1))
+        while self.__chain:
+            self.__pop()
+        self.__base = 0
+        self.__push(lead.connection)
+        for connection in behind:
+            self.__push_back(connection)
+        self.__lead_u = lead.u
+        self.__moved()
+
+    def __touch(self, connection: Connection) -> None:
+        if connection not in self.__was_on:
+            self.__was_on[connection] = connection in self.__chain_indices
+
+    def __push(self, connection: Connection) -> None:
+        self.__touch(connection)
+        self.__chain.append(connection)
+        self.__chain_indices.setdefault(connection, []).append(self.__base + len(self.__chain) - 1)
+
+    def __push_back(self, connection: Connection) -> None:
+        self.__touch(connection)
+        self.__base -= 1
+        self.__chain.appendleft(connection)
+        self.__chain_indices.setdefault(connection, []).insert(0, self.__base)
+
+    def __pop(self) -> None:
+        connection = self.__chain.pop()
+        self.__touch(connection)
+        self.__unindex(connection, -1)
+
+    def __pop_back(self) -> None:
+        connection = self.__chain.popleft()
+        self.__touch(connection)
+        self.__base += 1
+        self.__unindex(connection, 0)
+
+    def __unindex(self, connection: Connection, i: int) -> None:
+        indices = self.__chain_indices[connection]
+        del indices[i]
+        if not indices:
+            del self.__chain_indices[connection]
+
+    def __moved(self) -> None:
+        """Tell the cars' manager which connections the chain gained and lost for good."""
+        was_on, self.__was_on = self.__was_on, {}
+        entered = [c for c, was in was_on.items() if not was and c in self.__chain_indices]
+        left = [c for c, was in was_on.items() if was and c not in self.__chain_indices]
+        if (entered or left) and (manager := self.__cars[0].manager) is not None:
+            manager.train_moved(self, entered, left)
+
+
+def _step(connection: Connection, hops: int) -> Connection:
+    """The connection hops along from connection, loading track on paged grids."""
+    return (TrackPosition(connection, 0.5) + hops).connection
+
+
+from tracky.cars import car
@@ -0,0 +1,231 @@
+import importlib.util
+import random
+
+import pytest
+from pytest import approx  # type: ignore
+
+from tracky.cars import Car, CarManager, Collider, Train
+from tracky.core import Error
+from tracky.track import Direction, Grid, GridPosition, Piece, TrackPosition
+
+
+def _line(length: int) -> tuple[Grid, list[Piece]]:
+    pieces = list(Piece.create_line(GridPosition(0, 0), Direction.RIGHT, length))
+    return Grid(pieces=pieces), pieces
+
+
+def _cars(
+    position: TrackPosition,
+    n: int,
+    length: float = 1,
+    mass: float = 1,
+    velocity_damping: float = -0.1,
+) -> list[Car]:
+    return [Car(position, length, mass, velocity_damping) for _ in range(n)]
+
+
+def test_ctor() -> None:
+    _, pieces = _line(4)
+    position = TrackPosition(pieces[3].connection(Direction.LEFT), 0.75)
+    cars = [Car(position, length=1, mass=2), Car(position, length=0.5, mass=3)]
+    train = Train(cars, gap=0.25)
+    assert train.cars == tuple(cars)
+    assert train.gap == 0.25
+    assert train.mass == 5
+    assert train.velocity_damping == approx(-0.2)
+    assert train.length == approx(1.75)
+    assert all(car.train is train for car in cars)
+    # The follower is moved to its offset behind the lead.
+    assert train.positions == [
+        position,
+        TrackPosition(pieces[2].connection(Direction.LEFT), 0.75),
+    ]
+    assert cars[1].position == train.positions[1]
+    assert set(train.connections) == {pieces[3].connection(Direction.LEFT), cars[1].connection}
+
+
+def test_ctor_invalid() -> None:
+    _, pieces = _line(2)
+    position = TrackPosition(pieces[1].connection(Direction.LEFT), 0.5)
+    car = Car(position)
+    with pytest.raises(Train.ValueError):
+        Train([])
+    with pytest.raises(Train.ValueError):
+        Train([car], gap=-1)
+    with pytest.raises(Train.ValueError):
+        Train([car, car])
+    with pytest.raises(Train.ValueError):
+        Train([Car(position, manager=CarManager())])
+    Train([car])
+    with pytest.raises(Train.ValueError):
+        Train([car])
+    # Not enough track behind the lead for the followers.
+    with pytest.raises(TrackPosition.ValueError):
+        Train(_cars(position, 3))
+
+
+def test_car_state() -> None:
+    _, pieces = _line(4)
+    lead, follower = _cars(TrackPosition(pieces[2].connection(Direction.LEFT), 0.5), 2)
+    train = Train([lead, follower])
+    follower.apply_impulse(4)
+    assert lead.velocity == train.velocity == 2
+    follower.apply_force(3)
+    lead.apply_force(1)
+    assert follower.force == train.force == 4
+    follower.set_state(TrackPosition(pieces[1].connection(Direction.LEFT), 0.25), 1, 0)
+    assert lead.position == TrackPosition(pieces[2].connection(Direction.LEFT), 0.25)
+    assert lead.velocity == 1
+    assert lead.force == 0
+    follower.u = 0.5
+    assert lead.u == 0.5
+    lead.advance(1)
+    assert follower.position == TrackPosition(pieces[2].connection(Direction.LEFT), 0.5)
+    with pytest.raises(Error):
+        lead.update(0, 0.1)
+    with pytest.raises(Train.ValueError):
+        train.position(Car(lead.position))
+
+
+def test_update_matches_car() -> None:
+    # A train moves like one car with all of its cars' mass and velocity damping.
+    grid = Grid.create_loop(3, 3)
+    position = TrackPosition(grid[GridPosition(0, 0)].connection(Direction.DOWN), 0.5)
+    train = Train(_cars(position, 4, mass=2, velocity_damping=-0.1))
+    car = Car(position, mass=8, velocity_damping=-0.4)
+    train.apply_impulse(24)
+    car.apply_impulse(24)
+    for _ in range(100):
+        train.apply_force(1)
+        car.apply_force(1)
+        train.update(0, 0.1)
+        car.update(0, 0.1)
+    assert train.velocity == car.velocity
+    assert train.positions[0] == car.position
+
+
+def test_advance_and_back() -> None:
+    _, pieces = _line(12)
+    cars = _cars(TrackPosition(pieces[4].connection(Direction.LEFT), 0.5), 3)
+    train = Train(cars, gap=0.5)
+    positions = train.positions
+    for du in [0.25, 3.5, 1.75, -4.5, -1, 6.25]:
+        train.advance(du)
+    train.advance(-6.25)
+    assert [p.connection for p in train.positions] == [p.connection for p in positions]
+    assert [p.u for p in train.positions] == approx([p.u for p in positions])
+    # Backing up past where the train started still follows the track.
+    train.advance(-0.25)
+    assert cars[2].connection is pieces[1].connection(Direction.LEFT)
+    assert cars[2].u == approx(0.25)
+
+
+def test_advance_dead_end() -> None:
+    _, pieces = _line(3)
+    train = Train(_cars(TrackPosition(pieces[1].connection(Direction.LEFT), 0.5), 2))
+    positions = train.positions
+    for du in [2, -1]:
+        with pytest.raises(TrackPosition.ValueError):
+            train.advance(du)
+        assert train.positions == positions
+
+
+def test_backs_up_the_way_it_came() -> None:
+    # A piece with two ways in from the left, so backing up from its right end could go
+    # either way.
+    grid = Grid(
+        pieces=[
+            Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT),
+            Piece.create(GridPosition(0, 1), Direction.LEFT, Direction.RIGHT),
+        ]
+    )
+    start = grid[GridPosition(0, 0)].connection(Direction.LEFT)
+    train = Train([Car(TrackPosition(start, 0.5), length=0.5)])
+    train.advance(1)
+    train.advance(-1)
+    assert train.positions == [TrackPosition(start, 0.5)]
+
+
+def test_longer_than_loop() -> None:
+    grid = Grid.create_loop(2, 2)
+    connections = grid.graph.connections
+    position = TrackPosition(grid[GridPosition(0, 0)].connection(Direction.DOWN), 0.5)
+    cars = _cars(position, 10, length=0.5)
+    train = Train(cars)
+    train.advance(2.75)
+    for connection in connections:
+        assert train.cars_on(connection) == {
+            car for car in cars if car.connection is connection
+        }, connection
+    assert set(train.connections) == {car.connection for car in cars}
+
+
+def test_manager() -> None:
+    grid = Grid.create_loop(4, 4)
+    connections = grid.graph.connections
+    rng = random.Random(1)
+    trains = [
+        Train(
+            _cars(TrackPosition(connections[i * 3], rng.random()), rng.randrange(1, 8), length=0.5)
+        )
+        for i in range(4)
+    ]
+    loose = Car(TrackPosition(connections[1], 0.5))
+    manager = CarManager(cars=[loose, *(car for train in trains for car in train.cars)])
+    assert set(manager.trains) == set(trains)
+    for train in trains:
+        train.apply_impulse(rng.uniform(-1, 3) * train.mass)
+    for _ in range(50):
+        manager.update(0, 0.1)
+        for connection in connections:
+            assert manager.cars_on(connection) == {
+                car for car in manager if car.connection is connection
+            }
+    piece = grid[GridPosition(0, 0)]
+    assert manager.cars_on_piece(piece) == {car for car in manager if car.piece is piece}
+    # Removing a train's cars takes it out of the index.
+    manager.remove_cars(trains[0].cars)
+    assert set(manager.trains) == set(trains[1:])
+    assert not any(manager.cars_on(connection) & set(trains[0].cars) for connection in connections)
+    trains[0].advance(1)
+    manager.add_cars(trains[0].cars)
+    for connection in connections:
+        assert manager.cars_on(connection) == {
+            car for car in manager if car.connection is connection
+        }
+
+
+def test_manager_partial_train() -> None:
+    _, pieces = _line(3)
+    cars = _cars(TrackPosition(pieces[2].connection(Direction.LEFT), 0.5), 2)
+    Train(cars)
+    with pytest.raises(CarManager.ValidationError):
+        CarManager(cars=cars[:1])
+    manager = CarManager(cars=cars)
+    with pytest.raises(CarManager.ValidationError):
+        manager.remove_car(cars[1])
+
+
+@pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="needs numpy")
+def test_no_engine() -> None:
+    from tracky.cars.engine import Engine
+
+    grid, pieces = _line(2)
+    cars = _cars(TrackPosition(pieces[1].connection(Direction.LEFT), 0.5), 2)
+    Train(cars)
+    with pytest.raises(Car.ValidationError):
+        CarManager(cars=cars, engine=Engine(grid))
+
+
+def test_collisions() -> None:
+    grid, pieces = _line(6)
+    train = Train(_cars(TrackPosition(pieces[2].connection(Direction.LEFT), 0.5), 3, mass=1))
+    car = Car(TrackPosition(pieces[3].connection(Direction.LEFT), 0.25), mass=3, velocity_damping=0)
+    train.apply_impulse(3)
+    collider = Collider(grid, CarManager(cars=[*train.cars, car]))
+    # The train's own cars touch, but only its lead and the car collide.
+    assert collider.contacts() == [(train.cars[0], car)]
+    collider.update(0, 0.1)
+    # The train's mass equals the car's, so they swap velocities.
+    assert train.velocity == approx(0)
+    assert car.velocity == approx(1)
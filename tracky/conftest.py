@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(params=[False, True], ids=["no_engine", "engine"])
+def engine(request: pytest.FixtureRequest) -> bool:
+    """Whether the test's cars are in a numpy engine, for tests run both ways.
+
+    The engine is optional, so runs with one are skipped when numpy isn't installed.
+    """
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
@@ -1,3 +1,4 @@
 from .error import Error as Error
 from .errorable import Errorable as Errorable
+from .set_view import SetView as SetView
 from .validatable import Validatable as Validatable
@@ -4,6 +4,9 @@ from tracky.core.error import Error
 
 
 class Errorable:
+    # Let slotted subclasses stay free of a per-instance __dict__.
+    __slots__ = ()
+
     def _error[E: Error](self, message: str, type: Type[E] = Error) -> E:
         return type(f"{self}: {message}")
 
@@ -0,0 +1,33 @@
+from collections.abc import Set
+from typing import AbstractSet, Iterable, Iterator, override
+
+
+class SetView[T](Set[T]):
+    """Read-only live view of a set, for exposing a mutable set without copying it.
+
+    Set operations like | and - return new frozensets.
+    """
+
+    def __init__(self, items: AbstractSet[T]) -> None:
+        self.__items = items
+
+    @override
+    def __repr__(self) -> str:
+        return f"SetView({set(self.__items)})"
+
+    @override
+    def __contains__(self, item: object) -> bool:
+        return item in self.__items
+
+    @override
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.__items)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    @classmethod
+    @override
+    def _from_iterable[U](cls, it: Iterable[U]) -> frozenset[U]:
+        return frozenset(it)
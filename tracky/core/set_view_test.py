@@ -0,0 +1,25 @@
+from tracky.core import SetView
+
+
+def test_view() -> None:
+    items = {1, 2}
+    view = SetView(items)
+    assert view == {1, 2}
+    assert 1 in view
+    assert 3 not in view
+    assert len(view) == 2
+    assert sorted(view) == [1, 2]
+
+
+def test_live() -> None:
+    items = {1}
+    view = SetView(items)
+    items.add(2)
+    assert view == {1, 2}
+
+
+def test_set_operations() -> None:
+    view = SetView({1, 2})
+    assert view | {3} == frozenset({1, 2, 3})
+    assert isinstance(view | {3}, frozenset)
+    assert view - {1} == frozenset({2})
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from typing import Iterator, final
+from types import TracebackType
+from typing import Callable, Iterator, Optional, final
 
 from tracky.core.error import Error
 from tracky.core.errorable import Errorable
@@ -9,8 +10,13 @@ from tracky.core.errorable import Errorable
 class Validatable(ABC, Errorable):
     class ValidationError(Error): ...
 
+    # Depth of nested batch() blocks, and the validatables they've deferred, by identity.
+    __batch_depth = 0
+    __deferred: dict[int, "Validatable"] = {}
+
     def __init__(self) -> None:
         self.__pause_validation_count = 0
+        self.__full_validation_pending = False
 
     @final
     @property
@@ -18,22 +24,97 @@ class Validatable(ABC, Errorable):
         return self.__pause_validation_count == 0
 
     @final
-    @contextmanager
-    def _pause_validation(self) -> Iterator[None]:
-        try:
-            self.__pause_validation_count += 1
-            yield
-        finally:
-            self.__pause_validation_count -= 1
-            self._validate_if_enabled()
+    def _pause_validation(self, incremental: bool = False) -> "_Pause":
+        """Pause validation until the outermost pause exits.
+
+        Pauses from setters that track what they change can pass incremental=True to run
+        _validate_changes instead of _validate on exit, unless an enclosing pause asked
+        for full validation.
+
+        Use the result in a with statement straight away: the pause starts when this is
+        called, and ends when the with block exits.
+        """
+        self.__pause_validation_count += 1
+        if not incremental:
+            self.__full_validation_pending = True
+        return _Pause(self.__resume_validation)
+
+    def __resume_validation(self) -> None:
+        self.__pause_validation_count -= 1
+        self._validate_if_enabled()
 
     @final
     def _validate_if_enabled(self) -> None:
         if self._validation_enabled:
-            self._validate()
+            if Validatable.__batch_depth:
+                Validatable.__deferred[id(self)] = self
+                return
+            full = self.__full_validation_pending
+            self.__full_validation_pending = False
+            if full:
+                self._validate()
+            else:
+                self._validate_changes()
+
+    @final
+    @staticmethod
+    @contextmanager
+    def batch() -> Iterator[None]:
+        """Defer validation of every validatable until the end of the block.
+
+        Each validatable touched in the block is validated once on exit rather than after
+        every change, which makes building large structures linear. If the block raises,
+        deferred validation is dropped and the exception propagates.
+        """
+        Validatable.__batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            if Validatable.__batch_depth == 1:
+                Validatable.__deferred.clear()
+            raise
+        finally:
+            Validatable.__batch_depth -= 1
+        if Validatable.__batch_depth == 0:
+            deferred = list(Validatable.__deferred.values())
+            Validatable.__deferred.clear()
+            for validatable in deferred:
+                validatable._validate_if_enabled()
 
     def _validation_error(self, message: str) -> "Validatable.ValidationError":
         return self._error(message, self.ValidationError)
 
     @abstractmethod
     def _validate(self) -> None: ...
+
+    def _validate_changes(self) -> None:
+        """Validate only what changed since the last validation.
+
+        Defaults to full validation. Override along with tracking changes in setters that
+        pause with incremental=True.
+        """
+        self._validate()
+
+
+class _Pause:
+    """Ends a validation pause on exit.
+
+    Setters pause on every change, so this is a plain class rather than a
+    contextlib.contextmanager generator, which costs several times as much per use.
+    """
+
+    __slots__ = ("__resume",)
+
+    def __init__(self, resume: Callable[[], None]) -> None:
+        self.__resume = resume
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(
+        self,
+        type: Optional[type[BaseException]],
+        value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.__resume()
@@ -48,3 +48,65 @@ def test_invalid_operation() -> None:
     with pytest.raises(_Validatable.ValidationError) as excinfo:
         v.invalid_operation()
     assert str(excinfo.value) == "test: invalid"
+
+
+def test_batch_defers_validation() -> None:
+    v1 = _Validatable("v1")
+    v2 = _Validatable("v2")
+    with Validatable.batch():
+        v1.invalid_operation()
+        v2.invalid_operation()
+        with Validatable.batch():
+            v1.valid = True
+        v2.valid = True
+
+
+def test_batch_validates_on_exit() -> None:
+    v = _Validatable("test")
+    with pytest.raises(_Validatable.ValidationError) as excinfo, Validatable.batch():
+        v.invalid_operation()
+    assert str(excinfo.value) == "test: invalid"
+
+
+def test_batch_drops_validation_on_error() -> None:
+    v = _Validatable("test")
+    with pytest.raises(ZeroDivisionError), Validatable.batch():
+        v.invalid_operation()
+        _ = 1 / 0
+    v.valid = True
+
+
+class _IncrementalValidatable(_Validatable):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.validations: list[str] = []
+
+    @override
+    def _validate(self) -> None:
+        self.validations.append("full")
+
+    @override
+    def _validate_changes(self) -> None:
+        self.validations.append("changes")
+
+    def incremental_operation(self) -> None:
+        with self._pause_validation(incremental=True):
+            pass
+
+
+def test_incremental() -> None:
+    v = _IncrementalValidatable("test")
+    v.incremental_operation()
+    assert v.validations == ["changes"]
+    with v._pause_validation():  # type: ignore
+        v.incremental_operation()
+    assert v.validations == ["changes", "full"]
+
+
+def test_incremental_default() -> None:
+    v = _Validatable("test")
+    with (
+        pytest.raises(_Validatable.ValidationError),
+        v._pause_validation(incremental=True),  # type: ignore
+    ):
+        v._Validatable__valid = False  # type: ignore
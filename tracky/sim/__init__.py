@@ -1 +1,11 @@
+from .checkpoint import Checkpoint as Checkpoint
+from .checkpoint import Checkpointer as Checkpointer
+from .replay import Log as Log
+from .replay import Recorder as Recorder
+from .replay import Replayer as Replayer
+from .runner import Runner as Runner
+from .runner import RunStats as RunStats
 from .sim import Sim as Sim
+from .sweep import Scenario as Scenario
+from .sweep import ScenarioResult as ScenarioResult
+from .sweep import Sweep as Sweep
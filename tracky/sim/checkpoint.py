@@ -0,0 +1,327 @@
+import io
+import math
+import struct
+import sys
+from array import array
+from copy import copy
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional, Sequence, override
+
+from tracky.cars import Car, CarManager, Collider, Train
+from tracky.core import Error, Errorable
+from tracky.sim.sim import Sim
+from tracky.track import Grid, Layout, TrackPosition
+
+
+def _little_endian[T: (int, float)](column: "array[T]") -> "array[T]":
+    """column with its items little-endian, swapping a copy on big-endian machines.
+
+    Swapping is its own inverse, so this converts both to and from little-endian.
+    """
+    if sys.byteorder == "little":
+        return column
+    swapped = copy(column)  # pragma: no cover
+    swapped.byteswap()  # pragma: no cover
+    return swapped  # pragma: no cover
+
+
+@dataclass(frozen=True)
+class Checkpoint(Errorable):
+    """A snapshot of a sim's grid and cars at time t.
+
+    The grid is kept as an encoded Layout, and each car's state as a row across packed
+    columns, with its connection given by id in the grid's compiled graph. Graph ids only
+    depend on the layout, so the ids still hold for a grid read back from the layout.
+    Trains are kept as their cars' indices, lead first, and their gap. If the sim has a
+    collider, its restitution is kept too, so restored sims collide the same way.
+
+    Checkpoints from Checkpointer.capture also keep the cars they were taken from, so the
+    same sim can be rewound to them. Checkpoints read back with from_bytes can only be
+    restored into a new sim.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    MAGIC: ClassVar[bytes] = b"TRKC"
+    VERSION: ClassVar[int] = 2
+    # magic, version, t, layout size, number of cars, number of trains, and restitution,
+    # NaN without a collider.
+    HEADER: ClassVar[struct.Struct] = struct.Struct("<4sHdQQQd")
+    # Car state is stored as this many columns of 8-byte items, in the order of __columns.
+    COLUMNS: ClassVar[int] = 7
+    ITEM_SIZE: ClassVar[int] = 8
+    # Each train's number of cars and gap, followed by its cars' indices.
+    TRAIN: ClassVar[struct.Struct] = struct.Struct("<Qd")
+
+    t: float
+    layout: bytes
+    connection_ids: "array[int]"
+    us: "array[float]"
+    velocities: "array[float]"
+    forces: "array[float]"
+    lengths: "array[float]"
+    masses: "array[float]"
+    velocity_dampings: "array[float]"
+    trains: Sequence[tuple[Sequence[int], float]] = ()
+    restitution: Optional[float] = None
+    cars: Sequence[Car] = field(default=(), compare=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.connection_ids)
+
+    @property
+    def __columns(self) -> "tuple[array[int] | array[float], ...]":
+        return (
+            self.connection_ids,
+            self.us,
+            self.velocities,
+            self.forces,
+            self.lengths,
+            self.masses,
+            self.velocity_dampings,
+        )
+
+    def to_bytes(self) -> bytes:
+        return b"".join(
+            [
+                self.HEADER.pack(
+                    self.MAGIC,
+                    self.VERSION,
+                    self.t,
+                    len(self.layout),
+                    len(self),
+                    len(self.trains),
+                    math.nan if self.restitution is None else self.restitution,
+                ),
+                self.layout,
+                *(_little_endian(column).tobytes() for column in self.__columns),
+                *(
+                    self.TRAIN.pack(len(cars), gap) + _little_endian(array("q", cars)).tobytes()
+                    for cars, gap in self.trains
+                ),
+            ]
+        )
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "Checkpoint":
+        if len(data) < Checkpoint.HEADER.size:
+            raise Checkpoint.ValueError(f"checkpoint header truncated: {len(data)} bytes")
+        magic, version, t, layout_size, count, train_count, restitution = (
+            Checkpoint.HEADER.unpack_from(data)
+        )
+        if magic != Checkpoint.MAGIC:
+            raise Checkpoint.ValueError(f"not a checkpoint: magic {magic!r}")
+        if version != Checkpoint.VERSION:
+            raise Checkpoint.ValueError(f"unsupported checkpoint version {version}")
+        column_size = count * Checkpoint.ITEM_SIZE
+        offset = Checkpoint.HEADER.size + layout_size
+        if len(data) < (end := offset + column_size * Checkpoint.COLUMNS):
+            raise Checkpoint.ValueError(f"checkpoint has {len(data)} bytes, expected {end}")
+        columns = [
+            data[offset + i * column_size : offset + (i + 1) * column_size]
+            for i in range(Checkpoint.COLUMNS)
+        ]
+        trains: list[tuple[Sequence[int], float]] = []
+        for _ in range(train_count):
+            if len(data) < end + Checkpoint.TRAIN.size:
+                raise Checkpoint.ValueError(f"checkpoint train truncated at {end}")
+            cars, gap = Checkpoint.TRAIN.unpack_from(data, end)
+            start, end = (
+                end + Checkpoint.TRAIN.size,
+                end + Checkpoint.TRAIN.size + cars * Checkpoint.ITEM_SIZE,
+            )
+            if len(data) < end:
+                raise Checkpoint.ValueError(f"checkpoint train truncated at {start}")
+            trains.append((tuple(_little_endian(array("q", data[start:end]))), gap))
+        if len(data) != end:
+            raise Checkpoint.ValueError(f"checkpoint has {len(data)} bytes, expected {end}")
+        us, velocities, forces, lengths, masses, velocity_dampings = (
+            _little_endian(array("d", column)) for column in columns[1:]
+        )
+        return Checkpoint(
+            t,
+            data[Checkpoint.HEADER.size : offset],
+            _little_endian(array("q", columns[0])),
+            us,
+            velocities,
+            forces,
+            lengths,
+            masses,
+            velocity_dampings,
+            tuple(trains),
+            None if math.isnan(restitution) else restitution,
+        )
+
+    def restore(self, engine: bool = False) -> Sim:
+        """Build a new sim from this checkpoint, optionally with a numpy engine for its cars."""
+        grid = Layout.read(io.BytesIO(self.layout))
+        cars = self.restore_cars(grid)
+        engine_ = None
+        if engine:
+            from tracky.cars.engine import Engine
+
+            engine_ = Engine(grid, capacity=len(cars))
+        car_manager = CarManager(cars=cars, engine=engine_)
+        return Sim(grid, car_manager, self.restore_collider(grid, car_manager))
+
+    def restore_collider(self, grid: Grid, car_manager: CarManager) -> Optional[Collider]:
+        """A collider like the checkpointed sim's for grid and car_manager, if it had one."""
+        if self.restitution is None:
+            return None
+        return Collider(grid, car_manager, self.restitution)
+
+    def restore_cars(self, grid: Grid) -> list[Car]:
+        """Build this checkpoint's cars on grid, which must have the checkpoint's layout.
+
+        The cars are in the same order as when the checkpoint was taken, and are coupled
+        into trains again.
+        """
+        connections = grid.graph.connections
+        if any(not 0 <= id_ < len(connections) for id_ in self.connection_ids):
+            raise self._error("connection id not in layout", self.ValueError)
+        if any(not 0 <= i < len(self) for indices, _ in self.trains for i in indices):
+            raise self._error("train car not in checkpoint", self.ValueError)
+        cars: list[Car] = []
+        for i, id_ in enumerate(self.connection_ids):
+            car = Car(
+                TrackPosition(connections[id_], self.us[i]),
+                length=self.lengths[i],
+                mass=self.masses[i],
+                velocity_damping=self.velocity_dampings[i],
+            )
+            car.set_state(car.position, self.velocities[i], self.forces[i])
+            cars.append(car)
+        for indices, gap in self.trains:
+            # Coupling places the followers behind the lead, so check that they end up
+            # where they were.
+            train = Train([cars[i] for i in indices], gap)
+            if train.positions != [
+                TrackPosition(connections[self.connection_ids[i]], self.us[i]) for i in indices
+            ]:
+                raise self._error(f"train {train} doesn't couple as it was", self.ValueError)
+            train.velocity = self.velocities[indices[0]]
+            train.force = self.forces[indices[0]]
+        return cars
+
+
+class Checkpointer(Errorable):
+    """Takes checkpoints of a sim, and rewinds it to them.
+
+    The grid's layout is only encoded again after the grid changes, so checkpoints of a
+    sim whose track is fixed cost little more than copying out car state, and share one
+    layout. The checkpointer listens to the grid for changes until it's closed.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(self, sim: Sim) -> None:
+        self.__sim = sim
+        self.__layout: Optional[bytes] = None
+        self.__closed = False
+        sim.grid.add_listener(self.__grid_changed)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Checkpointer(sim={self.__sim})"
+
+    @property
+    def sim(self) -> Sim:
+        return self.__sim
+
+    def __grid_changed(self, _: object) -> None:
+        self.__layout = None
+
+    @property
+    def layout(self) -> bytes:
+        """The sim's grid as an encoded Layout."""
+        if self.__layout is not None:
+            return self.__layout
+        file = io.BytesIO()
+        Layout.write(self.__sim.grid, file)
+        layout = file.getvalue()
+        if not self.__closed:
+            self.__layout = layout
+        return layout
+
+    def close(self) -> None:
+        """Stop listening to the grid.
+
+        The checkpointer can still be used, but encodes the layout again for every
+        checkpoint, since it can't tell when the grid changes.
+        """
+        if not self.__closed:
+            self.__closed = True
+            self.__layout = None
+            self.__sim.grid.remove_listener(self.__grid_changed)
+
+    def capture(self, t: float = 0) -> Checkpoint:
+        """Take a checkpoint of the sim at time t."""
+        layout = self.layout
+        car_manager = self.__sim.car_manager
+        collider = self.__sim.collider
+        restitution = None if collider is None else collider.restitution
+        if (engine := car_manager.engine) is not None:
+            # The engine already keeps car state in arrays, so copy them out whole.
+            return Checkpoint(
+                t,
+                layout,
+                array("q", engine.connection_ids.tobytes()),
+                array("d", engine.us.tobytes()),
+                array("d", engine.velocities.tobytes()),
+                array("d", engine.forces.tobytes()),
+                array("d", engine.lengths.tobytes()),
+                array("d", engine.masses.tobytes()),
+                array("d", engine.velocity_dampings.tobytes()),
+                restitution=restitution,
+                # Cars in trains can't be in an engine.
+                cars=tuple(engine.cars),
+            )
+        cars = list(car_manager)
+        indices = {car: i for i, car in enumerate(cars)}
+        graph = self.__sim.grid.graph
+        positions = [car.position for car in cars]
+        return Checkpoint(
+            t,
+            layout,
+            array("q", [graph.id(position.connection) for position in positions]),
+            array("d", [position.u for position in positions]),
+            array("d", [car.velocity for car in cars]),
+            array("d", [car.force for car in cars]),
+            array("d", [car.length for car in cars]),
+            array("d", [car.mass for car in cars]),
+            array("d", [car.velocity_damping for car in cars]),
+            tuple(
+                (tuple(indices[car] for car in train.cars), train.gap)
+                for train in car_manager.trains
+            ),
+            restitution,
+            tuple(cars),
+        )
+
+    def rewind(self, checkpoint: Checkpoint) -> None:
+        """Put the sim's cars back how they were at checkpoint.
+
+        The grid has to be as it was, and checkpoint has to have come from capture. Cars
+        added since the checkpoint are removed, and cars removed since are added back.
+        """
+        if len(checkpoint.cars) != len(checkpoint):
+            raise self._error("checkpoint has no cars to rewind to", self.ValueError)
+        if checkpoint.layout != self.layout:
+            raise self._error("grid changed since checkpoint", self.ValueError)
+        car_manager = self.__sim.car_manager
+        car_manager.cars = checkpoint.cars
+        if (engine := car_manager.engine) is not None and engine.cars == list(checkpoint.cars):
+            engine.set_state(
+                checkpoint.connection_ids, checkpoint.us, checkpoint.velocities, checkpoint.forces
+            )
+            return
+        connections = self.__sim.grid.graph.connections
+        for car, id_, u, velocity, force in zip(
+            checkpoint.cars,
+            checkpoint.connection_ids,
+            checkpoint.us,
+            checkpoint.velocities,
+            checkpoint.forces,
+            strict=True,
+        ):
+            car.set_state(TrackPosition(connections[id_], u), velocity, force)
@@ -0,0 +1,245 @@
+import dataclasses
+import io
+from typing import Sequence
+
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.cars import Car, CarManager, Collider, Train
+from tracky.sim import Checkpoint, Checkpointer, Sim
+from tracky.track import Direction, Grid, GridPosition, Layout, Piece, TrackPosition
+
+
+def _sim(engine: bool = False) -> tuple[Sim, list[Car]]:
+    grid = Grid.create_loop(4, 4)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    cars = [
+        Car(TrackPosition(connection, 0.5), length=2, mass=3, velocity_damping=-0.5),
+        Car(TrackPosition(connection.forward_connection or connection, 0.25)),
+    ]
+    cars[0].apply_impulse(3)
+    cars[1].apply_impulse(-1)
+    cars[1].apply_force(2)
+    engine_ = None
+    if engine:
+        from tracky.cars.engine import Engine
+
+        engine_ = Engine(grid)
+    return Sim(grid, CarManager(cars=cars, engine=engine_)), cars
+
+
+def _state(car: Car) -> tuple[GridPosition | None, Direction, float, float, float]:
+    return (car.grid_position, car.connection.forward_direction, car.u, car.velocity, car.force)
+
+
+def _statics(car: Car) -> tuple[float, float, float]:
+    return car.length, car.mass, car.velocity_damping
+
+
+def test_capture(engine: bool) -> None:
+    sim, cars = _sim(engine)
+    checkpoint = Checkpointer(sim).capture(t=1.5)
+    assert checkpoint.t == 1.5
+    assert len(checkpoint) == 2
+    assert set(checkpoint.cars) == set(cars)
+    for car, id_, u, velocity, force, length, mass, velocity_damping in zip(
+        checkpoint.cars,
+        checkpoint.connection_ids,
+        checkpoint.us,
+        checkpoint.velocities,
+        checkpoint.forces,
+        checkpoint.lengths,
+        checkpoint.masses,
+        checkpoint.velocity_dampings,
+        strict=True,
+    ):
+        assert sim.grid.graph.connections[id_] is car.connection
+        assert (u, velocity, force) == (car.u, car.velocity, car.force)
+        assert (length, mass, velocity_damping) == _statics(car)
+
+
+def test_restore(engine: bool) -> None:
+    sim, _ = _sim()
+    checkpoint = Checkpointer(sim).capture()
+    restored = checkpoint.restore(engine=engine)
+    assert restored.grid is not sim.grid
+    assert set(restored.grid) == set(sim.grid)
+    assert (restored.car_manager.engine is not None) == engine
+    assert restored.collider is None
+    assert [_state(car) for car in restored.car_manager] == [_state(car) for car in checkpoint.cars]
+    assert [_statics(car) for car in restored.car_manager] == [
+        _statics(car) for car in checkpoint.cars
+    ]
+    restored.update(0, 0.5)
+    sim.update(0, 0.5)
+    assert [_state(car) for car in restored.car_manager] == [_state(car) for car in checkpoint.cars]
+
+
+def test_restore_collider(engine: bool) -> None:
+    sim, _ = _sim(engine)
+    sim = Sim(sim.grid, sim.car_manager, Collider(sim.grid, sim.car_manager, 0.5))
+    checkpoint = Checkpointer(sim).capture()
+    assert checkpoint.restitution == 0.5
+    assert Checkpoint.from_bytes(checkpoint.to_bytes()) == checkpoint
+    restored = checkpoint.restore(engine=engine)
+    assert restored.collider is not None
+    assert restored.collider.restitution == 0.5
+    assert Checkpointer(checkpoint.restore()).capture().restitution == 0.5
+
+
+def test_restore_invalid_connection_id() -> None:
+    sim, _ = _sim()
+    checkpoint = Checkpointer(sim).capture()
+    checkpoint.connection_ids[0] = len(sim.grid.graph)
+    with pytest.raises(Checkpoint.ValueError):
+        checkpoint.restore()
+
+
+def _train_sim() -> tuple[Sim, Train]:
+    grid = Grid.create_loop(4, 4)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    train = Train([Car(TrackPosition(connection, 0.75), mass=i + 1) for i in range(3)], gap=0.25)
+    loose = Car(TrackPosition(grid[GridPosition(3, 3)].connection(Direction.UP), 0.5))
+    train.apply_impulse(6)
+    train.apply_force(1)
+    return Sim(grid, CarManager(cars=[loose, *reversed(train.cars)])), train
+
+
+def test_restore_train() -> None:
+    sim, train = _train_sim()
+    checkpoint = Checkpointer(sim).capture()
+    cars = list(checkpoint.cars)
+    assert checkpoint.trains == ((tuple(cars.index(car) for car in train.cars), 0.25),)
+    restored = Checkpoint.from_bytes(checkpoint.to_bytes())
+    assert restored == checkpoint
+    grid = Layout.read(io.BytesIO(restored.layout))
+    restored_cars = restored.restore_cars(grid)
+    restored_sim = Sim(grid, CarManager(cars=restored_cars))
+    (restored_train,) = restored_sim.car_manager.trains
+    assert restored_train.gap == 0.25
+    assert restored_train.cars == tuple(restored_cars[cars.index(car)] for car in train.cars)
+    assert [_state(car) for car in restored_cars] == [_state(car) for car in cars]
+    restored_sim.update(0, 0.5)
+    sim.update(0, 0.5)
+    assert [_state(car) for car in restored_cars] == [_state(car) for car in cars]
+
+
+def test_restore_train_invalid(subtests: SubTests) -> None:
+    sim, _ = _train_sim()
+    checkpoint = Checkpointer(sim).capture()
+    ((indices, gap),) = checkpoint.trains
+    for name, trains in list[tuple[str, list[tuple[Sequence[int], float]]]](
+        [
+            ("car", [((*indices, len(checkpoint)), gap)]),
+            # The followers aren't where coupling would put them.
+            ("gap", [(indices, gap + 0.5)]),
+        ]
+    ):
+        with subtests.test(name=name):
+            with pytest.raises(Checkpoint.ValueError):
+                dataclasses.replace(checkpoint, trains=trains).restore()
+
+
+def test_bytes() -> None:
+    sim, _ = _sim()
+    checkpoint = Checkpointer(sim).capture(t=2)
+    actual = Checkpoint.from_bytes(checkpoint.to_bytes())
+    assert actual == checkpoint
+    assert actual.cars == ()
+    assert [_state(car) for car in actual.restore().car_manager] == [
+        _state(car) for car in checkpoint.cars
+    ]
+
+
+def test_from_bytes_invalid(subtests: SubTests) -> None:
+    sim, _ = _sim()
+    data = Checkpointer(sim).capture().to_bytes()
+    for name, invalid in list[tuple[str, bytes]](
+        [
+            ("empty", b""),
+            ("magic", b"NOPE" + data[4:]),
+            ("version", data[:4] + b"\xff\xff" + data[6:]),
+            ("truncated", data[:-1]),
+        ]
+    ):
+        with subtests.test(name=name):
+            with pytest.raises(Checkpoint.ValueError):
+                Checkpoint.from_bytes(invalid)
+
+
+def test_from_bytes_invalid_train(subtests: SubTests) -> None:
+    sim, _ = _train_sim()
+    data = Checkpointer(sim).capture().to_bytes()
+    # The train's 3 car indices come last, after its count and gap.
+    for name, invalid in list[tuple[str, bytes]](
+        [
+            ("train", data[: -3 * 8 - 1]),
+            ("cars", data[:-1]),
+            ("extra", data + b"\0"),
+        ]
+    ):
+        with subtests.test(name=name):
+            with pytest.raises(Checkpoint.ValueError):
+                Checkpoint.from_bytes(invalid)
+
+
+def test_layout_cached() -> None:
+    sim, _ = _sim()
+    checkpointer = Checkpointer(sim)
+    assert checkpointer.sim is sim
+    first = checkpointer.capture()
+    assert checkpointer.capture().layout is first.layout
+    sim.grid.add_piece(Piece(GridPosition(10, 10)))
+    second = checkpointer.capture()
+    assert second.layout != first.layout
+
+
+def test_close() -> None:
+    sim, _ = _sim()
+    checkpointer = Checkpointer(sim)
+    first = checkpointer.capture()
+    checkpointer.close()
+    checkpointer.close()
+    sim.grid.add_piece(Piece(GridPosition(10, 10)))
+    # Closed checkpointers don't hear about changes, so they don't cache the layout.
+    second = checkpointer.capture()
+    assert second.layout != first.layout
+    sim.grid.remove_piece(sim.grid[GridPosition(10, 10)])
+    assert checkpointer.capture().layout == first.layout
+
+
+def test_rewind(engine: bool) -> None:
+    sim, cars = _sim(engine)
+    checkpointer = Checkpointer(sim)
+    checkpoint = checkpointer.capture()
+    states = [_state(car) for car in cars]
+    for i in range(10):
+        sim.update(i, 0.1)
+    assert [_state(car) for car in cars] != states
+    checkpointer.rewind(checkpoint)
+    assert [_state(car) for car in cars] == states
+
+
+def test_rewind_cars_changed(engine: bool) -> None:
+    sim, cars = _sim(engine)
+    checkpointer = Checkpointer(sim)
+    checkpoint = checkpointer.capture()
+    states = [_state(car) for car in cars]
+    sim.car_manager.remove_car(cars[0])
+    extra = Car(cars[1].position)
+    sim.car_manager.add_car(extra)
+    sim.update(0, 0.1)
+    checkpointer.rewind(checkpoint)
+    assert set(sim.car_manager) == set(cars)
+    assert [_state(car) for car in cars] == states
+
+
+def test_rewind_invalid() -> None:
+    sim, _ = _sim()
+    checkpointer = Checkpointer(sim)
+    checkpoint = checkpointer.capture()
+    with pytest.raises(Checkpointer.ValueError):
+        checkpointer.rewind(Checkpoint.from_bytes(checkpoint.to_bytes()))
+    sim.grid.add_piece(Piece(GridPosition(10, 10)))
+    with pytest.raises(Checkpointer.ValueError):
+        checkpointer.rewind(checkpoint)
@@ -0,0 +1,279 @@
+import hashlib
+import io
+import struct
+from array import array
+from typing import BinaryIO, ClassVar, Iterator, Optional, Sequence, override
+
+from tracky.cars import Car, CarManager
+from tracky.core import Error, Errorable
+from tracky.sim.checkpoint import Checkpoint, Checkpointer
+from tracky.sim.sim import Sim
+from tracky.track import Connection, Grid, GridPosition, Layout, Piece
+
+
+class Log(Errorable):
+    """The binary event stream that Recorder writes and Replayer reads.
+
+    A log is a header followed by events, each a one-byte tag and a fixed-size payload.
+    Cars are given by their index in the checkpoint the log starts from, and pieces by
+    position, with piece events using the same record as Layout.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    MAGIC: ClassVar[bytes] = b"TRKR"
+    VERSION: ClassVar[int] = 1
+    # magic, version.
+    HEADER: ClassVar[struct.Struct] = struct.Struct("<4sH")
+
+    UPDATE: ClassVar[int] = 1
+    FORCE: ClassVar[int] = 2
+    IMPULSE: ClassVar[int] = 3
+    PIECE: ClassVar[int] = 4
+    REMOVE_PIECE: ClassVar[int] = 5
+    DIGEST: ClassVar[int] = 6
+
+    # Payloads by tag: (t, dt), (car, force), (car, impulse), a layout record, (row, col)
+    # and a state digest.
+    PAYLOADS: ClassVar[dict[int, struct.Struct]] = {
+        UPDATE: struct.Struct("<dd"),
+        FORCE: struct.Struct("<Id"),
+        IMPULSE: struct.Struct("<Id"),
+        PIECE: Layout.RECORD,
+        REMOVE_PIECE: struct.Struct("<ii"),
+        DIGEST: struct.Struct("<8s"),
+    }
+
+    @staticmethod
+    def events(data: bytes) -> Iterator[tuple[int, tuple[int | float | bytes, ...]]]:
+        """Check a log's header and unpack its events as (tag, payload)."""
+        if len(data) < Log.HEADER.size:
+            raise Log.ValueError(f"log header truncated: {len(data)} bytes")
+        magic, version = Log.HEADER.unpack_from(data)
+        if magic != Log.MAGIC:
+            raise Log.ValueError(f"not a log: magic {magic!r}")
+        if version != Log.VERSION:
+            raise Log.ValueError(f"unsupported log version {version}")
+        offset = Log.HEADER.size
+        while offset < len(data):
+            tag = data[offset]
+            if (payload := Log.PAYLOADS.get(tag)) is None:
+                raise Log.ValueError(f"invalid event tag {tag} at {offset}")
+            if offset + 1 + payload.size > len(data):
+                raise Log.ValueError(f"event truncated at {offset}")
+            yield tag, payload.unpack_from(data, offset + 1)
+            offset += 1 + payload.size
+
+    @staticmethod
+    def digest(sim: Sim, cars: Sequence[Car]) -> bytes:
+        """A hash of the exact connection, u, velocity and force of cars, in order."""
+        engine = sim.car_manager.engine
+        if engine is not None and engine.cars == list(cars):
+            columns = [engine.connection_ids, engine.us, engine.velocities, engine.forces]
+            data = b"".join(column.tobytes() for column in columns)
+        else:
+            graph = sim.grid.graph
+            positions = [car.position for car in cars]
+            data = b"".join(
+                [
+                    array("q", [graph.id(position.connection) for position in positions]).tobytes(),
+                    array("d", [position.u for position in positions]).tobytes(),
+                    array("d", [car.velocity for car in cars]).tobytes(),
+                    array("d", [car.force for car in cars]).tobytes(),
+                ]
+            )
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class Recorder(Errorable):
+    """Records a sim's inputs to a log, so a run can be replayed exactly.
+
+    Drive the sim through the recorder: update, apply_force and apply_impulse are passed on
+    to the sim and logged. Changes to the grid are picked up from its listeners. Every
+    digest_interval updates, a digest of every car's state is logged for the replayer to
+    check against.
+
+    The log starts from checkpoint, which the recorder takes when it's created. Save both
+    to replay the run. Events are buffered and written buffer_size bytes at a time, and on
+    flush and close.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(
+        self,
+        sim: Sim,
+        file: BinaryIO,
+        digest_interval: int = 60,
+        buffer_size: int = 1 << 16,
+    ) -> None:
+        self.__sim = sim
+        self.__file = file
+        self.__digest_interval = digest_interval
+        self.__buffer_size = buffer_size
+        self.__buffer = bytearray(Log.HEADER.pack(Log.MAGIC, Log.VERSION))
+        self.__updates = 0
+        if digest_interval < 1:
+            raise self._error(f"invalid digest interval {digest_interval}", self.ValueError)
+        checkpointer = Checkpointer(sim)
+        self.__checkpoint = checkpointer.capture()
+        checkpointer.close()
+        self.__cars = self.__checkpoint.cars
+        self.__car_indices = {car: i for i, car in enumerate(self.__cars)}
+        sim.grid.add_listener(self.__grid_changed)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Recorder(sim={self.__sim}, updates={self.__updates})"
+
+    @property
+    def sim(self) -> Sim:
+        return self.__sim
+
+    @property
+    def checkpoint(self) -> Checkpoint:
+        """The checkpoint the log starts from."""
+        return self.__checkpoint
+
+    def __event(self, tag: int, *payload: int | float | bytes) -> None:
+        self.__buffer.append(tag)
+        self.__buffer += Log.PAYLOADS[tag].pack(*payload)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def __car_index(self, car: Car) -> int:
+        if (index := self.__car_indices.get(car)) is None:
+            raise self._error(f"car {car} not in checkpoint", self.ValueError)
+        return index
+
+    def __grid_changed(self, position: GridPosition) -> None:
+        if (piece := self.__sim.grid.storage.get_piece(position)) is None:
+            self.__event(Log.REMOVE_PIECE, position.row, position.col)
+        else:
+            self.__event(
+                Log.PIECE,
+                position.row,
+                position.col,
+                piece.connection_mask,
+                Layout.SHAPE_CODES[piece.connection_shape],
+            )
+
+    def update(self, t: float, dt: float) -> None:
+        self.__event(Log.UPDATE, t, dt)
+        self.__sim.update(t, dt)
+        self.__updates += 1
+        if self.__updates % self.__digest_interval == 0:
+            self.__event(Log.DIGEST, Log.digest(self.__sim, self.__cars))
+
+    def apply_force(self, car: Car, force: float) -> None:
+        self.__event(Log.FORCE, self.__car_index(car), force)
+        car.apply_force(force)
+
+    def apply_impulse(self, car: Car, impulse: float) -> None:
+        self.__event(Log.IMPULSE, self.__car_index(car), impulse)
+        car.apply_impulse(impulse)
+
+    def flush(self) -> None:
+        self.__file.write(self.__buffer)
+        self.__buffer.clear()
+
+    def close(self) -> None:
+        """Log a final digest, write out what's buffered, and stop recording."""
+        self.__event(Log.DIGEST, Log.digest(self.__sim, self.__cars))
+        self.flush()
+        self.__sim.grid.remove_listener(self.__grid_changed)
+
+
+class Replayer(Errorable):
+    """Re-runs a recorded log against a sim restored from the log's checkpoint.
+
+    Updates run back to back rather than in real time, and each digest in the log is
+    checked against the replayed cars, raising DivergenceError at the first mismatch.
+    Engines round differently from cars updating themselves, so replay with an engine
+    exactly when the recording had one. The sim gets a collider if the recorded one had.
+    """
+
+    class DivergenceError(Error): ...
+
+    def __init__(self, checkpoint: Checkpoint, engine: bool = False) -> None:
+        grid = Layout.read(io.BytesIO(checkpoint.layout))
+        self.__cars = checkpoint.restore_cars(grid)
+        engine_ = None
+        if engine:
+            from tracky.cars.engine import Engine
+
+            engine_ = Engine(grid, capacity=len(self.__cars))
+        car_manager = CarManager(cars=self.__cars, engine=engine_)
+        self.__sim = Sim(grid, car_manager, checkpoint.restore_collider(grid, car_manager))
+        self.__updates = 0
+
+    @override
+    def __repr__(self) -> str:
+        return f"Replayer(sim={self.__sim}, updates={self.__updates})"
+
+    @property
+    def sim(self) -> Sim:
+        return self.__sim
+
+    @property
+    def cars(self) -> Sequence[Car]:
+        """The replayed cars, in checkpoint order."""
+        return self.__cars
+
+    @property
+    def updates(self) -> int:
+        return self.__updates
+
+    def replay(self, data: bytes) -> int:
+        """Replay the events in a log, returning how many digests matched."""
+        digests = 0
+        grid = self.__sim.grid
+        for tag, payload in Log.events(data):
+            match tag, payload:
+                case Log.UPDATE, (float(t), float(dt)):
+                    self.__sim.update(t, dt)
+                    self.__updates += 1
+                case Log.FORCE, (int(car), float(force)):
+                    self.__car(car).apply_force(force)
+                case Log.IMPULSE, (int(car), float(impulse)):
+                    self.__car(car).apply_impulse(impulse)
+                case Log.PIECE, (int(row), int(col), int(mask), int(code)):
+                    _set_piece(grid, Layout.piece(row, col, mask, code))
+                case Log.REMOVE_PIECE, (int(row), int(col)):
+                    if (piece := grid.get(GridPosition(row, col))) is not None:
+                        grid.remove_piece(piece)
+                case _:
+                    if (digest := Log.digest(self.__sim, self.__cars)) != payload[0]:
+                        raise self._error(
+                            f"state diverged after {self.__updates} updates: digest "
+                            f"{digest!r}, expected {payload[0]!r}",
+                            self.DivergenceError,
+                        )
+                    digests += 1
+        return digests
+
+    def __car(self, index: int) -> Car:
+        if not 0 <= index < len(self.__cars):
+            raise self._error(f"invalid car {index}", Log.ValueError)
+        return self.__cars[index]
+
+
+def _set_piece(grid: Grid, piece: Piece) -> None:
+    """Make the piece at piece's position match piece.
+
+    Connections the old and new piece have in common are kept, so cars on them stay put.
+    """
+    existing: Optional[Piece] = grid.get(piece.position)
+    if existing is None or existing.connection_shape is not piece.connection_shape:
+        if existing is not None:
+            grid.remove_piece(existing)
+        grid.add_piece(piece)
+        return
+    kept: list[Connection] = []
+    for connection in piece.connections:
+        current = existing.get_connection(connection.reverse_direction)
+        if current is not None and current.forward_direction is connection.forward_direction:
+            kept.append(current)
+        else:
+            kept.append(Connection(connection.reverse_direction, connection.forward_direction))
+    existing.connections = kept
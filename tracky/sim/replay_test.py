@@ -0,0 +1,223 @@
+import io
+
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.cars import Car, CarManager, Collider, Train
+from tracky.sim import Log, Recorder, Replayer, Sim
+from tracky.sim.replay import _set_piece  # pyright: ignore[reportPrivateUsage]
+from tracky.track import (
+    Connection,
+    ConnectionShape,
+    Direction,
+    Grid,
+    GridPosition,
+    Piece,
+    TrackPosition,
+)
+
+
+def _sim(engine: bool = False) -> tuple[Sim, list[Car]]:
+    grid = Grid.create_loop(5, 5)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    cars = [Car(TrackPosition(connection, i / 3), mass=i + 1) for i in range(3)]
+    engine_ = None
+    if engine:
+        from tracky.cars.engine import Engine
+
+        engine_ = Engine(grid)
+    return Sim(grid, CarManager(cars=cars, engine=engine_)), cars
+
+
+def _state(car: Car) -> tuple[GridPosition | None, Direction, float, float, float]:
+    return (car.grid_position, car.connection.forward_direction, car.u, car.velocity, car.force)
+
+
+def _record(sim: Sim, cars: list[Car], recorder: Recorder) -> None:
+    for i in range(20):
+        if i % 3 == 0:
+            recorder.apply_impulse(cars[i % len(cars)], 0.5 + i / 7)
+        recorder.apply_force(cars[(i + 1) % len(cars)], -0.3)
+        if i == 4:
+            sim.grid.add_piece(Piece(GridPosition(10, 10)))
+        if i == 8:
+            sim.grid[GridPosition(10, 10)].add_connection(
+                Connection(Direction.LEFT, Direction.RIGHT)
+            )
+        if i == 12:
+            sim.grid.remove_piece(sim.grid[GridPosition(10, 10)])
+        recorder.update(i / 10, 0.1)
+    recorder.close()
+
+
+def test_replay(engine: bool) -> None:
+    sim, cars = _sim(engine)
+    file = io.BytesIO()
+    recorder = Recorder(sim, file, digest_interval=5)
+    assert recorder.sim is sim
+    assert set(recorder.checkpoint.cars) == set(cars)
+    _record(sim, cars, recorder)
+    replayer = Replayer(recorder.checkpoint, engine=engine)
+    assert replayer.replay(file.getvalue()) == 5
+    assert replayer.updates == 20
+    assert [_state(car) for car in replayer.cars] == [
+        _state(car) for car in recorder.checkpoint.cars
+    ]
+    assert set(replayer.sim.grid) == set(sim.grid)
+
+
+def test_replay_train() -> None:
+    grid = Grid.create_loop(6, 6)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    train = Train([Car(TrackPosition(connection, 0.5), mass=i + 1) for i in range(4)], gap=0.1)
+    loose = Car(TrackPosition(grid[GridPosition(5, 5)].connection(Direction.UP), 0.5))
+    sim = Sim(grid, CarManager(cars=[*train.cars, loose]))
+    file = io.BytesIO()
+    recorder = Recorder(sim, file, digest_interval=5)
+    _record(sim, [*train.cars, loose], recorder)
+    replayer = Replayer(recorder.checkpoint)
+    # The replayed cars are coupled as they were, so they move as one.
+    assert replayer.replay(file.getvalue()) == 5
+    assert [_state(car) for car in replayer.cars] == [
+        _state(car) for car in recorder.checkpoint.cars
+    ]
+
+
+def test_replay_collider(engine: bool) -> None:
+    sim, cars = _sim(engine)
+    # The cars start overlapping, so they collide from the first update.
+    sim = Sim(sim.grid, sim.car_manager, Collider(sim.grid, sim.car_manager, 0.5))
+    file = io.BytesIO()
+    recorder = Recorder(sim, file, digest_interval=5)
+    _record(sim, cars, recorder)
+    replayer = Replayer(recorder.checkpoint, engine=engine)
+    assert replayer.sim.collider is not None
+    assert replayer.sim.collider.restitution == 0.5
+    assert replayer.replay(file.getvalue()) == 5
+    assert [_state(car) for car in replayer.cars] == [
+        _state(car) for car in recorder.checkpoint.cars
+    ]
+
+
+def test_replay_piece_changes() -> None:
+    sim, cars = _sim()
+    file = io.BytesIO()
+    recorder = Recorder(sim, file)
+    grid = sim.grid
+    piece = grid[GridPosition(0, 1)]
+    # Add a branch to a piece cars run over, and swap another for a curved one.
+    piece.add_connection(Connection(Direction.UP, Direction.DOWN))
+    grid.remove_piece(grid[GridPosition(0, 2)])
+    grid.add_piece(
+        Piece.from_connection_mask(
+            GridPosition(0, 2), piece.connection_mask, ConnectionShape.CURVED
+        )
+    )
+    grid.add_piece(Piece(GridPosition(9, 9)))
+    grid.remove_piece(grid[GridPosition(9, 9)])
+    recorder.apply_impulse(cars[0], 2)
+    for i in range(10):
+        recorder.update(i, 0.2)
+    recorder.close()
+    replayer = Replayer(recorder.checkpoint)
+    assert replayer.replay(file.getvalue()) == 1
+    replayed = replayer.sim.grid
+    assert set(replayed) == set(grid)
+    for position, piece in grid.items():
+        assert replayed[position].connection_mask == piece.connection_mask
+        assert replayed[position].connection_shape is piece.connection_shape
+    assert [_state(car) for car in replayer.cars] == [
+        _state(car) for car in recorder.checkpoint.cars
+    ]
+
+
+def test_divergence() -> None:
+    sim, cars = _sim()
+    file = io.BytesIO()
+    recorder = Recorder(sim, file, digest_interval=5)
+    _record(sim, cars, recorder)
+    data = file.getvalue()
+    # Change the last update's dt.
+    offset = data.rindex(bytes([Log.UPDATE]) + Log.PAYLOADS[Log.UPDATE].pack(1.9, 0.1))
+    data = (
+        data[:offset]
+        + bytes([Log.UPDATE])
+        + Log.PAYLOADS[Log.UPDATE].pack(1.9, 0.2)
+        + (data[offset + 1 + Log.PAYLOADS[Log.UPDATE].size :])
+    )
+    replayer = Replayer(recorder.checkpoint)
+    with pytest.raises(Replayer.DivergenceError):
+        replayer.replay(data)
+    assert replayer.updates == 20
+
+
+def test_buffering() -> None:
+    sim, _ = _sim()
+    file = io.BytesIO()
+    recorder = Recorder(sim, file, buffer_size=64)
+    recorder.update(0, 0.1)
+    assert file.getvalue() == b""
+    for _ in range(3):
+        recorder.update(0, 0.1)
+    assert len(file.getvalue()) >= 64
+    recorder.flush()
+    assert len(file.getvalue()) == Log.HEADER.size + 4 * (1 + Log.PAYLOADS[Log.UPDATE].size)
+
+
+def test_recorder_invalid() -> None:
+    sim, _ = _sim()
+    with pytest.raises(Recorder.ValueError):
+        Recorder(sim, io.BytesIO(), digest_interval=0)
+    recorder = Recorder(sim, io.BytesIO())
+    with pytest.raises(Recorder.ValueError):
+        recorder.apply_force(Car(next(iter(sim.car_manager)).position), 1)
+
+
+def test_events_invalid(subtests: SubTests) -> None:
+    header = Log.HEADER.pack(Log.MAGIC, Log.VERSION)
+    for name, data in list[tuple[str, bytes]](
+        [
+            ("empty", b""),
+            ("magic", Log.HEADER.pack(b"NOPE", Log.VERSION)),
+            ("version", Log.HEADER.pack(Log.MAGIC, Log.VERSION + 1)),
+            ("tag", header + b"\0"),
+            ("truncated", header + bytes([Log.UPDATE]) + b"\0"),
+            ("car", header + bytes([Log.FORCE]) + Log.PAYLOADS[Log.FORCE].pack(3, 1.0)),
+        ]
+    ):
+        with subtests.test(name=name):
+            sim, _ = _sim()
+            recorder = Recorder(sim, io.BytesIO())
+            with pytest.raises(Log.ValueError):
+                Replayer(recorder.checkpoint).replay(data)
+
+
+def test_set_piece() -> None:
+    grid = Grid()
+    position = GridPosition(0, 0)
+    _set_piece(grid, Piece(position))
+    assert not grid[position].connections
+    _set_piece(
+        grid,
+        Piece(
+            position,
+            [Connection(Direction.LEFT, Direction.RIGHT)],
+            connection_shape=ConnectionShape.CURVED,
+        ),
+    )
+    assert grid[position].connection_shape is ConnectionShape.CURVED
+    connection = grid[position].connection(Direction.LEFT)
+    _set_piece(
+        grid,
+        Piece(
+            position,
+            [
+                Connection(Direction.LEFT, Direction.RIGHT),
+                Connection(Direction.UP, Direction.DOWN),
+            ],
+            connection_shape=ConnectionShape.CURVED,
+        ),
+    )
+    # The connection both pieces have is kept rather than replaced.
+    assert grid[position].connection(Direction.LEFT) is connection
+    assert len(grid[position].connections) == 2
@@ -0,0 +1,109 @@
+import time
+from dataclasses import dataclass
+from typing import Mapping, Optional, override
+
+from tracky.core import Error, Errorable
+from tracky.sim.sim import Sim
+
+
+@dataclass(frozen=True)
+class RunStats:
+    """What a Runner did in one run, and how long it took."""
+
+    ticks: int
+    steps: int
+    car_updates: int
+    sim_time: float
+    wall_time: float
+    phase_times: Mapping[str, float]
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.wall_time if self.wall_time > 0 else 0
+
+    @property
+    def car_updates_per_second(self) -> float:
+        return self.car_updates / self.wall_time if self.wall_time > 0 else 0
+
+
+class Runner(Errorable):
+    """Headless fixed-timestep driver for a Sim.
+
+    Each tick advances the sim by dt, split into substeps equal steps, as fast as
+    possible. Time spent in each of the sim's phases is measured separately.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(self, sim: Sim, dt: float, substeps: int = 1, t: float = 0) -> None:
+        self.__sim = sim
+        self.__dt = dt
+        self.__substeps = substeps
+        self.__t = t
+        if dt <= 0:
+            raise self._error(f"invalid dt {dt}", self.ValueError)
+        if substeps < 1:
+            raise self._error(f"invalid substeps {substeps}", self.ValueError)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Runner(dt={self.__dt}, substeps={self.__substeps}, t={self.__t})"
+
+    @property
+    def sim(self) -> Sim:
+        return self.__sim
+
+    @property
+    def dt(self) -> float:
+        return self.__dt
+
+    @property
+    def substeps(self) -> int:
+        return self.__substeps
+
+    @property
+    def t(self) -> float:
+        """Simulated time, carried over between runs."""
+        return self.__t
+
+    def run(
+        self,
+        ticks: Optional[int] = None,
+        until: Optional[float] = None,
+        wall_time: Optional[float] = None,
+    ) -> RunStats:
+        """Run until the first of the given limits is reached.
+
+        The limits are a number of ticks, a simulated time, and seconds of wall time.
+        """
+        if ticks is None and until is None and wall_time is None:
+            raise self._error("no ticks, until or wall_time limit", self.ValueError)
+        phases = self.__sim.phases
+        phase_times = dict.fromkeys((name for name, _ in phases), 0.0)
+        step_dt = self.__dt / self.__substeps
+        start_t = self.__t
+        tick = 0
+        car_updates = 0
+        start = time.perf_counter()
+        while (
+            (ticks is None or tick < ticks)
+            and (until is None or self.__t < until)
+            and (wall_time is None or time.perf_counter() - start < wall_time)
+        ):
+            for substep in range(self.__substeps):
+                car_updates += len(self.__sim.car_manager)
+                for name, phase in phases:
+                    phase_start = time.perf_counter()
+                    phase(self.__t, step_dt)
+                    phase_times[name] += time.perf_counter() - phase_start
+                # Scale rather than accumulate so long runs don't drift.
+                self.__t = start_t + (tick * self.__substeps + substep + 1) * step_dt
+            tick += 1
+        return RunStats(
+            ticks=tick,
+            steps=tick * self.__substeps,
+            car_updates=car_updates,
+            sim_time=self.__t - start_t,
+            wall_time=time.perf_counter() - start,
+            phase_times=phase_times,
+        )
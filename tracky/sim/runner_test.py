@@ -0,0 +1,85 @@
+import pytest
+from pytest import approx  # type: ignore
+from pytest_subtests import SubTests
+
+from tracky.cars import Car, CarManager
+from tracky.sim import Runner, Sim
+from tracky.track import Direction, Grid, GridPosition, TrackPosition
+
+
+def _sim(num_cars: int = 2) -> tuple[Sim, list[Car]]:
+    grid = Grid.create_loop(3, 3)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    cars = [
+        Car(TrackPosition(connection, i / num_cars), velocity_damping=0) for i in range(num_cars)
+    ]
+    return Sim(grid, CarManager(cars=cars)), cars
+
+
+def test_ctor() -> None:
+    sim, _ = _sim()
+    runner = Runner(sim, 0.1, substeps=2, t=3)
+    assert runner.sim is sim
+    assert runner.dt == 0.1
+    assert runner.substeps == 2
+    assert runner.t == 3
+
+
+def test_ctor_invalid(subtests: SubTests) -> None:
+    sim, _ = _sim()
+    for dt, substeps in list[tuple[float, int]]([(0, 1), (-1, 1), (0.1, 0)]):
+        with subtests.test(dt=dt, substeps=substeps):
+            with pytest.raises(Runner.ValueError):
+                Runner(sim, dt, substeps)
+
+
+def test_run_no_limit() -> None:
+    sim, _ = _sim()
+    with pytest.raises(Runner.ValueError):
+        Runner(sim, 0.1).run()
+
+
+def test_run_ticks() -> None:
+    sim, cars = _sim()
+    cars[0].apply_impulse(1)
+    runner = Runner(sim, 0.1, substeps=2)
+    stats = runner.run(ticks=5)
+    assert stats.ticks == 5
+    assert stats.steps == 10
+    assert stats.car_updates == 20
+    assert stats.sim_time == approx(0.5)
+    assert runner.t == approx(0.5)
+    assert cars[0].u == approx(0.5)
+    assert set(stats.phase_times) == {name for name, _ in sim.phases}
+    assert stats.wall_time >= sum(stats.phase_times.values())
+    assert stats.ticks_per_second > 0
+    assert stats.car_updates_per_second > 0
+
+
+def test_run_until() -> None:
+    sim, _ = _sim()
+    runner = Runner(sim, 0.1)
+    assert runner.run(until=1).ticks == 10
+    assert runner.t == approx(1)
+    assert runner.run(until=1).ticks == 0
+    assert runner.run(until=1.5).ticks == 5
+
+
+def test_run_wall_time() -> None:
+    sim, _ = _sim()
+    stats = Runner(sim, 0.1).run(wall_time=0.01)
+    assert stats.ticks > 0
+    assert stats.wall_time >= 0.01
+
+
+def test_run_matches_sim_update() -> None:
+    sim, cars = _sim()
+    expected_sim, expected_cars = _sim()
+    for car in cars + expected_cars:
+        car.apply_impulse(3)
+    Runner(sim, 0.05, substeps=3).run(ticks=20)
+    for step in range(60):
+        expected_sim.update(step * 0.05 / 3, 0.05 / 3)
+    for car, expected_car in zip(cars, expected_cars, strict=True):
+        assert car.position.grid_position == expected_car.position.grid_position
+        assert car.u == approx(expected_car.u)
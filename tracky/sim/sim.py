@@ -1,13 +1,28 @@
-from typing import override
+from typing import Callable, Optional, Sequence, override
 
-from tracky.cars import CarManager
+from tracky.cars import CarManager, Collider
+from tracky.core import Error, Errorable
 from tracky.track import Grid
 
 
-class Sim:
-    def __init__(self, grid: Grid, car_manager: CarManager) -> None:
+class Sim(Errorable):
+    class ValueError(Error, ValueError): ...
+
+    def __init__(
+        self, grid: Grid, car_manager: CarManager, collider: Optional[Collider] = None
+    ) -> None:
+        """Create a sim.
+
+        If collider is given, cars collide with each other after they move each update.
+        Without one, they pass through each other.
+        """
         self.__grid = grid
         self.__car_manager = car_manager
+        self.__collider = collider
+        if collider is not None and (
+            collider.grid is not grid or collider.car_manager is not car_manager
+        ):
+            raise self._error(f"collider {collider} not for this grid and cars", self.ValueError)
 
     @property
     def grid(self) -> Grid:
@@ -17,6 +32,10 @@ class Sim:
     def car_manager(self) -> CarManager:
         return self.__car_manager
 
+    @property
+    def collider(self) -> Optional[Collider]:
+        return self.__collider
+
     @override
     def __eq__(self, other: object) -> bool:
         return other is self
@@ -29,5 +48,13 @@ class Sim:
     def __repr__(self) -> str:
         return f"Sim(grid={self.grid}, car_manager={self.car_manager})"
 
+    @property
+    def phases(self) -> Sequence[tuple[str, Callable[[float, float], None]]]:
+        """The named steps of an update, in order, each taking (t, dt)."""
+        if self.__collider is not None:
+            return (("cars", self.car_manager.update), ("collisions", self.__collider.update))
+        return (("cars", self.car_manager.update),)
+
     def update(self, t: float, dt: float) -> None:
-        self.car_manager.update(t, dt)
+        for _, phase in self.phases:
+            phase(t, dt)
@@ -1,4 +1,6 @@
-from tracky.cars import Car, CarManager
+import pytest
+
+from tracky.cars import Car, CarManager, Collider
 from tracky.sim import Sim
 from tracky.track import Direction, Grid, GridPosition, Piece, TrackPosition
 
@@ -30,3 +32,33 @@ def test_update() -> None:
     car.apply_impulse(1)
     sim.update(0, 0.5)
     assert car.u == 0.5
+
+
+def test_phases() -> None:
+    sim = Sim(Grid(), CarManager())
+    assert [name for name, _ in sim.phases] == ["cars"]
+
+
+def test_collider() -> None:
+    grid = Grid.create_loop(3, 3)
+    connection = grid[GridPosition(0, 0)].connection(Direction.DOWN)
+    behind = Car(TrackPosition(connection, 0.25), velocity_damping=0)
+    ahead = Car(TrackPosition(connection, 0.5), velocity_damping=0)
+    car_manager = CarManager(cars=[behind, ahead])
+    collider = Collider(grid, car_manager)
+    sim = Sim(grid, car_manager, collider)
+    assert sim.collider is collider
+    assert [name for name, _ in sim.phases] == ["cars", "collisions"]
+    behind.apply_impulse(1)
+    sim.update(0, 0.1)
+    assert behind.velocity == 0
+    assert ahead.velocity == 1
+
+
+def test_collider_invalid() -> None:
+    grid = Grid()
+    car_manager = CarManager()
+    with pytest.raises(Sim.ValueError):
+        Sim(grid, CarManager(), Collider(grid, car_manager))
+    with pytest.raises(Sim.ValueError):
+        Sim(Grid(), car_manager, Collider(grid, car_manager))
@@ -0,0 +1,162 @@
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Generator, Iterable, Mapping, Optional, override
+
+from tracky.cars import Car, CarManager
+from tracky.core import Error, Errorable
+from tracky.sim.runner import Runner, RunStats
+from tracky.sim.sim import Sim
+from tracky.track import Grid, Layout, TrackPosition
+
+
+@dataclass(frozen=True)
+class Scenario(Errorable):
+    """One sim in a sweep.
+
+    The sim runs on the sweep's layout with the given name, with cars spread evenly over
+    the layout's connections. Each car is given impulse, and the sim runs for ticks ticks
+    of dt.
+    """
+
+    layout: str
+    cars: int
+    mass: float = 1
+    velocity_damping: float = -0.1
+    impulse: float = 1
+    dt: float = 1 / 60
+    ticks: int = 600
+    engine: bool = False
+
+    class ValueError(Error, ValueError): ...
+
+    def sim(self, grid: Grid) -> Sim:
+        """Build this scenario's sim on grid."""
+        connections = grid.graph.connections
+        if self.cars and not connections:
+            raise self._error("no connections to put cars on", self.ValueError)
+        per_connection = math.ceil(self.cars / len(connections)) if connections else 0
+        cars = [
+            Car(
+                TrackPosition(
+                    connections[i % len(connections)],
+                    (i // len(connections) + 0.5) / per_connection,
+                ),
+                mass=self.mass,
+                velocity_damping=self.velocity_damping,
+            )
+            for i in range(self.cars)
+        ]
+        engine = None
+        if self.engine:
+            from tracky.cars.engine import Engine
+
+            engine = Engine(grid, capacity=self.cars)
+        car_manager = CarManager(cars=cars, engine=engine)
+        for car in car_manager:
+            car.apply_impulse(self.impulse)
+        return Sim(grid, car_manager)
+
+    def run(self, grid: Grid) -> "ScenarioResult":
+        """Run this scenario's sim on grid and summarize it."""
+        sim = self.sim(grid)
+        stats = Runner(sim, self.dt).run(ticks=self.ticks)
+        velocities = [car.velocity for car in sim.car_manager]
+        return ScenarioResult(
+            scenario=self,
+            stats=stats,
+            mean_velocity=sum(velocities) / len(velocities) if velocities else 0,
+            min_velocity=min(velocities, default=0),
+            max_velocity=max(velocities, default=0),
+        )
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """Summary metrics of a finished scenario."""
+
+    scenario: Scenario
+    stats: RunStats
+    mean_velocity: float
+    min_velocity: float
+    max_velocity: float
+
+
+class Sweep(Errorable):
+    """Runs many independent scenarios across a pool of worker processes.
+
+    Layouts are encoded once and sent to each worker when it starts, and each worker
+    decodes a layout the first time a scenario needs it, so tasks only carry their
+    Scenario. Scenarios don't change their grid, so a worker's scenarios on the same
+    layout share one.
+
+    Scenarios are independent, so throughput scales with max_workers up to the number of
+    cores, as long as each scenario runs long enough to outweigh sending it to a worker.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(
+        self, layouts: Mapping[str, Grid | bytes], max_workers: Optional[int] = None
+    ) -> None:
+        self.__layouts = {name: _encode(layout) for name, layout in layouts.items()}
+        self.__max_workers = max_workers
+        if max_workers is not None and max_workers < 1:
+            raise self._error(f"invalid max_workers {max_workers}", self.ValueError)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Sweep(layouts={list(self.__layouts)}, max_workers={self.__max_workers})"
+
+    @property
+    def layouts(self) -> Mapping[str, bytes]:
+        """The sweep's layouts by name, encoded."""
+        return self.__layouts
+
+    def run(self, scenarios: Iterable[Scenario]) -> Generator[ScenarioResult, None, None]:
+        """Run scenarios, yielding each result as soon as it finishes.
+
+        Results come in the order scenarios finish, not the order they're given. Scenarios
+        still queued are cancelled if iteration stops early.
+        """
+        scenarios = list(scenarios)
+        for scenario in scenarios:
+            if scenario.layout not in self.__layouts:
+                raise self._error(f"unknown layout {scenario.layout!r}", self.ValueError)
+        executor = ProcessPoolExecutor(
+            self.__max_workers, initializer=_init_worker, initargs=(self.__layouts,)
+        )
+        try:
+            futures = [executor.submit(_run_scenario, scenario) for scenario in scenarios]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def _encode(layout: Grid | bytes) -> bytes:
+    if isinstance(layout, bytes):
+        return layout
+    file = io.BytesIO()
+    Layout.write(layout, file)
+    return file.getvalue()
+
+
+# A worker's encoded layouts, and the grids it's decoded from them so far.
+_worker_layouts: Mapping[str, bytes] = {}
+_worker_grids: dict[str, Grid] = {}
+
+
+def _init_worker(layouts: Mapping[str, bytes]) -> None:
+    global _worker_layouts
+    _worker_layouts = layouts
+    _worker_grids.clear()
+
+
+def _run_scenario(scenario: Scenario) -> ScenarioResult:
+    if (grid := _worker_grids.get(scenario.layout)) is None:
+        grid = _worker_grids[scenario.layout] = Layout.read(
+            io.BytesIO(_worker_layouts[scenario.layout])
+        )
+    return scenario.run(grid)
@@ -0,0 +1,114 @@
+import io
+
+import pytest
+from pytest import approx  # type: ignore
+
+from tracky.sim import Scenario, Sweep
+from tracky.sim.sweep import (
+    _init_worker,  # pyright: ignore[reportPrivateUsage]
+    _run_scenario,  # pyright: ignore[reportPrivateUsage]
+    _worker_grids,  # pyright: ignore[reportPrivateUsage]
+)
+from tracky.track import Grid, GridPosition, Layout, Piece
+
+
+def test_scenario_sim(engine: bool) -> None:
+    grid = Grid.create_loop(3, 3)
+    sim = Scenario("loop", cars=20, mass=2, velocity_damping=0, impulse=4, engine=engine).sim(grid)
+    assert sim.grid is grid
+    assert (sim.car_manager.engine is not None) is engine
+    cars = list(sim.car_manager)
+    assert len(cars) == 20
+    # 16 connections, so no more than 2 cars on each, half a connection apart.
+    positions = {(car.connection, car.u) for car in cars}
+    assert len(positions) == 20
+    assert {u for _, u in positions} == {0.25, 0.75}
+    for car in cars:
+        assert car.mass == 2
+        assert car.velocity_damping == 0
+        assert car.velocity == 2
+
+
+def test_scenario_sim_invalid() -> None:
+    grid = Grid()
+    grid.add_piece(Piece(GridPosition(0, 0)))
+    assert not list(Scenario("empty", cars=0).sim(grid).car_manager)
+    with pytest.raises(Scenario.ValueError):
+        Scenario("empty", cars=1).sim(grid)
+
+
+def test_scenario_run() -> None:
+    scenario = Scenario("loop", cars=4, velocity_damping=0, impulse=2, dt=0.1, ticks=10)
+    result = scenario.run(Grid.create_loop(3, 3))
+    assert result.scenario is scenario
+    assert result.stats.ticks == 10
+    assert result.stats.car_updates == 40
+    assert result.stats.sim_time == approx(1)
+    assert result.mean_velocity == approx(2)
+    assert result.min_velocity == approx(2)
+    assert result.max_velocity == approx(2)
+
+
+def test_scenario_run_no_cars() -> None:
+    result = Scenario("loop", cars=0, ticks=1).run(Grid.create_loop(3, 3))
+    assert result.mean_velocity == 0
+    assert result.min_velocity == 0
+    assert result.max_velocity == 0
+
+
+def test_sweep_ctor() -> None:
+    grid = Grid.create_loop(3, 3)
+    file = io.BytesIO()
+    Layout.write(grid, file)
+    sweep = Sweep({"grid": grid, "bytes": file.getvalue()}, max_workers=2)
+    assert sweep.layouts == {"grid": file.getvalue(), "bytes": file.getvalue()}
+    with pytest.raises(Sweep.ValueError):
+        Sweep({}, max_workers=0)
+
+
+def test_sweep_run() -> None:
+    sweep = Sweep({"small": Grid.create_loop(3, 3), "large": Grid.create_loop(5, 5)}, 2)
+    scenarios = [
+        Scenario(layout, cars=cars, mass=mass, dt=0.1, ticks=5)
+        for layout in ["small", "large"]
+        for cars in [1, 3]
+        for mass in [1, 2]
+    ]
+    grids = {"small": Grid.create_loop(3, 3), "large": Grid.create_loop(5, 5)}
+    results = list(sweep.run(scenarios))
+    assert len(results) == len(scenarios)
+    assert {result.scenario for result in results} == set(scenarios)
+    for result in results:
+        # Workers run the same sims as running in process.
+        expected = result.scenario.run(grids[result.scenario.layout])
+        assert result.stats.ticks == expected.stats.ticks
+        assert result.mean_velocity == expected.mean_velocity
+        assert result.min_velocity == expected.min_velocity
+        assert result.max_velocity == expected.max_velocity
+
+
+def test_sweep_run_unknown_layout() -> None:
+    sweep = Sweep({"loop": Grid.create_loop(3, 3)})
+    with pytest.raises(Sweep.ValueError):
+        list(sweep.run([Scenario("loop", cars=1), Scenario("other", cars=1)]))
+
+
+def test_sweep_run_stop_early() -> None:
+    sweep = Sweep({"loop": Grid.create_loop(3, 3)}, max_workers=1)
+    results = sweep.run(Scenario("loop", cars=1, ticks=1) for _ in range(10))
+    assert next(results).stats.ticks == 1
+    results.close()
+
+
+def test_worker() -> None:
+    # Workers run in other processes, so check them in this one too.
+    sweep = Sweep({"loop": Grid.create_loop(3, 3)})
+    _init_worker(sweep.layouts)
+    scenario = Scenario("loop", cars=2, dt=0.1, ticks=3)
+    first = _run_scenario(scenario)
+    assert first.scenario is scenario
+    assert first.stats.ticks == 3
+    # The decoded grid is kept for later scenarios on the same layout.
+    grid = _worker_grids["loop"]
+    _run_scenario(scenario)
+    assert _worker_grids == {"loop": grid}
@@ -1,11 +1,14 @@
-from .grid import Direction, Grid
+from .graph import Graph
+from .grid import ChunkedStorage, DictStorage, Direction, Grid, Storage
 from .grid import Position as GridPosition
 from .grid import Rotation as GridRotation
+from .layout import Layout, MappedLayout
 from .pieces import Connection, ConnectionShape, Piece
 from .pieces import Position as TrackPosition
 
 __all__ = [
     "Grid",
+    "Graph",
     "Piece",
     "Connection",
     "ConnectionShape",
@@ -13,4 +16,9 @@ __all__ = [
     "GridRotation",
     "TrackPosition",
     "Direction",
+    "Storage",
+    "DictStorage",
+    "ChunkedStorage",
+    "Layout",
+    "MappedLayout",
 ]
@@ -0,0 +1,222 @@
+from typing import Callable, Optional, Sequence, override
+
+from tracky.core import Error, Errorable
+
+
+class _Jumps:
+    """Path skipping along one direction of links.
+
+    Following a single link from every node makes the links a functional graph, so every
+    node either lies on a cycle or on a tail that runs into a cycle or a dead end. Hops
+    around a cycle reduce to index arithmetic, and hops along a tail use binary lifting,
+    so following k links costs O(log k) instead of O(k).
+
+    Everything is built lazily on the first long jump, since most moves are a hop or two.
+    """
+
+    WALK_LIMIT = 8
+
+    def __init__(self, links: Sequence[int]) -> None:
+        self.__links = links
+        self.__cycles: Optional[list[list[int]]] = None
+        self.__cycle_of: list[int] = []
+        self.__cycle_index: list[int] = []
+        self.__lifting: Optional[list[list[int]]] = None
+
+    def __build_cycles(self) -> list[list[int]]:
+        links = self.__links
+        cycles: list[list[int]] = []
+        cycle_of = [Graph.NONE] * len(links)
+        cycle_index = [0] * len(links)
+        # 0 = unvisited, 1 = on the current path, 2 = done.
+        state = [0] * len(links)
+        for start in range(len(links)):
+            path: list[int] = []
+            node = start
+            while node != Graph.NONE and state[node] == 0:
+                state[node] = 1
+                path.append(node)
+                node = links[node]
+            if node != Graph.NONE and state[node] == 1:
+                cycle = path[path.index(node) :]
+                for i, cycle_node in enumerate(cycle):
+                    cycle_of[cycle_node] = len(cycles)
+                    cycle_index[cycle_node] = i
+                cycles.append(cycle)
+            for path_node in path:
+                state[path_node] = 2
+        self.__cycle_of = cycle_of
+        self.__cycle_index = cycle_index
+        self.__cycles = cycles
+        return cycles
+
+    def __build_lifting(self) -> list[list[int]]:
+        # lifting[level][node] is the node 2**level links on from node. Tails are shorter
+        # than the number of nodes, so that many levels always reach a cycle or dead end.
+        lifting = [list(self.__links)]
+        for _ in range(1, max(len(self.__links), 1).bit_length()):
+            previous = lifting[-1]
+            lifting.append([node if node == Graph.NONE else previous[node] for node in previous])
+        self.__lifting = lifting
+        return lifting
+
+    def advance(self, node: int, hops: int) -> int:
+        """Follow hops links from node, returning NONE if that runs off a dead end."""
+        if hops <= self.WALK_LIMIT:
+            links = self.__links
+            for _ in range(hops):
+                if (node := links[node]) == Graph.NONE:
+                    break
+            return node
+        cycles = self.__cycles if self.__cycles is not None else self.__build_cycles()
+        cycle_of = self.__cycle_of
+        if cycle_of[node] == Graph.NONE:
+            lifting = self.__lifting if self.__lifting is not None else self.__build_lifting()
+            for level in range(len(lifting) - 1, -1, -1):
+                if cycle_of[node] != Graph.NONE:
+                    break
+                step = 1 << level
+                if step <= hops and (target := lifting[level][node]) != Graph.NONE:
+                    node = target
+                    hops -= step
+            if hops and cycle_of[node] == Graph.NONE:
+                return Graph.NONE
+        if hops == 0:
+            return node
+        cycle = cycles[cycle_of[node]]
+        return cycle[(self.__cycle_index[node] + hops) % len(cycle)]
+
+
+class Graph(Errorable):
+    """Compiled forward and reverse links between every connection in a grid.
+
+    Each connection is assigned a dense integer id, ordered by grid position and then by
+    direction so that compiling the same layout always yields the same ids. Links are
+    stored as ids, with NONE marking a dead end, so walking the track is a list index
+    per hop.
+
+    A graph is a snapshot. Grid drops it whenever its pieces or any piece's connections
+    change and compiles a new one on demand. Neighbours are looked up in the grid's
+    storage, so compiling a paged grid only links the pieces it has loaded.
+    """
+
+    class KeyError(Error, KeyError): ...
+
+    NONE = -1
+
+    def __init__(self, grid: "grid_lib.Grid") -> None:
+        self.__connections = tuple(
+            connection
+            for _, connection in sorted(
+                (
+                    (
+                        piece_.position.row,
+                        piece_.position.col,
+                        connection.reverse_direction.value,
+                        connection.forward_direction.value,
+                    ),
+                    connection,
+                )
+                for piece_ in grid.pieces
+                for connection in piece_.connections
+            )
+        )
+        self.__ids = {id(connection): i for i, connection in enumerate(self.__connections)}
+        get_piece = grid.storage.get_piece
+        self.__forward = [
+            self.get_id(self.resolve_forward(get_piece, connection))
+            for connection in self.__connections
+        ]
+        self.__reverse = [
+            self.get_id(self.resolve_reverse(get_piece, connection))
+            for connection in self.__connections
+        ]
+        self.__forward_jumps = _Jumps(self.__forward)
+        self.__reverse_jumps = _Jumps(self.__reverse)
+
+    @staticmethod
+    def resolve_forward(
+        get_piece: Callable[["grid_position.Position"], Optional["piece.Piece"]],
+        connection: "connection_lib.Connection",
+    ) -> Optional["connection_lib.Connection"]:
+        """The connection after connection, finding pieces with get_piece."""
+        if (position := connection.forward_position) and (forward_piece := get_piece(position)):
+            return forward_piece.get_connection(-connection.forward_direction)
+
+    @staticmethod
+    def resolve_reverse(
+        get_piece: Callable[["grid_position.Position"], Optional["piece.Piece"]],
+        connection: "connection_lib.Connection",
+    ) -> Optional["connection_lib.Connection"]:
+        """The connection before connection, finding pieces with get_piece."""
+        # Get the piece we came from, always the same.
+        if (position := connection.reverse_position) and (reverse_piece := get_piece(position)):
+            # Get the connection we would go over if we were going the opposite
+            # direction.
+            if incoming_connection := reverse_piece.get_connection(-connection.reverse_direction):
+                # Get the complimentary connection to that, which is the connection we
+                # would end up on if we were going backwards. Note that this doesn't
+                # have to exist. Some pieces can be directional, like a derailer or a
+                # signal. That's ok and representable.
+                return reverse_piece.get_connection(incoming_connection.forward_direction)
+
+    @override
+    def __repr__(self) -> str:
+        return f"Graph(connections={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__connections)
+
+    @property
+    def connections(self) -> Sequence["connection_lib.Connection"]:
+        return self.__connections
+
+    @property
+    def forward(self) -> Sequence[int]:
+        """Id of the connection after each connection, or NONE."""
+        return self.__forward
+
+    @property
+    def reverse(self) -> Sequence[int]:
+        """Id of the connection before each connection, or NONE."""
+        return self.__reverse
+
+    def advance(self, id_: int, hops: int) -> int:
+        """Get the id hops connections forward of id_, or back if hops is negative.
+
+        Returns NONE if the track dead-ends first. Long moves around loops cost O(1) and
+        long moves along open track cost O(log hops).
+        """
+        if hops >= 0:
+            return self.__forward_jumps.advance(id_, hops)
+        return self.__reverse_jumps.advance(id_, -hops)
+
+    def get_id(self, connection: Optional["connection_lib.Connection"]) -> int:
+        """Get the id of connection, or NONE if it isn't in this graph."""
+        return self.__ids.get(id(connection), self.NONE)
+
+    def id(self, connection: "connection_lib.Connection") -> int:
+        if (id_ := self.get_id(connection)) == self.NONE:
+            raise self._error(f"connection {connection} not in graph", self.KeyError)
+        return id_
+
+    def connection(self, id_: int) -> Optional["connection_lib.Connection"]:
+        """Get the connection with the given id, or None for NONE."""
+        if id_ != self.NONE:
+            return self.__connections[id_]
+
+    def forward_connection(
+        self, connection: "connection_lib.Connection"
+    ) -> Optional["connection_lib.Connection"]:
+        return self.connection(self.__forward[self.id(connection)])
+
+    def reverse_connection(
+        self, connection: "connection_lib.Connection"
+    ) -> Optional["connection_lib.Connection"]:
+        return self.connection(self.__reverse[self.id(connection)])
+
+
+from tracky.track.grid import grid as grid_lib
+from tracky.track.grid import position as grid_position
+from tracky.track.pieces import connection as connection_lib
+from tracky.track.pieces import piece
@@ -0,0 +1,123 @@
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.track.graph import Graph
+from tracky.track.grid import Direction, Grid, Position
+from tracky.track.pieces import Connection, Piece
+
+
+def test_ids_ordered_by_position() -> None:
+    p1, p2 = Piece.create_line(Position(0, 0), Direction.RIGHT, 2)
+    grid = Grid(pieces=[p2, p1])
+    graph = grid.graph
+    assert len(graph) == 4
+    assert [c.piece for c in graph.connections] == [p1, p1, p2, p2]
+    for i, c in enumerate(graph.connections):
+        assert graph.id(c) == i
+        assert graph.connection(i) is c
+    assert graph.connection(Graph.NONE) is None
+
+
+def test_id_not_in_graph() -> None:
+    graph = Grid().graph
+    c = Connection(Direction.LEFT, Direction.RIGHT)
+    assert graph.get_id(c) == Graph.NONE
+    assert graph.get_id(None) == Graph.NONE
+    with pytest.raises(Graph.KeyError):
+        graph.id(c)
+
+
+def test_links() -> None:
+    p1, p2 = Piece.create_line(Position(0, 0), Direction.RIGHT, 2)
+    graph = Grid(pieces=[p1, p2]).graph
+    p1_right = graph.id(p1.connection(Direction.LEFT))
+    p2_right = graph.id(p2.connection(Direction.LEFT))
+    p1_left = graph.id(p1.connection(Direction.RIGHT))
+    p2_left = graph.id(p2.connection(Direction.RIGHT))
+    assert graph.forward[p1_right] == p2_right
+    assert graph.forward[p2_right] == Graph.NONE
+    assert graph.reverse[p2_right] == p1_right
+    assert graph.reverse[p1_right] == Graph.NONE
+    assert graph.forward[p2_left] == p1_left
+    assert graph.reverse[p1_left] == p2_left
+
+
+def test_mismatched_neighbour() -> None:
+    c = Connection(Direction.LEFT, Direction.RIGHT)
+    Grid(pieces=[Piece(Position(0, 0), connections=[c]), Piece(Position(0, 1))])
+    assert c.forward_connection is None
+
+
+def test_loop() -> None:
+    grid = Grid.create_loop(3, 3)
+    graph = grid.graph
+    assert len(graph) == 16
+    assert Graph.NONE not in graph.forward
+    assert Graph.NONE not in graph.reverse
+    for id_ in range(len(graph)):
+        assert graph.reverse[graph.forward[id_]] == id_
+
+
+def test_cached_until_grid_changes() -> None:
+    p1, p2 = Piece.create_line(Position(0, 0), Direction.RIGHT, 2)
+    grid = Grid(pieces=[p1])
+    graph = grid.graph
+    assert grid.graph is graph
+    assert p1.connection(Direction.LEFT).forward_connection is None
+    grid.add_piece(p2)
+    assert grid.graph is not graph
+    assert p1.connection(Direction.LEFT).forward_connection is p2.connection(Direction.LEFT)
+
+
+def test_cached_until_connections_change() -> None:
+    # Throwing a switch replaces a piece's connections in place.
+    p1, p2 = Piece.create_line(Position(0, 0), Direction.RIGHT, 2)
+    grid = Grid(pieces=[p1, p2])
+    graph = grid.graph
+    p1_right = p1.connection(Direction.LEFT)
+    assert p1_right.forward_connection is p2.connection(Direction.LEFT)
+    p2.connections = [Connection(Direction.LEFT, Direction.UP)]
+    assert grid.graph is not graph
+    assert p1_right.forward_connection is p2.connection(Direction.LEFT)
+    assert p2.connection(Direction.LEFT).forward_direction == Direction.UP
+
+
+def _walk(links: list[int], id_: int, hops: int) -> int:
+    for _ in range(hops):
+        if id_ == Graph.NONE:
+            break
+        id_ = links[id_]
+    return id_
+
+
+def _lollipop() -> Graph:
+    # A one-way spur running down into a 3x3 loop through a switch at (0, 1).
+    grid = Grid.create_loop(3, 3)
+    Connection(Direction.UP, Direction.RIGHT, piece=grid[Position(0, 1)])
+    for row in range(-3, 0):
+        grid.add_piece(
+            Piece(Position(row, 1), connections=[Connection(Direction.UP, Direction.DOWN)])
+        )
+    return grid.graph
+
+
+def test_advance(subtests: SubTests) -> None:
+    for name, graph in list[tuple[str, Graph]](
+        [
+            ("line", Grid(pieces=Piece.create_line(Position(0, 0), Direction.RIGHT, 20)).graph),
+            ("loop", Grid.create_loop(4, 4).graph),
+            ("lollipop", _lollipop()),
+        ]
+    ):
+        with subtests.test(name=name):
+            for id_ in range(len(graph)):
+                for hops in [0, 1, 2, 7, 8, 9, 10, 13, 24, 31, 100]:
+                    assert graph.advance(id_, hops) == _walk(list(graph.forward), id_, hops)
+                    assert graph.advance(id_, -hops) == _walk(list(graph.reverse), id_, hops)
+
+
+def test_advance_far_on_loop() -> None:
+    graph = Grid.create_loop(10, 10).graph
+    for id_ in range(len(graph)):
+        assert graph.advance(id_, 36 * 10**9 + 1) == graph.forward[id_]
+        assert graph.advance(id_, -(36 * 10**9 + 1)) == graph.reverse[id_]
@@ -2,3 +2,6 @@ from .direction import Direction as Direction
 from .grid import Grid as Grid
 from .position import Position as Position
 from .rotation import Rotation as Rotation
+from .storage import ChunkedStorage as ChunkedStorage
+from .storage import DictStorage as DictStorage
+from .storage import Storage as Storage
@@ -12,14 +12,23 @@ class Direction(Errorable, Enum):
     def __init__(self, drow: int, dcol: int):
         self.drow = drow
         self.dcol = dcol
+        # Clockwise ordinal starting from UP, for indexing fixed-size direction tables.
+        self.index = drow + 1 if drow else 2 - dcol
 
     def __neg__(self) -> "Direction":
-        match self:
-            case Direction.LEFT:
-                return Direction.RIGHT
-            case Direction.UP:
-                return Direction.DOWN
-            case Direction.RIGHT:
-                return Direction.LEFT
-            case Direction.DOWN:
-                return Direction.UP
+        return _OPPOSITES[self.index]
+
+    @staticmethod
+    def from_index(index: int) -> "Direction":
+        """The direction whose index is index."""
+        return _BY_INDEX[index]
+
+    def rotate(self, n: int) -> "Direction":
+        """Rotate n quarter turns clockwise."""
+        return _ROTATIONS[n % 4][self.index]
+
+
+# Lookup tables indexed by Direction.index.
+_BY_INDEX = tuple(sorted(Direction, key=lambda direction: direction.index))
+_OPPOSITES = tuple(_BY_INDEX[(index + 2) % 4] for index in range(4))
+_ROTATIONS = tuple(tuple(_BY_INDEX[(index + n) % 4] for index in range(4)) for n in range(4))
@@ -14,3 +14,29 @@ def test_neg(subtests: SubTests) -> None:
     ):
         with subtests.test(direction=direction, expected=expected):
             assert -direction == expected
+
+
+def test_index() -> None:
+    assert [direction.index for direction in Direction] == [0, 2, 3, 1]
+    assert sorted(direction.index for direction in Direction) == list(range(4))
+
+
+def test_from_index() -> None:
+    for direction in Direction:
+        assert Direction.from_index(direction.index) is direction
+
+
+def test_rotate(subtests: SubTests) -> None:
+    for direction, n, expected in list[tuple[Direction, int, Direction]](
+        [
+            (Direction.UP, 0, Direction.UP),
+            (Direction.UP, 1, Direction.RIGHT),
+            (Direction.UP, 2, Direction.DOWN),
+            (Direction.UP, 3, Direction.LEFT),
+            (Direction.LEFT, 1, Direction.UP),
+            (Direction.LEFT, -1, Direction.DOWN),
+            (Direction.DOWN, 5, Direction.LEFT),
+        ]
+    ):
+        with subtests.test(direction=direction, n=n, expected=expected):
+            assert direction.rotate(n) == expected
@@ -1,23 +1,64 @@
-from collections import defaultdict
-from typing import Iterable, Iterator, Mapping, MutableMapping, Optional, override
+import bisect
+from collections import OrderedDict
+from collections.abc import Set
+from pathlib import Path
+from types import MappingProxyType, TracebackType
+from typing import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Optional,
+    overload,
+    override,
+)
 
-from tracky.core import Error, Validatable
+from tracky.core import Error, SetView, Validatable
 from tracky.track.grid.direction import Direction
 from tracky.track.grid.position import Position
+from tracky.track.grid.storage import ChunkedStorage, DictStorage, Storage
 
 
 class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
     class KeyError(Error, KeyError): ...
 
+    class ValueError(Error, ValueError): ...
+
     def __init__(
         self,
         pieces: Optional[Iterable["piece.Piece"]] = None,
+        storage: Optional[Storage] = None,
     ) -> None:
+        """Create a grid.
+
+        storage holds the pieces by position, and defaults to a DictStorage. Pass a
+        ChunkedStorage for very large, sparse layouts.
+        """
         super().__init__()
-        self.__pieces = frozenset[piece.Piece]()
+        self.__pieces = set[piece.Piece]()
+        self.__pieces_by_position = storage if storage is not None else DictStorage()
+        if len(self.__pieces_by_position) != 0:
+            raise self._error(f"storage {storage} not empty", self.ValueError)
+        # Sorted rows that have pieces, and the sorted cols of each, for range queries.
+        self.__rows: list[int] = []
+        self.__cols_by_row: dict[int, list[int]] = {}
+        # Sorted cols that have pieces, and how many each has, for bounds.
+        self.__cols: list[int] = []
+        self.__col_counts: dict[int, int] = {}
+        self.__graph: Optional[graph_lib.Graph] = None
+        # Pieces added or removed since the last validation.
+        self.__changed_pieces = set[piece.Piece]()
+        self.__listeners: list[Callable[[Position], None]] = []
+        # For grids paged in from a layout by open(), the layout and the chunk storage, the
+        # chunks loaded from least to most recently used, and how many to keep.
+        self.__paging: Optional[tuple[mapped_layout.MappedLayout, ChunkedStorage]] = None
+        self.__loaded_chunks = OrderedDict[tuple[int, int], None]()
+        self.__max_chunks: Optional[int] = None
         with self._pause_validation():
             if pieces is not None:
-                self.pieces = frozenset(pieces)
+                self.add_pieces(pieces)
 
     @override
     def __eq__(self, other: object) -> bool:
@@ -28,43 +69,285 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
         return id(self)
 
     @property
-    def pieces(self) -> frozenset["piece.Piece"]:
-        return self.__pieces
+    def pieces(self) -> Set["piece.Piece"]:
+        """Live read-only view of the grid's pieces."""
+        return SetView(self.__pieces)
 
     @pieces.setter
     def pieces(self, pieces: Iterable["piece.Piece"]) -> None:
         pieces_ = frozenset(pieces)
-        if pieces_ != self.__pieces:
-            with self._pause_validation():
-                added_pieces = pieces_ - self.__pieces
-                removed_pieces = self.__pieces - pieces_
-                self.__pieces = pieces_
+        self.__update(pieces_ - self.__pieces, self.__pieces - pieces_)
+
+    def __update(
+        self,
+        added_pieces: Collection["piece.Piece"],
+        removed_pieces: Collection["piece.Piece"],
+    ) -> None:
+        if added_pieces or removed_pieces:
+            with self._pause_validation(incremental=True):
+                self.__pieces.difference_update(removed_pieces)
+                self.__pieces.update(added_pieces)
+                self.__changed_pieces.update(added_pieces, removed_pieces)
+                self.__graph = None
+                for piece in removed_pieces:
+                    if self.__pieces_by_position.get_piece(piece.position) is piece:
+                        del self.__pieces_by_position[piece.position]
+                        self.__unindex(piece.position)
+                for piece in added_pieces:
+                    if (
+                        displaced := self.__pieces_by_position.get_piece(piece.position)
+                    ) is not None:
+                        # Revalidate whatever was already here so duplicates are caught.
+                        self.__changed_pieces.add(displaced)
+                    else:
+                        self.__index(piece.position)
+                    self.__pieces_by_position[piece.position] = piece
                 for piece in added_pieces:
                     piece.grid = self
                 for piece in removed_pieces:
                     piece.grid = None
+            if self.__listeners:
+                for piece in added_pieces:
+                    self.__notify(piece.position)
+                for piece in removed_pieces:
+                    self.__notify(piece.position)
+
+    def __index(self, position: Position) -> None:
+        if (cols := self.__cols_by_row.get(position.row)) is None:
+            cols = self.__cols_by_row[position.row] = []
+            bisect.insort(self.__rows, position.row)
+        bisect.insort(cols, position.col)
+        if (count := self.__col_counts.get(position.col, 0)) == 0:
+            bisect.insort(self.__cols, position.col)
+        self.__col_counts[position.col] = count + 1
+
+    def __unindex(self, position: Position) -> None:
+        cols = self.__cols_by_row[position.row]
+        del cols[bisect.bisect_left(cols, position.col)]
+        if not cols:
+            del self.__cols_by_row[position.row]
+            del self.__rows[bisect.bisect_left(self.__rows, position.row)]
+        if (count := self.__col_counts[position.col]) == 1:
+            del self.__col_counts[position.col]
+            del self.__cols[bisect.bisect_left(self.__cols, position.col)]
+        else:
+            self.__col_counts[position.col] = count - 1
+
+    def pieces_in(
+        self, min_position: Position, max_position: Position, load: bool = True
+    ) -> Iterator["piece.Piece"]:
+        """Iterate over the pieces in the rectangle from min_position to max_position, inclusive.
+
+        Takes time proportional to the number of rows in the rectangle plus the number of
+        pieces found, however big the grid. Paged grids load the rectangle's chunks first,
+        unless load is False, in which case only the pieces already loaded are found. The
+        rectangle's chunks all have to fit in max_chunks at once.
+        """
+        if self.__paging is not None and load:
+            layout, storage = self.__paging
+            min_row, min_col = storage.chunk_key(min_position)
+            max_row, max_col = storage.chunk_key(max_position)
+            chunks = (max_row - min_row + 1) * (max_col - min_col + 1)
+            if self.__max_chunks is not None and chunks > self.__max_chunks:
+                raise self._error(
+                    f"rectangle spans {chunks} chunks, more than max chunks {self.__max_chunks}",
+                    self.ValueError,
+                )
+            for chunk_row in range(min_row, max_row + 1):
+                for chunk_col in range(min_col, max_col + 1):
+                    self.__load_chunk(layout, storage, (chunk_row, chunk_col))
+        rows = self.__rows
+        first_row = bisect.bisect_left(rows, min_position.row)
+        last_row = bisect.bisect_right(rows, max_position.row)
+        for row in rows[first_row:last_row]:
+            cols = self.__cols_by_row[row]
+            first_col = bisect.bisect_left(cols, min_position.col)
+            last_col = bisect.bisect_right(cols, max_position.col)
+            for col in cols[first_col:last_col]:
+                yield self.__pieces_by_position[Position(row, col)]
+
+    def add_pieces(self, pieces: Iterable["piece.Piece"]) -> None:
+        self.__update({piece: None for piece in pieces if piece not in self.__pieces}.keys(), ())
+
+    def remove_pieces(self, pieces: Iterable["piece.Piece"]) -> None:
+        self.__update((), {piece: None for piece in pieces if piece in self.__pieces}.keys())
 
     def add_piece(self, piece: "piece.Piece") -> None:
-        self.pieces = self.__pieces | {piece}
+        if piece not in self.__pieces:
+            self.__update((piece,), ())
 
     def remove_piece(self, piece: "piece.Piece") -> None:
-        self.pieces = self.__pieces - {piece}
+        if piece in self.__pieces:
+            self.__update((), (piece,))
+
+    def piece_changed(self, piece_: "piece.Piece") -> None:
+        """Notify the grid that the connections of one of its pieces changed."""
+        self.__graph = None
+        self.__notify(piece_.position)
+
+    def add_listener(self, listener: Callable[[Position], None]) -> None:
+        """Call listener with the position of every piece that's added, removed or changed."""
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Position], None]) -> None:
+        self.__listeners.remove(listener)
+
+    def __notify(self, position: Position) -> None:
+        for listener in self.__listeners:
+            listener(position)
+
+    @property
+    def graph(self) -> "graph_lib.Graph":
+        """The compiled connection graph of this grid.
+
+        Compiled on first use and kept until the grid's pieces or their connections change.
+        """
+        if self.__graph is None:
+            self.__graph = graph_lib.Graph(self)
+        return self.__graph
 
     @override
     def _validate(self) -> None:
+        self.__changed_pieces.clear()
         for piece_ in self.__pieces:
-            if piece_.grid != self:
-                raise self._validation_error(f"piece {piece_} not in grid")
-        pieces_by_position = defaultdict[Position, set[piece.Piece]](set)
-        for piece_ in self.__pieces:
-            pieces_by_position[piece_.position].add(piece_)
-        for position, pieces in pieces_by_position.items():
-            if len(pieces) > 1:
-                raise self._validation_error(f"multiple pieces at position {position}: {pieces}")
+            self.__validate_piece(piece_)
+
+    @override
+    def _validate_changes(self) -> None:
+        changed_pieces, self.__changed_pieces = self.__changed_pieces, set[piece.Piece]()
+        for piece_ in changed_pieces:
+            if piece_ in self.__pieces:
+                self.__validate_piece(piece_)
+
+    def __validate_piece(self, piece_: "piece.Piece") -> None:
+        if piece_.grid != self:
+            raise self._validation_error(f"piece {piece_} not in grid")
+        if (indexed_piece := self.__pieces_by_position.get_piece(piece_.position)) is not piece_:
+            raise self._validation_error(
+                f"multiple pieces at position {piece_.position}: {{{indexed_piece}, {piece_}}}"
+            )
+
+    @classmethod
+    def open(
+        cls, path: str | Path, chunk_size: int = 64, max_chunks: Optional[int] = None
+    ) -> "Grid":
+        """Open a layout file as a grid that loads pieces as they're used.
+
+        The file is memory mapped, and pieces are built a chunk_size by chunk_size chunk
+        at a time, the first time something looks up a position in the chunk. Opening is
+        near-instant however big the layout, and memory grows with the chunks that are
+        actually visited. Until then the grid's pieces, len and bounds only cover what's
+        been loaded.
+
+        The compiled graph only links loaded pieces. Cars that reach the edge of what's
+        loaded page in the next chunk through load_toward.
+
+        If max_chunks is given, the least recently used chunks are unloaded to keep at most
+        that many. Their pieces are removed from the grid like any others, so make sure it
+        covers the chunks cars are on, and note that changes to them are lost.
+
+        The file stays mapped until the grid is closed, so close it or use it in a with
+        block.
+        """
+        if max_chunks is not None and max_chunks < 1:
+            raise Grid.ValueError(f"invalid max chunks {max_chunks}")
+        storage = ChunkedStorage(chunk_size)
+        grid = cls(storage=storage)
+        grid.__paging = mapped_layout.MappedLayout(path), storage
+        grid.__max_chunks = max_chunks
+        return grid
+
+    @property
+    def layout(self) -> Optional["mapped_layout.MappedLayout"]:
+        """The layout this grid is paged in from, if it was opened with open()."""
+        return self.__paging[0] if self.__paging is not None else None
+
+    def __load_chunk(
+        self, layout: "mapped_layout.MappedLayout", storage: ChunkedStorage, key: tuple[int, int]
+    ) -> None:
+        """Load a chunk from the layout, or mark it as the most recently used."""
+        if key in self.__loaded_chunks:
+            self.__loaded_chunks.move_to_end(key)
+            return
+        self.__loaded_chunks[key] = None
+        size = storage.chunk_size
+        with Validatable.batch():
+            self.add_pieces(
+                layout.pieces_in(
+                    Position(key[0] * size, key[1] * size),
+                    Position(key[0] * size + size - 1, key[1] * size + size - 1),
+                )
+            )
+        while self.__max_chunks is not None and len(self.__loaded_chunks) > self.__max_chunks:
+            evicted, _ = self.__loaded_chunks.popitem(last=False)
+            self.remove_pieces(storage.chunk(evicted))
+
+    def load_toward(self, connection: "connection_lib.Connection", hops: int) -> bool:
+        """Load the chunks that a move of hops connections from connection runs into.
+
+        For paged grids, a move that runs off the loaded pieces looks like a dead end in the
+        graph. This follows the move to where it stops, then on past it through the
+        pieces' own connections, loading chunks as it goes. Returns whether the move got
+        further, in which case it can be retried against the new graph.
+        """
+        return self.load_towards([(connection, hops)])
+
+    def load_towards(self, moves: Iterable[tuple["connection_lib.Connection", int]]) -> bool:
+        """Load the chunks that each of moves runs into, as with load_toward.
+
+        Every move is followed on the same graph, so the graph is only compiled again
+        once, however many chunks load.
+        """
+        if self.__paging is None:
+            return False
+        graph = self.graph
+        further = False
+        for connection, hops in moves:
+            id_ = graph.id(connection)
+            links = graph.forward if hops > 0 else graph.reverse
+            left = abs(hops)
+            while left and (next_id := links[id_]) != graph_lib.Graph.NONE:
+                id_ = next_id
+                left -= 1
+            if not left:
+                continue
+            # Carry on past the loaded pieces, loading chunks by looking up pieces in them.
+            resolve = (
+                graph_lib.Graph.resolve_forward if hops > 0 else graph_lib.Graph.resolve_reverse
+            )
+            stop: Optional[connection_lib.Connection] = graph.connections[id_]
+            for _ in range(left):
+                if (stop := resolve(self.get, stop)) is None:
+                    break
+                further = True
+        return further
+
+    def close(self) -> None:
+        """Close the layout this grid is paged in from, if it was opened with open().
+
+        Chunks that aren't loaded yet can't be loaded after this.
+        """
+        if self.__paging is not None:
+            self.__paging[0].close()
+
+    def __enter__(self) -> "Grid":
+        return self
+
+    def __exit__(
+        self,
+        type: Optional[type[BaseException]],
+        value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    @property
+    def storage(self) -> Storage:
+        return self.__pieces_by_position
 
     @property
     def pieces_by_position(self) -> Mapping[Position, "piece.Piece"]:
-        return {piece.position: piece for piece in self.__pieces}
+        return MappingProxyType(self.__pieces_by_position)
 
     @override
     def __len__(self) -> int:
@@ -72,14 +355,36 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
 
     @override
     def __iter__(self) -> Iterator[Position]:
-        return iter(self.pieces_by_position)
+        return iter(self.__pieces_by_position)
+
+    @override
+    def __contains__(self, position: object) -> bool:
+        return isinstance(position, Position) and self.get(position) is not None
 
     @override
     def __getitem__(self, position: Position) -> "piece.Piece":
-        try:
-            return self.pieces_by_position[position]
-        except KeyError as e:
-            raise self.KeyError(f"no piece at position {position}") from e
+        if (piece_ := self.get(position)) is None:
+            raise self.KeyError(f"no piece at position {position}")
+        return piece_
+
+    @overload
+    def get(self, position: Position, /) -> Optional["piece.Piece"]: ...
+
+    @overload
+    def get[T](self, position: Position, /, default: "piece.Piece | T") -> "piece.Piece | T": ...
+
+    @override
+    def get[T](
+        self, position: Position, /, default: "piece.Piece | T | None" = None
+    ) -> "piece.Piece | T | None":
+        # Bypass the Mapping mixin, which goes through __getitem__ and builds a KeyError
+        # for every miss.
+        if self.__paging is not None:
+            layout, storage = self.__paging
+            self.__load_chunk(layout, storage, storage.chunk_key(position))
+        if (piece_ := self.__pieces_by_position.get_piece(position)) is None:
+            return default
+        return piece_
 
     @override
     def __setitem__(self, position: Position, piece: "piece.Piece") -> None:
@@ -97,6 +402,7 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
         rows: int,
         cols: int,
         start_position: Optional[Position] = None,
+        storage: Optional[Storage] = None,
     ) -> "Grid":
         start_position_ = start_position if start_position is not None else Position(0, 0)
         start_row = start_position_.row
@@ -161,17 +467,15 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
                         Direction.RIGHT,
                     ),
                 },
-            )
+            ),
+            storage=storage,
         )
 
     def debug_print(self) -> str:
-        rows = {piece.position.row for piece in self.pieces}
-        cols = {piece.position.col for piece in self.pieces}
-        top = min(rows)
-        bottom = max(rows)
-        left = min(cols)
-        right = max(cols)
         s = ""
+        if not self.__rows:
+            return s
+        top_left, bottom_right = self.bounds
 
         def piece_is(
             piece_: piece.Piece,
@@ -202,8 +506,8 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
             else:
                 return "?"
 
-        for row in range(top, bottom + 1):
-            for col in range(left, right + 1):
+        for row in range(top_left.row, bottom_right.row + 1):
+            for col in range(top_left.col, bottom_right.col + 1):
                 if piece_ := self.get(Position(row, col)):
                     s += piece_char(piece_)
                 else:
@@ -213,11 +517,15 @@ class Grid(Validatable, MutableMapping[Position, "piece.Piece"]):
 
     @property
     def bounds(self) -> tuple[Position, Position]:
-        if len(self) == 0:
+        if not self.__rows:
             return (Position(0, 0), Position(0, 0))
-        rows = {piece.position.row for piece in self.pieces}
-        cols = {piece.position.col for piece in self.pieces}
-        return Position(min(rows), min(cols)), Position(max(rows), max(cols))
+        return (
+            Position(self.__rows[0], self.__cols[0]),
+            Position(self.__rows[-1], self.__cols[-1]),
+        )
 
 
+from tracky.track.graph import graph as graph_lib
+from tracky.track.layout import mapped_layout
+from tracky.track.pieces import connection as connection_lib
 from tracky.track.pieces import piece
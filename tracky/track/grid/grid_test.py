@@ -1,6 +1,11 @@
+from pathlib import Path
+
 import pytest
+from pytest_subtests import SubTests
 
-from tracky.track.grid import Grid, Position
+from tracky.core import Validatable
+from tracky.track.grid import ChunkedStorage, DictStorage, Direction, Grid, Position
+from tracky.track.layout import Layout
 from tracky.track.pieces import Piece
 
 
@@ -64,6 +69,29 @@ def test_remove_piece() -> None:
     assert piece.grid is None
 
 
+def test_add_remove_pieces() -> None:
+    grid = Grid()
+    p1 = Piece(Position(0, 0))
+    p2 = Piece(Position(0, 1))
+    grid.add_pieces([p1, p2, p1])
+    assert grid.pieces == {p1, p2}
+    assert p1.grid is grid and p2.grid is grid
+    grid.remove_pieces([p1, Piece(Position(1, 0))])
+    assert grid.pieces == {p2}
+    assert dict(grid) == {Position(0, 1): p2}
+    assert p1.grid is None
+
+
+def test_pieces_view_is_live() -> None:
+    grid = Grid()
+    pieces = grid.pieces
+    piece = Piece(Position(0, 0))
+    grid.add_piece(piece)
+    assert pieces == {piece}
+    assert piece in pieces
+    assert not hasattr(pieces, "add")
+
+
 def test_pieces_by_position() -> None:
     piece1 = Piece(Position(0, 0))
     piece2 = Piece(Position(1, 0))
@@ -81,6 +109,16 @@ def test_getitem() -> None:
     assert grid.get(Position(1, 2)) is None
 
 
+def test_getitem_large() -> None:
+    # Lookup time is covered by the grid.get benchmark.
+    pieces = list(Piece.create_line(Position(0, 0), Direction.RIGHT, 1000))
+    grid = Grid(pieces=pieces)
+    for piece in pieces:
+        assert grid[piece.position] is piece
+    assert grid.get(Position(0, 1000)) is None
+    assert grid.get(Position(1, 500)) is None
+
+
 def test_setitem() -> None:
     piece = Piece(Position(0, 0))
     grid = Grid()
@@ -132,14 +170,15 @@ def test_duplicate_piece_positions() -> None:
 def test_create_loop() -> None:
     grid = Grid.create_loop(3, 3)
     assert len(grid) == 8
-    assert (
-        grid.debug_print().strip()
-        == """
+    assert grid.debug_print().strip() == """
 ┌-┐
 | |
 └-┘
     """.strip()
-    )
+
+
+def test_debug_print_empty() -> None:
+    assert Grid().debug_print() == ""
 
 
 def test_debug_print_unknown_piece_char() -> None:
@@ -162,3 +201,234 @@ def test_bounds() -> None:
 
 def test_bounds_empty() -> None:
     assert Grid().bounds == (Position(0, 0), Position(0, 0))
+
+
+def test_bounds_after_remove() -> None:
+    p1 = Piece(Position(0, 5))
+    p2 = Piece(Position(3, 5))
+    p3 = Piece(Position(3, 0))
+    p4 = Piece(Position(-2, 2))
+    grid = Grid(pieces=[p1, p2, p3, p4])
+    assert grid.bounds == (Position(-2, 0), Position(3, 5))
+    grid.remove_piece(p4)
+    assert grid.bounds == (Position(0, 0), Position(3, 5))
+    grid.remove_piece(p2)
+    assert grid.bounds == (Position(0, 0), Position(3, 5))
+    grid.remove_piece(p1)
+    assert grid.bounds == (Position(3, 0), Position(3, 0))
+    grid.remove_piece(p3)
+    assert grid.bounds == (Position(0, 0), Position(0, 0))
+    grid.add_piece(p4)
+    assert grid.bounds == (Position(-2, 2), Position(-2, 2))
+
+
+def test_add_piece_duplicate_position() -> None:
+    grid = Grid(pieces={Piece(Position(0, 0))})
+    with pytest.raises(Grid.ValidationError):
+        grid.add_piece(Piece(Position(0, 0)))
+
+
+def test_batch_add_pieces() -> None:
+    grid = Grid()
+    pieces = list(Piece.create_line(Position(0, 0), Direction.RIGHT, 10))
+    with Validatable.batch():
+        for piece in pieces:
+            grid.add_piece(piece)
+    assert grid.pieces == set(pieces)
+    with pytest.raises(Grid.ValidationError), Validatable.batch():
+        grid.add_piece(Piece(Position(0, 0)))
+
+
+def test_listeners() -> None:
+    grid = Grid()
+    changes: list[Position] = []
+    grid.add_listener(changes.append)
+    p1 = Piece.create(Position(0, 0), Direction.LEFT, Direction.RIGHT)
+    p2 = Piece(Position(0, 1))
+    grid.add_pieces([p1, p2])
+    assert sorted(changes, key=lambda position: position.col) == [Position(0, 0), Position(0, 1)]
+    changes.clear()
+    p1.remove_connection(p1.connection(Direction.LEFT))
+    assert changes == [Position(0, 0)]
+    changes.clear()
+    grid.remove_piece(p2)
+    assert changes == [Position(0, 1)]
+    changes.clear()
+    grid.remove_listener(changes.append)
+    grid.add_piece(p2)
+    assert changes == []
+
+
+def test_pieces_in(subtests: SubTests) -> None:
+    grid = Grid.create_loop(5, 5)
+    grid.add_piece(Piece(Position(-3, 10)))
+    for min_position, max_position, expected in list[tuple[Position, Position, set[Position]]](
+        [
+            (Position(0, 0), Position(0, 0), {Position(0, 0)}),
+            (Position(1, 1), Position(3, 3), set()),
+            (Position(0, 0), Position(1, 1), {Position(0, 0), Position(0, 1), Position(1, 0)}),
+            (Position(4, 3), Position(9, 9), {Position(4, 3), Position(4, 4)}),
+            (Position(-5, -5), Position(-1, 20), {Position(-3, 10)}),
+            (Position(2, 2), Position(1, 1), set()),
+            (Position(-10, -10), Position(10, 10), set(grid)),
+        ]
+    ):
+        with subtests.test(min_position=min_position, max_position=max_position):
+            pieces = list(grid.pieces_in(min_position, max_position))
+            assert {piece.position for piece in pieces} == expected
+            assert all(grid[piece.position] is piece for piece in pieces)
+
+
+def test_pieces_in_after_remove() -> None:
+    grid = Grid.create_loop(3, 3)
+    grid.remove_piece(grid[Position(0, 1)])
+    grid.remove_pieces([grid[Position(2, 0)], grid[Position(2, 1)], grid[Position(2, 2)]])
+    assert {piece.position for piece in grid.pieces_in(Position(0, 0), Position(2, 2))} == {
+        Position(0, 0),
+        Position(0, 2),
+        Position(1, 0),
+        Position(1, 2),
+    }
+
+
+def test_chunked_storage() -> None:
+    storage = ChunkedStorage(chunk_size=4)
+    grid = Grid.create_loop(10, 10, storage=storage)
+    assert grid.storage is storage
+    assert len(storage) == len(grid) == 36
+    assert set(grid) == {piece.position for piece in grid.pieces}
+    assert grid[Position(0, 9)].position == Position(0, 9)
+    assert grid.get(Position(5, 5)) is None
+    assert grid.bounds == (Position(0, 0), Position(9, 9))
+    chunk = storage.chunk((0, 0))
+    grid.remove_pieces(chunk)
+    assert len(grid) == 36 - len(chunk)
+    assert (0, 0) not in set(storage.chunk_keys())
+    grid.add_pieces(chunk)
+    assert len(grid) == 36
+    id_ = grid.graph.id(next(iter(grid[Position(0, 0)].connections)))
+    assert grid.graph.advance(id_, 36) == id_
+
+
+def test_storage_not_empty() -> None:
+    storage = DictStorage()
+    storage[Position(0, 0)] = Piece(Position(0, 0))
+    with pytest.raises(Grid.ValueError):
+        Grid(storage=storage)
+
+
+def _open_loop(tmp_path: Path, max_chunks: int | None = None) -> Grid:
+    path = tmp_path / "loop.trky"
+    Layout.save(Grid.create_loop(10, 10), path)
+    return Grid.open(path, chunk_size=4, max_chunks=max_chunks)
+
+
+def test_open(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path)
+    assert grid.layout is not None
+    assert len(grid) == 0
+    assert grid[Position(0, 0)].position == Position(0, 0)
+    # Only the chunk with rows and cols 0 to 3 is loaded.
+    assert len(grid) == 7
+    assert Position(1, 1) not in grid
+    assert grid.get(Position(5, 5)) is None
+    assert len(grid) == 7
+    assert Position(0, 9) in grid
+    assert len(grid) == 12
+    assert len(list(grid.pieces_in(Position(0, 0), Position(9, 9)))) == 36
+    assert len(grid) == 36
+    with pytest.raises(Grid.KeyError):
+        grid[Position(5, 5)]
+
+
+def test_open_load_toward(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path)
+    connection = grid[Position(0, 3)].connection(Direction.LEFT)
+    # The graph only links loaded pieces.
+    assert connection.forward_connection is None
+    assert grid.load_toward(connection, 1)
+    assert connection.forward_connection is grid[Position(0, 4)].connection(Direction.LEFT)
+    assert not grid.load_toward(connection, 1)
+    assert not grid.load_toward(connection, 2)
+    assert grid.load_toward(connection, -10)
+    assert Position(4, 0) in grid.storage
+
+
+def test_open_load_towards(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path)
+    right = grid[Position(0, 3)].connection(Direction.LEFT)
+    down = grid[Position(3, 0)].connection(Direction.UP)
+    assert grid.load_towards([(right, 1), (down, 1), (right, 1)])
+    assert Position(0, 4) in grid.storage
+    assert Position(4, 0) in grid.storage
+    assert not grid.load_towards([(right, 1), (down, 1)])
+
+
+def test_open_load_toward_far(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path)
+    connection = grid[Position(0, 3)].connection(Direction.LEFT)
+    # Follows the move through every chunk it runs into, not just the first.
+    assert grid.load_toward(connection, 10)
+    assert Position(4, 9) in grid.storage
+    assert connection.forward_connection is grid[Position(0, 4)].connection(Direction.LEFT)
+
+
+def test_open_close(tmp_path: Path) -> None:
+    with _open_loop(tmp_path) as grid:
+        assert grid[Position(0, 0)].position == Position(0, 0)
+    assert grid[Position(0, 0)].position == Position(0, 0)
+    # Chunks that weren't loaded can't be once the layout is closed.
+    with pytest.raises(ValueError):
+        grid.get(Position(9, 9))
+    # Grids that weren't opened have nothing to close.
+    with Grid.create_loop(3, 3) as grid:
+        pass
+
+
+def test_open_load_toward_dead_end(tmp_path: Path) -> None:
+    path = tmp_path / "line.trky"
+    Layout.save(Grid(Piece.create_line(Position(0, 0), Direction.RIGHT, 3)), path)
+    grid = Grid.open(path, chunk_size=4)
+    connection = grid[Position(0, 2)].connection(Direction.LEFT)
+    assert not grid.load_toward(connection, 1)
+
+
+def test_open_max_chunks(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path, max_chunks=2)
+    piece = grid[Position(0, 0)]
+    grid.get(Position(0, 4))
+    assert grid.storage.get_piece(Position(0, 0)) is piece
+    grid.get(Position(0, 0))
+    grid.get(Position(0, 8))
+    # The chunk with (0, 4) was used least recently, so it's unloaded.
+    assert grid.storage.get_piece(Position(0, 4)) is None
+    assert grid.storage.get_piece(Position(0, 0)) is piece
+    grid.get(Position(4, 0))
+    assert grid.storage.get_piece(Position(0, 0)) is None
+    assert piece.grid is None
+    assert grid[Position(0, 0)] is not piece
+    assert len(set(grid.storage.chunk_keys())) == 2  # type: ignore
+
+
+def test_open_pieces_in(tmp_path: Path) -> None:
+    grid = _open_loop(tmp_path, max_chunks=4)
+    grid.get(Position(0, 0))
+    # Without loading, only the pieces already loaded are found.
+    assert len(list(grid.pieces_in(Position(0, 0), Position(9, 9), load=False))) == 7
+    assert len(grid) == 7
+    # A rectangle can only be loaded if all of its chunks fit at once.
+    with pytest.raises(Grid.ValueError):
+        list(grid.pieces_in(Position(0, 0), Position(9, 9)))
+    assert len(list(grid.pieces_in(Position(0, 0), Position(7, 7)))) == 15
+    assert grid.storage.get_piece(Position(0, 0)) is not None
+
+
+def test_open_invalid_max_chunks(tmp_path: Path) -> None:
+    with pytest.raises(Grid.ValueError):
+        _open_loop(tmp_path, max_chunks=0)
+
+
+def test_load_toward_not_opened() -> None:
+    grid = Grid.create_loop(3, 3)
+    assert grid.layout is None
+    assert not grid.load_toward(next(iter(grid[Position(0, 0)].connections)), 100)
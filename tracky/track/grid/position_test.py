@@ -27,3 +27,7 @@ def test_sub(subtests: SubTests) -> None:
     ):
         with subtests.test(position=position, direction=direction, expected=expected):
             assert position - direction == expected
+
+
+def test_slots() -> None:
+    assert not hasattr(Position(0, 0), "__dict__")
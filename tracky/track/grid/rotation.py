@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from tracky.core import Error, Errorable
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Rotation(Errorable):
     """A grid rotation class that holds a number of clockwise rotations."""
 
@@ -24,18 +24,7 @@ class Rotation(Errorable):
         return Rotation(self.n - rhs.n)
 
     def __mul__(self, rhs: "direction.Direction") -> "direction.Direction":
-        result = rhs
-        for _ in range(self.n % 4):
-            match result:
-                case direction.Direction.LEFT:
-                    result = direction.Direction.UP
-                case direction.Direction.UP:
-                    result = direction.Direction.RIGHT
-                case direction.Direction.RIGHT:
-                    result = direction.Direction.DOWN
-                case direction.Direction.DOWN:
-                    result = direction.Direction.LEFT
-        return result
+        return rhs.rotate(self.n)
 
     def __rmul__(self, lhs: "direction.Direction") -> "direction.Direction":
         return self.__mul__(lhs)
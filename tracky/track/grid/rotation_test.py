@@ -119,3 +119,7 @@ def test_mul(subtests: SubTests) -> None:
         ):
             assert rotation * direction == expected
             assert direction * rotation == expected
+
+
+def test_slots() -> None:
+    assert not hasattr(Rotation(1), "__dict__")
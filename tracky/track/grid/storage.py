@@ -0,0 +1,154 @@
+from abc import abstractmethod
+from itertools import compress
+from typing import Iterator, MutableMapping, Optional, override
+
+from tracky.core import Error, Errorable
+from tracky.track.grid.position import Position
+
+
+class Storage(Errorable, MutableMapping[Position, "piece.Piece"]):
+    """Where a Grid keeps its pieces by position.
+
+    A Grid owns its storage and keeps it in sync with its pieces, so don't modify it
+    directly.
+    """
+
+    @abstractmethod
+    def get_piece(self, position: Position) -> Optional["piece.Piece"]:
+        """Get the piece at position, or None if there isn't one."""
+
+    @override
+    def __getitem__(self, position: Position) -> "piece.Piece":
+        if (piece_ := self.get_piece(position)) is None:
+            raise KeyError(position)
+        return piece_
+
+    @override
+    def __contains__(self, position: object) -> bool:
+        return isinstance(position, Position) and self.get_piece(position) is not None
+
+
+class DictStorage(Storage):
+    """Pieces in a dict keyed by position. The default storage."""
+
+    def __init__(self) -> None:
+        self.__pieces: dict[Position, piece.Piece] = {}
+
+    @override
+    def __repr__(self) -> str:
+        return f"DictStorage(len={len(self)})"
+
+    @override
+    def get_piece(self, position: Position) -> Optional["piece.Piece"]:
+        return self.__pieces.get(position)
+
+    @override
+    def __setitem__(self, position: Position, piece_: "piece.Piece") -> None:
+        self.__pieces[position] = piece_
+
+    @override
+    def __delitem__(self, position: Position) -> None:
+        del self.__pieces[position]
+
+    @override
+    def __iter__(self) -> Iterator[Position]:
+        return iter(self.__pieces)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.__pieces)
+
+
+class ChunkedStorage(Storage):
+    """Pieces in fixed-size square chunks, for very large, sparse layouts.
+
+    Each chunk holds a flat list of chunk_size * chunk_size slots, so lookups are O(1),
+    neighbouring pieces share a chunk, and empty space costs nothing. Iteration goes chunk
+    by chunk. Whole chunks can be unloaded and reloaded through the grid with
+    grid.remove_pieces(storage.chunk(key)) and grid.add_pieces(pieces).
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    def __init__(self, chunk_size: int = 64) -> None:
+        self.__chunk_size = chunk_size
+        self.__chunks: dict[tuple[int, int], list[Optional[piece.Piece]]] = {}
+        # Number of pieces in each chunk, so empty chunks can be dropped.
+        self.__chunk_counts: dict[tuple[int, int], int] = {}
+        self.__len = 0
+        if chunk_size < 1:
+            raise self._error(f"invalid chunk size {chunk_size}", self.ValueError)
+
+    @override
+    def __repr__(self) -> str:
+        return f"ChunkedStorage(chunk_size={self.__chunk_size}, len={self.__len})"
+
+    @property
+    def chunk_size(self) -> int:
+        return self.__chunk_size
+
+    def chunk_key(self, position: Position) -> tuple[int, int]:
+        """The (row, col) of the chunk containing position."""
+        return position.row // self.__chunk_size, position.col // self.__chunk_size
+
+    def chunk_keys(self) -> Iterator[tuple[int, int]]:
+        """The keys of the chunks that have pieces."""
+        return iter(self.__chunks)
+
+    def chunk(self, key: tuple[int, int]) -> list["piece.Piece"]:
+        """The pieces in the chunk with key, in row-major order."""
+        if (chunk := self.__chunks.get(key)) is None:
+            return []
+        return list(filter(None, chunk))
+
+    def __slot(self, position: Position) -> tuple[tuple[int, int], int]:
+        chunk_row, row = divmod(position.row, self.__chunk_size)
+        chunk_col, col = divmod(position.col, self.__chunk_size)
+        return (chunk_row, chunk_col), row * self.__chunk_size + col
+
+    @override
+    def get_piece(self, position: Position) -> Optional["piece.Piece"]:
+        key, slot = self.__slot(position)
+        if (chunk := self.__chunks.get(key)) is None:
+            return None
+        return chunk[slot]
+
+    @override
+    def __setitem__(self, position: Position, piece_: "piece.Piece") -> None:
+        key, slot = self.__slot(position)
+        if (chunk := self.__chunks.get(key)) is None:
+            chunk = self.__chunks[key] = [None] * (self.__chunk_size * self.__chunk_size)
+            self.__chunk_counts[key] = 0
+        if chunk[slot] is None:
+            self.__chunk_counts[key] += 1
+            self.__len += 1
+        chunk[slot] = piece_
+
+    @override
+    def __delitem__(self, position: Position) -> None:
+        key, slot = self.__slot(position)
+        if (chunk := self.__chunks.get(key)) is None or chunk[slot] is None:
+            raise KeyError(position)
+        chunk[slot] = None
+        self.__len -= 1
+        if (count := self.__chunk_counts[key] - 1) == 0:
+            del self.__chunks[key]
+            del self.__chunk_counts[key]
+        else:
+            self.__chunk_counts[key] = count
+
+    @override
+    def __iter__(self) -> Iterator[Position]:
+        size = self.__chunk_size
+        for (chunk_row, chunk_col), chunk in list(self.__chunks.items()):
+            # Pieces are always truthy, so compress picks out the occupied slots.
+            for slot in compress(range(size * size), chunk):
+                row, col = divmod(slot, size)
+                yield Position(chunk_row * size + row, chunk_col * size + col)
+
+    @override
+    def __len__(self) -> int:
+        return self.__len
+
+
+from tracky.track.pieces import piece
@@ -0,0 +1,66 @@
+from typing import Callable
+
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.track.grid import ChunkedStorage, DictStorage, Position, Storage
+from tracky.track.pieces import Piece
+
+STORAGES = list[tuple[str, Callable[[], Storage]]](
+    [
+        ("dict", DictStorage),
+        ("chunked", lambda: ChunkedStorage(chunk_size=4)),
+    ]
+)
+
+
+def test_set_get_del(subtests: SubTests) -> None:
+    for name, create in STORAGES:
+        with subtests.test(storage=name):
+            storage = create()
+            positions = [Position(0, 0), Position(3, 3), Position(4, 0), Position(-1, -5)]
+            pieces = {position: Piece(position) for position in positions}
+            for position, piece in pieces.items():
+                storage[position] = piece
+            assert len(storage) == 4
+            assert dict(storage) == pieces
+            assert storage[Position(-1, -5)] is pieces[Position(-1, -5)]
+            assert storage.get_piece(Position(1, 1)) is None
+            assert Position(3, 3) in storage
+            assert Position(1, 1) not in storage
+            assert "a" not in storage
+            with pytest.raises(KeyError):
+                storage[Position(1, 1)]
+            replacement = Piece(Position(0, 0))
+            storage[Position(0, 0)] = replacement
+            assert len(storage) == 4
+            assert storage[Position(0, 0)] is replacement
+            del storage[Position(3, 3)]
+            assert len(storage) == 3
+            assert Position(3, 3) not in storage
+            with pytest.raises(KeyError):
+                del storage[Position(3, 3)]
+            with pytest.raises(KeyError):
+                del storage[Position(100, 100)]
+
+
+def test_chunked_invalid_chunk_size() -> None:
+    with pytest.raises(ChunkedStorage.ValueError):
+        ChunkedStorage(chunk_size=0)
+
+
+def test_chunks() -> None:
+    storage = ChunkedStorage(chunk_size=4)
+    assert storage.chunk_size == 4
+    assert storage.chunk_key(Position(5, -1)) == (1, -1)
+    p1 = Piece(Position(0, 1))
+    p2 = Piece(Position(0, 0))
+    p3 = Piece(Position(5, -1))
+    for piece in (p1, p2, p3):
+        storage[piece.position] = piece
+    assert set(storage.chunk_keys()) == {(0, 0), (1, -1)}
+    assert storage.chunk((0, 0)) == [p2, p1]
+    assert storage.chunk((1, -1)) == [p3]
+    assert storage.chunk((9, 9)) == []
+    del storage[Position(5, -1)]
+    assert set(storage.chunk_keys()) == {(0, 0)}
@@ -0,0 +1,2 @@
+from .layout import Layout as Layout
+from .mapped_layout import MappedLayout as MappedLayout
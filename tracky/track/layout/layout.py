@@ -0,0 +1,124 @@
+import struct
+from mmap import mmap
+from pathlib import Path
+from typing import BinaryIO, ClassVar, Iterable, Iterator, Optional
+
+from tracky.core import Error, Errorable, Validatable
+from tracky.track.grid.grid import Grid
+from tracky.track.grid.position import Position
+from tracky.track.grid.storage import Storage
+from tracky.track.pieces import ConnectionShape, Piece
+
+
+class Layout(Errorable):
+    """A compact binary format for grids.
+
+    A layout is a header followed by one fixed-size record per piece: its row and col, its
+    connection_mask and its connection shape. Records are strictly sorted by row then col,
+    so a piece can be found in a layout by binary search without reading the rest.
+
+    Reading builds every piece in a single Validatable.batch() and adds them to the grid
+    in one go, so each piece is validated once rather than after every change.
+    """
+
+    class ValueError(Error, ValueError): ...
+
+    MAGIC: ClassVar[bytes] = b"TRKY"
+    VERSION: ClassVar[int] = 1
+    # magic, version, number of pieces.
+    HEADER: ClassVar[struct.Struct] = struct.Struct("<4sHQ")
+    # row, col, connection_mask, connection shape code.
+    RECORD: ClassVar[struct.Struct] = struct.Struct("<iiHB")
+    # Records are packed and written this many at a time.
+    WRITE_BATCH: ClassVar[int] = 4096
+
+    SHAPES: ClassVar[tuple[ConnectionShape, ...]] = tuple(ConnectionShape)
+    SHAPE_CODES: ClassVar[dict[ConnectionShape, int]] = {
+        shape: code for code, shape in enumerate(SHAPES)
+    }
+
+    @staticmethod
+    def records(grid: Grid) -> Iterable[tuple[int, int, int, int]]:
+        """The records for grid's pieces, in layout order.
+
+        For paged grids, these are only the pieces that are loaded.
+        """
+        for piece in grid.pieces_in(*grid.bounds, load=False):
+            yield (
+                piece.position.row,
+                piece.position.col,
+                piece.connection_mask,
+                Layout.SHAPE_CODES[piece.connection_shape],
+            )
+
+    @staticmethod
+    def piece(row: int, col: int, connection_mask: int, code: int) -> Piece:
+        """Build the piece for a record."""
+        if code >= len(Layout.SHAPES):
+            raise Layout.ValueError(f"invalid connection shape {code} at {row}, {col}")
+        return Piece.from_connection_mask(Position(row, col), connection_mask, Layout.SHAPES[code])
+
+    @staticmethod
+    def write(grid: Grid, file: BinaryIO) -> None:
+        """Write grid to file, streaming its pieces out in batches.
+
+        For paged grids, only the pieces that are loaded are written.
+        """
+        count = len(grid)
+        file.write(Layout.HEADER.pack(Layout.MAGIC, Layout.VERSION, count))
+        batch = bytearray()
+        pack = Layout.RECORD.pack
+        written = 0
+        for written, record in enumerate(Layout.records(grid), 1):
+            batch += pack(*record)
+            if written % Layout.WRITE_BATCH == 0:
+                file.write(batch)
+                batch.clear()
+        file.write(batch)
+        if written != count:
+            raise Layout.ValueError(f"wrote {written} pieces, expected {count}")
+
+    @staticmethod
+    def read_header(data: bytes | memoryview | mmap) -> int:
+        """Check a layout's header and return its number of pieces."""
+        if len(data) < Layout.HEADER.size:
+            raise Layout.ValueError(f"layout header truncated: {len(data)} bytes")
+        magic, version, count = Layout.HEADER.unpack_from(data)
+        if magic != Layout.MAGIC:
+            raise Layout.ValueError(f"not a layout: magic {magic!r}")
+        if version != Layout.VERSION:
+            raise Layout.ValueError(f"unsupported layout version {version}")
+        if len(data) != (size := Layout.HEADER.size + count * Layout.RECORD.size):
+            raise Layout.ValueError(f"layout has {len(data)} bytes, expected {size}")
+        return count
+
+    @staticmethod
+    def unpack_records(data: bytes | memoryview) -> Iterator[tuple[int, int, int, int]]:
+        """Check layout data's header and unpack its records."""
+        Layout.read_header(data)
+        return Layout.RECORD.iter_unpack(memoryview(data)[Layout.HEADER.size :])
+
+    @staticmethod
+    def read(file: BinaryIO, storage: Optional[Storage] = None) -> Grid:
+        """Read a grid from file, storing its pieces in storage if given."""
+        data = file.read()
+        piece = Layout.piece
+        pieces: list[Piece] = []
+        previous: Optional[tuple[int, int]] = None
+        with Validatable.batch():
+            for row, col, mask, code in Layout.unpack_records(data):
+                if previous is not None and (row, col) <= previous:
+                    raise Layout.ValueError(f"piece at {row}, {col} out of order")
+                previous = row, col
+                pieces.append(piece(row, col, mask, code))
+            return Grid(pieces, storage)
+
+    @staticmethod
+    def save(grid: Grid, path: str | Path) -> None:
+        with open(path, "wb") as file:
+            Layout.write(grid, file)
+
+    @staticmethod
+    def load(path: str | Path, storage: Optional[Storage] = None) -> Grid:
+        with open(path, "rb") as file:
+            return Layout.read(file, storage)
@@ -0,0 +1,136 @@
+import io
+from pathlib import Path
+
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.track.grid import ChunkedStorage, Direction, Grid, Position
+from tracky.track.layout import Layout
+from tracky.track.pieces import ConnectionShape, Piece
+
+
+def dumps(grid: Grid) -> bytes:
+    file = io.BytesIO()
+    Layout.write(grid, file)
+    return file.getvalue()
+
+
+def loads(data: bytes) -> Grid:
+    return Layout.read(io.BytesIO(data))
+
+
+def assert_grids_match(actual: Grid, expected: Grid) -> None:
+    assert set(actual) == set(expected)
+    for position, piece in expected.items():
+        assert actual[position].connection_mask == piece.connection_mask
+        assert actual[position].connection_shape is piece.connection_shape
+
+
+def test_round_trip(subtests: SubTests) -> None:
+    for name, grid in list[tuple[str, Grid]](
+        [
+            ("empty", Grid()),
+            ("loop", Grid.create_loop(4, 5, Position(-2, 3))),
+            (
+                "shapes",
+                Grid(
+                    [
+                        Piece.create(Position(0, 0), Direction.LEFT, Direction.RIGHT),
+                        Piece(Position(0, 1), connection_shape=ConnectionShape.CURVED),
+                        Piece(Position(-5, 7)),
+                    ]
+                ),
+            ),
+        ]
+    ):
+        with subtests.test(grid=name):
+            data = dumps(grid)
+            assert len(data) == Layout.HEADER.size + len(grid) * Layout.RECORD.size
+            assert Layout.read_header(data) == len(grid)
+            assert_grids_match(loads(data), grid)
+
+
+def test_round_trip_graph() -> None:
+    grid = Grid.create_loop(3, 3)
+    actual = loads(dumps(grid))
+    assert len(actual.graph.connections) == len(grid.graph.connections)
+    for connection in actual.graph.connections:
+        assert connection.forward_connection is not None
+        assert connection.reverse_connection is not None
+
+
+def test_records_sorted() -> None:
+    grid = Grid([Piece(Position(1, 0)), Piece(Position(0, 5)), Piece(Position(0, -1))])
+    assert [(row, col) for row, col, _, _ in Layout.records(grid)] == [(0, -1), (0, 5), (1, 0)]
+
+
+def test_write_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(Layout, "WRITE_BATCH", 3)
+    grid = Grid.create_loop(4, 4)
+    assert_grids_match(loads(dumps(grid)), grid)
+
+
+def test_write_paged(tmp_path: Path) -> None:
+    path = tmp_path / "sparse.trky"
+    Layout.save(Grid([Piece(Position(0, 0)), Piece(Position(0, 5)), Piece(Position(5, 5))]), path)
+    with Grid.open(path, chunk_size=2) as grid:
+        grid.get(Position(0, 0))
+        grid.get(Position(5, 5))
+        # Writing doesn't page in (0, 5), which is inside the loaded pieces' bounds.
+        actual = loads(dumps(grid))
+        assert len(grid) == 2
+        assert_grids_match(actual, grid)
+
+
+def test_write_changed(monkeypatch: pytest.MonkeyPatch) -> None:
+    grid = Grid.create_loop(3, 3)
+    records = list(Layout.records(grid))
+
+    def fewer_records(_: Grid) -> list[tuple[int, int, int, int]]:
+        return records[1:]
+
+    monkeypatch.setattr(Layout, "records", fewer_records)
+    with pytest.raises(Layout.ValueError):
+        dumps(grid)
+
+
+def test_read_storage() -> None:
+    grid = Grid.create_loop(3, 4)
+    actual = Layout.read(io.BytesIO(dumps(grid)), ChunkedStorage(chunk_size=2))
+    assert isinstance(actual.storage, ChunkedStorage)
+    assert_grids_match(actual, grid)
+
+
+def test_save_load(tmp_path: Path) -> None:
+    grid = Grid.create_loop(3, 3)
+    path = tmp_path / "loop.trky"
+    Layout.save(grid, path)
+    assert_grids_match(Layout.load(path), grid)
+
+
+def test_read_invalid(subtests: SubTests) -> None:
+    header = Layout.HEADER.pack(Layout.MAGIC, Layout.VERSION, 2)
+    record = Layout.RECORD.pack(0, 0, 0, 0)
+    for name, data in list[tuple[str, bytes]](
+        [
+            ("empty", b""),
+            ("magic", Layout.HEADER.pack(b"NOPE", Layout.VERSION, 0)),
+            ("version", Layout.HEADER.pack(Layout.MAGIC, Layout.VERSION + 1, 0)),
+            ("truncated", header + record),
+            ("trailing", header + record + Layout.RECORD.pack(0, 1, 0, 0) + b"\0"),
+            ("duplicate", header + record + record),
+            ("unsorted", header + Layout.RECORD.pack(1, 0, 0, 0) + Layout.RECORD.pack(0, 5, 0, 0)),
+            ("shape", header + record + Layout.RECORD.pack(0, 1, 0, len(ConnectionShape))),
+        ]
+    ):
+        with subtests.test(name=name):
+            with pytest.raises(Layout.ValueError):
+                loads(data)
+
+
+def test_read_invalid_connection_mask() -> None:
+    mask = 1 << (Direction.LEFT.index * 4 + Direction.RIGHT.index)
+    mask |= 1 << (Direction.LEFT.index * 4 + Direction.UP.index)
+    data = Layout.HEADER.pack(Layout.MAGIC, Layout.VERSION, 1) + Layout.RECORD.pack(0, 0, mask, 0)
+    with pytest.raises(Piece.ValidationError):
+        loads(data)
@@ -0,0 +1,110 @@
+import bisect
+import mmap
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import ClassVar, Iterator, Optional, override
+
+from tracky.core import Errorable
+from tracky.track.grid.position import Position
+from tracky.track.layout.layout import Layout
+from tracky.track.pieces import Piece
+
+
+class MappedLayout(Errorable):
+    """A layout file mapped into memory, read a few pieces at a time.
+
+    Pieces are found by binary search over the layout's sorted records and built only when
+    asked for, so opening a layout costs the same however big it is, and untouched parts
+    of the file are never read. Each call builds new pieces; Grid.open keeps the ones in
+    use.
+
+    The records are trusted to be in the order Layout.write puts them, since checking
+    would mean reading the whole file.
+    """
+
+    # The row and col at the start of a record.
+    KEY: ClassVar[struct.Struct] = struct.Struct("<ii")
+
+    def __init__(self, path: str | Path) -> None:
+        self.__path = Path(path)
+        with open(path, "rb") as file:
+            if (size := Path(path).stat().st_size) < Layout.HEADER.size:
+                # mmap can't map an empty file, so report the short header directly.
+                Layout.read_header(file.read(size))
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.__len = Layout.read_header(self.__map)
+        except Layout.ValueError:
+            self.__map.close()
+            raise
+
+    @override
+    def __repr__(self) -> str:
+        return f"MappedLayout(path={str(self.__path)!r}, len={self.__len})"
+
+    def __len__(self) -> int:
+        return self.__len
+
+    def __enter__(self) -> "MappedLayout":
+        return self
+
+    def __exit__(
+        self,
+        type: Optional[type[BaseException]],
+        value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    def close(self) -> None:
+        self.__map.close()
+
+    def __offset(self, index: int) -> int:
+        return Layout.HEADER.size + index * Layout.RECORD.size
+
+    def __key(self, index: int) -> tuple[int, int]:
+        return self.KEY.unpack_from(self.__map, self.__offset(index))
+
+    def __find(self, row: int, col: int) -> int:
+        """The index of the first record at or after row, col."""
+        return bisect.bisect_left(range(self.__len), (row, col), key=self.__key)
+
+    def record(self, index: int) -> tuple[int, int, int, int]:
+        """The row, col, connection_mask and connection shape code of a record."""
+        return Layout.RECORD.unpack_from(self.__map, self.__offset(index))
+
+    def get_piece(self, position: Position) -> Optional[Piece]:
+        """Build the piece at position, or return None if there isn't one."""
+        index = self.__find(position.row, position.col)
+        if index < self.__len and self.__key(index) == (position.row, position.col):
+            return Layout.piece(*self.record(index))
+
+    def records_in(
+        self, min_position: Position, max_position: Position
+    ) -> Iterator[tuple[int, int, int, int]]:
+        """The records in the rectangle from min_position to max_position, inclusive.
+
+        Takes a binary search per row in the rectangle plus the records found.
+        """
+        index = self.__find(min_position.row, min_position.col)
+        while index < self.__len:
+            row, col, connection_mask, code = self.record(index)
+            if row > max_position.row:
+                return
+            if col < min_position.col:
+                index = self.__find(row, min_position.col)
+            elif col > max_position.col:
+                index = self.__find(row + 1, min_position.col)
+            else:
+                yield row, col, connection_mask, code
+                index += 1
+
+    def pieces_in(self, min_position: Position, max_position: Position) -> Iterator[Piece]:
+        """Build the pieces in the rectangle from min_position to max_position, inclusive."""
+        for record in self.records_in(min_position, max_position):
+            yield Layout.piece(*record)
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+from pytest_subtests import SubTests
+
+from tracky.track.grid import Direction, Grid, Position
+from tracky.track.layout import Layout, MappedLayout
+from tracky.track.pieces import ConnectionShape, Piece
+
+
+def save(tmp_path: Path, grid: Grid) -> Path:
+    path = tmp_path / "layout.trky"
+    Layout.save(grid, path)
+    return path
+
+
+def test_get_piece(tmp_path: Path) -> None:
+    grid = Grid.create_loop(4, 4, Position(-1, -1))
+    with MappedLayout(save(tmp_path, grid)) as layout:
+        assert len(layout) == len(grid)
+        for position, piece in grid.items():
+            actual = layout.get_piece(position)
+            assert actual is not None
+            assert actual.position == position
+            assert actual.connection_mask == piece.connection_mask
+            assert actual.grid is None
+        for position in [Position(0, 0), Position(-2, -1), Position(10, 10), Position(1, 3)]:
+            assert layout.get_piece(position) is None
+
+
+def test_get_piece_connection_shape(tmp_path: Path) -> None:
+    grid = Grid([Piece(Position(0, 0), connection_shape=ConnectionShape.CURVED)])
+    with MappedLayout(save(tmp_path, grid)) as layout:
+        piece = layout.get_piece(Position(0, 0))
+        assert piece is not None
+        assert piece.connection_shape is ConnectionShape.CURVED
+
+
+def test_pieces_in(tmp_path: Path, subtests: SubTests) -> None:
+    grid = Grid([Piece(Position(row, col)) for row in range(0, 10, 2) for col in range(-4, 5)])
+    with MappedLayout(save(tmp_path, grid)) as layout:
+        for min_position, max_position in list[tuple[Position, Position]](
+            [
+                (Position(0, 0), Position(0, 0)),
+                (Position(1, -10), Position(1, 10)),
+                (Position(-5, -5), Position(20, 20)),
+                (Position(1, 1), Position(6, 2)),
+                (Position(3, 0), Position(9, -1)),
+                (Position(20, 0), Position(30, 0)),
+            ]
+        ):
+            with subtests.test(min_position=min_position, max_position=max_position):
+                assert [
+                    piece.position for piece in layout.pieces_in(min_position, max_position)
+                ] == [piece.position for piece in grid.pieces_in(min_position, max_position)]
+
+
+def test_record(tmp_path: Path) -> None:
+    grid = Grid([Piece.create(Position(1, 2), Direction.UP, Direction.DOWN)])
+    with MappedLayout(save(tmp_path, grid)) as layout:
+        assert layout.record(0) == (1, 2, grid[Position(1, 2)].connection_mask, 0)
+
+
+def test_invalid(tmp_path: Path, subtests: SubTests) -> None:
+    for name, data in list[tuple[str, bytes]](
+        [
+            ("empty", b""),
+            ("magic", Layout.HEADER.pack(b"NOPE", Layout.VERSION, 0)),
+            ("truncated", Layout.HEADER.pack(Layout.MAGIC, Layout.VERSION, 1)),
+        ]
+    ):
+        with subtests.test(name=name):
+            path = tmp_path / f"{name}.trky"
+            path.write_bytes(data)
+            with pytest.raises(Layout.ValueError):
+                MappedLayout(path)
+
+
+def test_close(tmp_path: Path) -> None:
+    layout = MappedLayout(save(tmp_path, Grid.create_loop(3, 3)))
+    assert layout.path == tmp_path / "layout.trky"
+    assert repr(layout) == f"MappedLayout(path={str(layout.path)!r}, len=8)"
+    layout.close()
+    with pytest.raises(ValueError):
+        layout.get_piece(Position(0, 0))
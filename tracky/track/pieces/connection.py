@@ -66,21 +66,11 @@ class Connection(Validatable):
         Note that this preserves directionality. You aren't going backwards the other way.
         You want to end up on a connection that has the same direction as the one you're
         currently pointed in.
+
+        Resolved through the grid's compiled graph.
         """
-        # Get the piece we came from, always the same.
-        if reverse_piece := self.reverse_piece:
-            # Get the connection we would go over if we were going the opposite
-            # direction.
-            if incoming_connection := reverse_piece.connections_by_direction.get(
-                -self.reverse_direction
-            ):
-                # Get the complimentary connection to that, which is the connection we
-                # would end up on if we were going backwards. Note that this doesn't
-                # have to exist. Some pieces can be directional, like a derailer or a
-                # signal. That's ok and representable.
-                return reverse_piece.connections_by_direction.get(
-                    incoming_connection.forward_direction
-                )
+        if grid := self.grid:
+            return grid.graph.reverse_connection(self)
 
     @property
     def forward_direction(self) -> Direction:
@@ -97,8 +87,12 @@ class Connection(Validatable):
 
     @property
     def forward_connection(self) -> Optional["Connection"]:
-        if forward_piece := self.forward_piece:
-            return forward_piece.connection(-self.forward_direction)
+        """Get the connection for moving forward from this connection.
+
+        Resolved through the grid's compiled graph.
+        """
+        if grid := self.grid:
+            return grid.graph.forward_connection(self)
 
     @property
     def piece(self) -> Optional["piece.Piece"]:
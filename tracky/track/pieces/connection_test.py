@@ -4,7 +4,7 @@ import pytest
 from pytest_subtests import SubTests
 
 from tracky.track.grid import Direction, Grid, Position, Rotation
-from tracky.track.pieces import Connection, Piece
+from tracky.track.pieces import Connection, ConnectionShape, Piece
 
 
 def test_ctor_no_piece() -> None:
@@ -24,6 +24,13 @@ def test_ctor_piece() -> None:
     assert c is p.connections_by_direction[Direction.UP]
 
 
+def test_connection_shape() -> None:
+    c = Connection(Direction.UP, Direction.DOWN)
+    assert c.connection_shape is None
+    Piece(Position(0, 0), connections={c}, connection_shape=ConnectionShape.CURVED)
+    assert c.connection_shape == ConnectionShape.CURVED
+
+
 def test_eq() -> None:
     c = Connection(Direction.UP, Direction.DOWN)
     assert c == c
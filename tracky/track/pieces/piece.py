@@ -1,4 +1,5 @@
 from collections import defaultdict
+from functools import cache
 from typing import Iterable, Mapping, Optional, override
 
 from tracky.core import Error, Validatable
@@ -22,6 +23,9 @@ class Piece(Validatable):
         super().__init__()
         self.__grid: Optional["grid.Grid"] = None
         self.__connections = frozenset[Connection]()
+        self.__connections_by_index: tuple[Optional[Connection], ...] = (None,) * 4
+        self.__connection_mask = 0
+        self.__rotated_connection_masks: Optional[tuple[int, ...]] = None
         self.__connection_shape = connection_shape
         with self._pause_validation():
             self.__position = position
@@ -61,16 +65,28 @@ class Piece(Validatable):
                 added_connections = connections_ - self.__connections
                 removed_connections = self.__connections - connections_
                 self.__connections = connections_
+                connections_by_index: list[Optional[Connection]] = [None] * 4
+                for connection in connections_:
+                    connections_by_index[connection.reverse_direction.index] = connection
+                self.__connections_by_index = tuple(connections_by_index)
+                self.__connection_mask = self.__mask(connections_)
+                self.__rotated_connection_masks = None
+                if self.__grid is not None:
+                    self.__grid.piece_changed(self)
                 for connection in added_connections:
                     connection.piece = self
                 for connection in removed_connections:
                     connection.piece = None
 
     def add_connection(self, connection: Connection) -> None:
-        self.connections |= {connection}
+        # Connections call back here when the connections setter sets their piece, so skip
+        # rebuilding an unchanged set.
+        if connection not in self.__connections:
+            self.connections |= {connection}
 
     def remove_connection(self, connection: Connection) -> None:
-        self.connections -= {connection}
+        if connection in self.__connections:
+            self.connections -= {connection}
 
     @property
     def grid(self) -> Optional["grid.Grid"]:
@@ -89,24 +105,35 @@ class Piece(Validatable):
     def _validate(self) -> None:
         if self.__grid is not None and self not in self.__grid.pieces:
             raise self._validation_error(f"not in grid {self.__grid}")
-        connections_by_direction = defaultdict[Direction, set[Connection]](set)
-        for connection in self.connections:
-            connections_by_direction[connection.reverse_direction].add(connection)
-        for direction, connections in connections_by_direction.items():
-            if len(connections) > 1:
-                raise self._validation_error(
-                    f"multiple connections in direction {direction}: {connections}"
-                )
+        # The table keeps one connection per direction, so it's short if any collided.
+        if sum(connection is not None for connection in self.__connections_by_index) != len(
+            self.__connections
+        ):
+            connections_by_direction = defaultdict[Direction, set[Connection]](set)
+            for connection in self.connections:
+                connections_by_direction[connection.reverse_direction].add(connection)
+            for direction, connections in connections_by_direction.items():
+                if len(connections) > 1:
+                    raise self._validation_error(
+                        f"multiple connections in direction {direction}: {connections}"
+                    )
 
     @property
     def connections_by_direction(self) -> Mapping[Direction, Connection]:
-        return {connection.reverse_direction: connection for connection in self.connections}
+        return {
+            connection.reverse_direction: connection
+            for connection in self.__connections_by_index
+            if connection is not None
+        }
+
+    def get_connection(self, direction: Direction) -> Optional[Connection]:
+        """Get the connection entering from direction, or None if there isn't one."""
+        return self.__connections_by_index[direction.index]
 
     def connection(self, direction: Direction) -> Connection:
-        try:
-            return self.connections_by_direction[direction]
-        except KeyError as e:
-            raise self.KeyError(f"no connection for direction {direction} in piece {self}") from e
+        if (connection := self.__connections_by_index[direction.index]) is None:
+            raise self.KeyError(f"no connection for direction {direction} in piece {self}")
+        return connection
 
     def reverse_position(self, direction: Direction) -> Optional[Position]:
         if connection := self.connection(direction):
@@ -147,6 +174,22 @@ class Piece(Validatable):
             ],
         )
 
+    @staticmethod
+    def from_connection_mask(
+        position: Position,
+        connection_mask: int,
+        connection_shape: ConnectionShape = ConnectionShape.STRAIGHT,
+    ) -> "Piece":
+        """Create a piece with the connections in connection_mask, as in Piece.connection_mask."""
+        return Piece(
+            position=position,
+            connections=[
+                Connection(reverse_direction=reverse, forward_direction=forward)
+                for reverse, forward in _mask_directions(connection_mask)
+            ],
+            connection_shape=connection_shape,
+        )
+
     @staticmethod
     def create_line(
         position: Position,
@@ -167,17 +210,49 @@ class Piece(Validatable):
             connections=[connection.rotate(rotation) for connection in self.connections],
         )
 
+    @staticmethod
+    def __mask(connections: Iterable[Connection]) -> int:
+        mask = 0
+        for connection in connections:
+            mask |= 1 << (
+                connection.reverse_direction.index * 4 + connection.forward_direction.index
+            )
+        return mask
+
+    @property
+    def connection_mask(self) -> int:
+        """A 16-bit mask of the piece's connections, ignoring position and shape.
+
+        Each connection sets bit reverse_direction.index * 4 + forward_direction.index, so
+        pieces with the same connections have equal masks.
+        """
+        return self.__connection_mask
+
+    def __rotated_masks(self) -> tuple[int, ...]:
+        if self.__rotated_connection_masks is None:
+            self.__rotated_connection_masks = tuple(
+                self.__mask(connection.rotate(Rotation(n)) for connection in self.connections)
+                for n in range(4)
+            )
+        return self.__rotated_connection_masks
+
     def is_same_as(self, rhs: "Piece") -> bool:
-        return len(self.connections) == len(rhs.connections) and all(
-            lhs_connection.is_same_as(rhs_connection)
-            for lhs_connection, rhs_connection in zip(self.connections, rhs.connections)
-        )
+        return self.__connection_mask == rhs.__connection_mask
 
     def rotation_to(self, rhs: "Piece") -> Optional[Rotation]:
-        for i in range(4):
-            rotation = Rotation(i)
-            if self.rotate(rotation).is_same_as(rhs):
-                return rotation
+        for n, mask in enumerate(self.__rotated_masks()):
+            if mask == rhs.__connection_mask:
+                return Rotation(n)
+
+
+@cache
+def _mask_directions(connection_mask: int) -> tuple[tuple[Direction, Direction], ...]:
+    """The (reverse, forward) direction pairs of the connections in a connection mask."""
+    return tuple(
+        (Direction.from_index(bit // 4), Direction.from_index(bit % 4))
+        for bit in range(16)
+        if connection_mask >> bit & 1
+    )
 
 
 from tracky.track.grid import grid
@@ -88,6 +88,16 @@ def test_connection() -> None:
         piece.connection(Direction.DOWN)
 
 
+def test_get_connection() -> None:
+    c = Connection(Direction.UP, Direction.DOWN)
+    piece = Piece(Position(0, 0), connections={c})
+    assert piece.get_connection(Direction.UP) is c
+    assert piece.get_connection(Direction.DOWN) is None
+    piece.connections = set()
+    assert piece.get_connection(Direction.UP) is None
+    assert piece.connections_by_direction == {}
+
+
 def test_reverse_position() -> None:
     piece = Piece(Position(0, 0), connections={Connection(Direction.UP, Direction.DOWN)})
     assert piece.reverse_position(Direction.UP) == Position(-1, 0)
@@ -134,6 +144,34 @@ def test_create() -> None:
     )
 
 
+def test_from_connection_mask(subtests: SubTests) -> None:
+    for piece in list[Piece](
+        [
+            Piece(Position(0, 0)),
+            Piece.create(Position(1, 2), Direction.UP, Direction.DOWN),
+            Piece.create(Position(-1, 0), Direction.LEFT, Direction.UP),
+            Piece(Position(0, 0), connections={Connection(Direction.LEFT, Direction.RIGHT)}),
+        ]
+    ):
+        with subtests.test(piece=piece):
+            actual = Piece.from_connection_mask(
+                piece.position, piece.connection_mask, ConnectionShape.CURVED
+            )
+            assert actual.position == piece.position
+            assert actual.connection_mask == piece.connection_mask
+            assert actual.connection_shape is ConnectionShape.CURVED
+            assert all(connection.piece is actual for connection in actual.connections)
+
+
+def test_from_connection_mask_duplicate_directions() -> None:
+    with pytest.raises(Piece.ValidationError):
+        Piece.from_connection_mask(
+            Position(0, 0),
+            1 << (Direction.LEFT.index * 4 + Direction.RIGHT.index)
+            | 1 << (Direction.LEFT.index * 4 + Direction.UP.index),
+        )
+
+
 def test_create_line() -> None:
     line = list(Piece.create_line(Position(0, 0), Direction.RIGHT, 3))
     for i in range(3):
@@ -258,3 +296,24 @@ def test_rotation_to(subtests: SubTests) -> None:
             assert lhs.rotation_to(rhs) == expected
             if expected is not None:
                 assert lhs.rotate(expected).is_same_as(rhs)
+
+
+def test_connection_mask() -> None:
+    assert Piece(Position(0, 0)).connection_mask == 0
+    piece = Piece(Position(0, 0), connections={Connection(Direction.LEFT, Direction.RIGHT)})
+    assert piece.connection_mask == 1 << (Direction.LEFT.index * 4 + Direction.RIGHT.index)
+    assert (
+        Piece.create(Position(0, 0), Direction.LEFT, Direction.RIGHT).connection_mask
+        == Piece.create(Position(1, 1), Direction.RIGHT, Direction.LEFT).connection_mask
+    )
+    piece.connections = {Connection(Direction.UP, Direction.DOWN)}
+    assert piece.connection_mask == 1 << (Direction.UP.index * 4 + Direction.DOWN.index)
+
+
+def test_rotation_to_after_change() -> None:
+    lhs = Piece(Position(0, 0), connections={Connection(Direction.LEFT, Direction.RIGHT)})
+    rhs = Piece(Position(0, 0), connections={Connection(Direction.UP, Direction.RIGHT)})
+    assert lhs.rotation_to(rhs) is None
+    assert lhs.rotation_to(rhs) is None
+    lhs.connections = {Connection(Direction.LEFT, Direction.UP)}
+    assert lhs.rotation_to(rhs) == Rotation(1)
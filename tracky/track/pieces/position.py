@@ -1,3 +1,4 @@
+import math
 from dataclasses import dataclass
 from typing import Optional
 
@@ -5,7 +6,7 @@ from tracky.core import Error, Errorable
 from tracky.track.pieces import Connection, Piece
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Position(Errorable):
     class ValueError(Error, ValueError): ...
 
@@ -13,18 +14,23 @@ class Position(Errorable):
     u: float
 
     def with_u(self, u: float) -> "Position":
-        connection = self.connection
-        while u >= 1:
-            u -= 1
-            if (forward_connection := connection.forward_connection) is None:
-                raise self._error("no forward connection", self.ValueError)
-            connection = forward_connection
-        while u < 0:
-            u += 1
-            if (reverse_connection := connection.reverse_connection) is None:
-                raise self._error("no reverse connection", self.ValueError)
-            connection = reverse_connection
-        return Position(connection, u)
+        if 0 <= u < 1:
+            return Position(self.connection, u)
+        if (grid_ := self.grid) is None:
+            raise self._error(
+                "no forward connection" if u >= 1 else "no reverse connection", self.ValueError
+            )
+        hops = math.floor(u)
+        graph = grid_.graph
+        while (id_ := graph.advance(graph.id(self.connection), hops)) == graph_lib.Graph.NONE:
+            # Paged grids can load more track where the move ran out.
+            if not grid_.load_toward(self.connection, hops):
+                raise self._error(
+                    "no forward connection" if hops > 0 else "no reverse connection",
+                    self.ValueError,
+                )
+            graph = grid_.graph
+        return Position(graph.connections[id_], u - hops)
 
     def __add__(self, du: float) -> "Position":
         return self.with_u(self.u + du)
@@ -47,5 +53,6 @@ class Position(Errorable):
             return piece.grid
 
 
+from tracky.track.graph import graph as graph_lib
 from tracky.track.grid import grid
 from tracky.track.grid import position as grid_position
@@ -1,7 +1,10 @@
+from pathlib import Path
+
 import pytest
 
 from tracky.track.grid import Direction, Grid
 from tracky.track.grid import Position as GridPosition
+from tracky.track.layout import Layout
 from tracky.track.pieces import Piece
 from tracky.track.pieces import Position as TrackPosition
 
@@ -83,3 +86,30 @@ def test_with_u_two_pieces_reverse() -> None:
     pos = TrackPosition(p3.connection(Direction.LEFT), 0.5)
     assert pos.piece is p3
     assert pos.with_u(-2).piece is p1
+
+
+def test_with_u_no_grid() -> None:
+    p1 = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
+    pos = TrackPosition(p1.connection(Direction.LEFT), 0.5)
+    assert pos.with_u(0.25).u == 0.25
+    with pytest.raises(TrackPosition.ValueError):
+        pos.with_u(1.5)
+    with pytest.raises(TrackPosition.ValueError):
+        pos.with_u(-0.5)
+
+
+def test_slots() -> None:
+    piece = Piece.create(GridPosition(0, 0), Direction.LEFT, Direction.RIGHT)
+    assert not hasattr(TrackPosition(piece.connection(Direction.LEFT), 0), "__dict__")
+
+
+def test_with_u_paged_grid(tmp_path: Path) -> None:
+    path = tmp_path / "loop.trky"
+    Layout.save(Grid.create_loop(10, 10), path)
+    grid = Grid.open(path, chunk_size=4)
+    connection = grid[GridPosition(0, 1)].connection(Direction.LEFT)
+    position = TrackPosition(connection, 0.5)
+    assert (position + 5).grid_position == GridPosition(0, 6)
+    assert position + 36 == position
+    assert (position - 2).grid_position == GridPosition(1, 0)
+    assert len(grid) == 36
@@ -0,0 +1,104 @@
+import math
+from typing import override
+
+import numpy as np
+import numpy.typing as npt
+
+from tracky.core import Errorable
+from tracky.track import ConnectionShape, Direction, Graph
+from tracky.visuals.projection import Projection
+
+
+class BatchProjection(Errorable):
+    """Vectorized Projection.track_to_screen over arrays of track positions.
+
+    Requires the optional numpy dependency.
+
+    Positions are given as connection ids in a compiled Graph and u values, such as an
+    Engine's connection_ids and us. The per-connection lookups are compiled once per graph
+    and reused until a different graph is passed in.
+    """
+
+    def __init__(self, projection: Projection) -> None:
+        self.__projection = projection
+        self.__graph: Graph | None = None
+        # Per connection id: its tile's screen x and y, whether the tile is on screen, and
+        # its row in segments.
+        self.__tile_x = np.zeros(0, dtype=np.int64)
+        self.__tile_y = np.zeros(0, dtype=np.int64)
+        self.__tile_visible = np.zeros(0, dtype=np.bool_)
+        self.__table = np.zeros(0, dtype=np.int64)
+        # Projection.connection_segments for each distinct connection kind, stacked.
+        self.__segments = np.zeros((0, Projection.SAMPLES, 6))
+
+    @override
+    def __repr__(self) -> str:
+        return f"BatchProjection(projection={self.__projection})"
+
+    @property
+    def projection(self) -> Projection:
+        return self.__projection
+
+    def __compile(self, graph: Graph) -> None:
+        projection = self.__projection
+        tables: dict[tuple[ConnectionShape, Direction, Direction], int] = {}
+        n = len(graph)
+        tile_x = np.zeros(n, dtype=np.int64)
+        tile_y = np.zeros(n, dtype=np.int64)
+        tile_visible = np.zeros(n, dtype=np.bool_)
+        table = np.zeros(n, dtype=np.int64)
+        for id_, connection in enumerate(graph.connections):
+            if (piece := connection.piece) is None:
+                # A stale graph can hold connections that have since left their piece.
+                continue
+            if (origin := projection.grid_to_screen(piece.position)) is not None:
+                tile_x[id_] = origin.x
+                tile_y[id_] = origin.y
+                tile_visible[id_] = True
+            key = (
+                piece.connection_shape,
+                connection.reverse_direction,
+                connection.forward_direction,
+            )
+            table[id_] = tables.setdefault(key, len(tables))
+        segments = np.zeros((len(tables), Projection.SAMPLES, 6))
+        for key, index in tables.items():
+            segments[index] = projection.connection_segments(*key)
+        self.__tile_x = tile_x
+        self.__tile_y = tile_y
+        self.__tile_visible = tile_visible
+        self.__table = table
+        self.__segments = segments
+        self.__graph = graph
+
+    def track_to_screen(
+        self,
+        graph: Graph,
+        connection_ids: npt.NDArray[np.int64],
+        us: npt.NDArray[np.float64],
+    ) -> tuple[
+        npt.NDArray[np.int64],
+        npt.NDArray[np.int64],
+        npt.NDArray[np.float64],
+        npt.NDArray[np.bool_],
+    ]:
+        """Project each (connection id, u) pair to screen space.
+
+        Returns screen x, y, heading in radians, and whether the position is on screen.
+        Entries that aren't on screen have unspecified x, y and heading, matching the None
+        that Projection.track_to_screen returns for them.
+        """
+        if graph is not self.__graph:
+            self.__compile(graph)
+        u = us * Projection.SAMPLES
+        i = np.clip(np.trunc(u).astype(np.int64), 0, Projection.SAMPLES - 1)
+        du = u - i
+        segments = self.__segments[self.__table[connection_ids], i]
+        x = self.__tile_x[connection_ids] + segments[:, 0].astype(np.int64)
+        x += np.trunc(segments[:, 2] * du).astype(np.int64)
+        y = self.__tile_y[connection_ids] + segments[:, 1].astype(np.int64)
+        y += np.trunc(segments[:, 3] * du).astype(np.int64)
+        heading = segments[:, 4] + segments[:, 5] * du
+        # Normalize to [-pi, pi) like visuals.Rotation.
+        heading = np.mod(heading + math.pi * 3, math.pi * 2) - math.pi
+        return x, y, heading, self.__tile_visible[connection_ids]
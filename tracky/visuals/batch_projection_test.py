@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import numpy as np
+import numpy.typing as npt
+
+from tracky.track import ConnectionShape, Grid, GridPosition, Piece
+from tracky.visuals import Position, Projection, Rectangle, Rotation
+from tracky.visuals.batch_projection import BatchProjection
+
+
+def _projection(row: int = 0, col: int = 0) -> Projection:
+    return Projection(
+        Rectangle(Position(0, 0), Position(400, 300)), GridPosition(row, col), tile_size=50
+    )
+
+
+def test_matches_track_to_screen() -> None:
+    grid = Grid.create_loop(8, 8)
+    for piece in list(grid.pieces)[::2]:
+        grid.remove_piece(piece)
+        grid.add_piece(
+            Piece(piece.position, piece.connections, connection_shape=ConnectionShape.CURVED)
+        )
+    graph = grid.graph
+    rng = np.random.default_rng(0)
+    connection_ids: npt.NDArray[np.int64] = rng.integers(0, len(graph), 1000)
+    us: npt.NDArray[np.float64] = np.concatenate([rng.random(990), np.linspace(0, 1, 10)])
+    for row, col in ((0, 0), (2, 3)):
+        projection = _projection(row, col)
+        batch = BatchProjection(projection)
+        x, y, heading, visible = batch.track_to_screen(graph, connection_ids, us)
+        for i in range(len(connection_ids)):
+            expected = projection.connection_lerp(
+                graph.connections[int(connection_ids[i])], float(us[i])
+            )
+            if expected is None:
+                assert not visible[i]
+            else:
+                assert visible[i]
+                assert (Position(int(x[i]), int(y[i])), Rotation(float(heading[i]))) == expected
+
+
+def test_recompiles_for_new_graph() -> None:
+    grid = Grid.create_loop(3, 3)
+    batch = BatchProjection(_projection())
+    assert batch.projection == _projection()
+    id_ = grid.graph.id(next(iter(grid[GridPosition(0, 0)].connections)))
+    x, y, _, visible = batch.track_to_screen(grid.graph, np.array([id_]), np.array([0.5]))
+    assert visible[0] and x[0] < 50 and y[0] < 50
+    grid.add_piece(Piece(GridPosition(10, 10)))
+    id_ = grid.graph.id(next(iter(grid[GridPosition(2, 2)].connections)))
+    x, y, _, visible = batch.track_to_screen(grid.graph, np.array([id_]), np.array([0.5]))
+    assert visible[0] and x[0] >= 100 and y[0] >= 100
+
+
+def test_empty() -> None:
+    grid = Grid.create_loop(3, 3)
+    batch = BatchProjection(_projection())
+    x, y, heading, visible = batch.track_to_screen(
+        grid.graph, np.zeros(0, dtype=np.int64), np.zeros(0)
+    )
+    assert len(x) == len(y) == len(heading) == len(visible) == 0
+
+
+def test_detached_connection() -> None:
+    grid = Grid.create_loop(3, 3)
+    graph = grid.graph
+    piece = grid[GridPosition(0, 0)]
+    connection = next(iter(piece.connections))
+    piece.remove_connection(connection)
+    batch = BatchProjection(_projection())
+    _, _, _, visible = batch.track_to_screen(graph, np.array([graph.id(connection)]), np.zeros(1))
+    assert not visible[0]
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from typing import SupportsFloat, Union, overload
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Offset:
     """Offset in screen space between positions."""
 
@@ -66,3 +66,7 @@ def test_lerp(subtests: SubTests) -> None:
     ):
         with subtests.test(lhs=lhs, rhs=rhs, u=u, expected=expected):
             assert lhs.lerp(rhs, u) == expected
+
+
+def test_slots() -> None:
+    assert not hasattr(Offset(1, 2), "__dict__")
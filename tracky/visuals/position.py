@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import SupportsFloat, Union, overload
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Position:
     """Screen-space pixel position."""
 
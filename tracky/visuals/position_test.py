@@ -41,3 +41,7 @@ def test_lerp(subtests: SubTests) -> None:
 
 def test_direction_to() -> None:
     assert Position(1, 0).direction_to(Position(0, 1)) == Rotation.from_degrees(135)
+
+
+def test_slots() -> None:
+    assert not hasattr(Position(1, 2), "__dict__")
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional, SupportsFloat
+from functools import cache
+from typing import ClassVar, Optional, SupportsFloat
 
 from tracky.core import Errorable
 from tracky.track import Connection, ConnectionShape, Direction, GridPosition, TrackPosition
@@ -17,6 +18,9 @@ class Projection(Errorable):
     grid_origin: GridPosition
     tile_size: int
 
+    # Samples per connection in the lookup tables behind connection_lerp.
+    SAMPLES: ClassVar[int] = 16
+
     @property
     def grid_num_cols(self) -> int:
         return self.screen_rect.width // self.tile_size
@@ -106,62 +110,121 @@ class Projection(Errorable):
         connection: Connection,
         u: SupportsFloat,
     ) -> Optional[tuple[Position, Rotation]]:
-        print(f"\nconnection_lerp: c: {connection}, u: {u}")
-        if (ends := self.connection_ends(connection)) and (
-            connection_shape := connection.connection_shape
-        ):
-            reverse_pos, forward_pos = ends
-            print(
-                f"reverse_pos: {reverse_pos}, "
-                f"forward_pos: {forward_pos}, "
-                f"connection_shape: {connection_shape}"
+        """Get the screen position and heading at u along connection.
+
+        Looks up a table of samples along the connection's shape and interpolates between
+        them, so results are exact at multiples of 1 / SAMPLES.
+        """
+        if (piece := connection.piece) and (origin := self.grid_to_screen(piece.position)):
+            segments = _segments(
+                piece.connection_shape,
+                connection.reverse_direction,
+                connection.forward_direction,
+                self.tile_size,
             )
-            match connection_shape:
-                case ConnectionShape.STRAIGHT:
-                    return (
-                        reverse_pos.lerp(forward_pos, u),
-                        reverse_pos.direction_to(forward_pos),
-                    )
-                case ConnectionShape.CURVED:
-                    if corner := self.connection_corner(connection):
-                        print(f"corner: {corner}")
-                        # Diffs from entry and exit positions to corner.
-                        reverse_diff = reverse_pos - corner
-                        forward_diff = forward_pos - corner
-                        print(f"reverse_diff: {reverse_diff}, " f"forward_diff: {forward_diff}")
-                        # Rotations about corner to entry and exit positions.
-                        reverse_rotation = reverse_diff.as_rotation()
-                        forward_rotation = forward_diff.as_rotation()
-                        print(
-                            f"reverse_rotation: {reverse_rotation}, "
-                            f"forward_rotation: {forward_rotation}"
-                        )
-                        # Lerp u between rotations to get rotation about corner.
-                        corner_rotation = reverse_rotation.lerp(forward_rotation, u)
-                        print(f"corner_rotation: {corner_rotation}")
-                        # Apply that rotation to the entry diff to get the position
-                        # relative to the tile, and add that to the corner to get
-                        # the position on the screen.
-                        position = corner + corner_rotation * Offset(int(reverse_diff.length), 0)
-                        print(f"position: {position}")
-
-                        # Get the direction of travel at entry and exit points.
-                        entry_direction = -connection.reverse_direction
-                        exit_direction = connection.forward_direction
-                        # Get the rotations of those directions.
-                        entry_rotation = Rotation.from_direction(entry_direction)
-                        exit_rotation = Rotation.from_direction(exit_direction)
-                        # The final rotation is the lerp between the entry and
-                        # exit rotations.
-                        rotation = entry_rotation.lerp(exit_rotation, u)
-
-                        return position, rotation
-                    else:
-                        # No corner found between sides - this is a straight piece of track.
-                        return (
-                            reverse_pos.lerp(forward_pos, u),
-                            reverse_pos.direction_to(forward_pos),
-                        )
+            u_ = float(u) * self.SAMPLES
+            i = min(max(int(u_), 0), self.SAMPLES - 1)
+            du = u_ - i
+            x, y, dx, dy, th, dth = segments[i]
+            return (
+                Position(origin.x + x + int(dx * du), origin.y + y + int(dy * du)),
+                Rotation(th + dth * du),
+            )
+
+    def connection_segments(
+        self,
+        connection_shape: ConnectionShape,
+        reverse_direction: Direction,
+        forward_direction: Direction,
+    ) -> tuple[tuple[int, int, int, int, float, float], ...]:
+        """The SAMPLES segments that connection_lerp interpolates along.
+
+        Each is (x, y, dx, dy, heading, dheading): the segment's start relative to its
+        tile's top left corner, its start heading in radians, and the change in each over
+        the segment.
+        """
+        return _segments(connection_shape, reverse_direction, forward_direction, self.tile_size)
+
+    def _sample(
+        self,
+        position: GridPosition,
+        connection_shape: ConnectionShape,
+        reverse_direction: Direction,
+        forward_direction: Direction,
+        u: SupportsFloat,
+    ) -> Optional[tuple[Position, Rotation]]:
+        """Compute the screen position and heading at u along a connection."""
+        if not (
+            (reverse_pos := self.tile_side(position, reverse_direction))
+            and (forward_pos := self.tile_side(position, forward_direction))
+        ):
+            return None
+        if connection_shape == ConnectionShape.CURVED and (
+            corner := self.tile_corner(position, (reverse_direction, forward_direction))
+        ):
+            # Diffs from entry and exit positions to corner.
+            reverse_diff = reverse_pos - corner
+            forward_diff = forward_pos - corner
+            # Rotations about corner to entry and exit positions.
+            reverse_rotation = reverse_diff.as_rotation()
+            forward_rotation = forward_diff.as_rotation()
+            # Lerp u between rotations to get rotation about corner.
+            corner_rotation = reverse_rotation.lerp(forward_rotation, u)
+            # Apply that rotation to the entry diff to get the position relative to the
+            # tile, and add that to the corner to get the position on the screen.
+            position_ = corner + corner_rotation * Offset(int(reverse_diff.length), 0)
+            # The heading is the lerp between the directions of travel at entry and exit.
+            entry_rotation = Rotation.from_direction(-reverse_direction)
+            exit_rotation = Rotation.from_direction(forward_direction)
+            return position_, entry_rotation.lerp(exit_rotation, u)
+        # Straight, or curved with no corner between the sides, which is a straight track.
+        return reverse_pos.lerp(forward_pos, u), reverse_pos.direction_to(forward_pos)
 
     def track_to_screen(self, track_position: TrackPosition) -> Optional[tuple[Position, Rotation]]:
         return self.connection_lerp(track_position.connection, track_position.u)
+
+
+@cache
+def _segments(
+    connection_shape: ConnectionShape,
+    reverse_direction: Direction,
+    forward_direction: Direction,
+    tile_size: int,
+) -> tuple[tuple[int, int, int, int, float, float], ...]:
+    """Sample a connection's position, relative to its tile, and heading in radians.
+
+    Each segment between consecutive samples is stored as its start x, y and heading and
+    the change in each over the segment. These only depend on the shape, directions and
+    tile size, so they're shared by every projection and every tile.
+    """
+    projection = Projection(
+        Rectangle(Position(0, 0), Position(tile_size, tile_size)), GridPosition(0, 0), tile_size
+    )
+    samples: list[tuple[Position, Rotation]] = []
+    for i in range(Projection.SAMPLES + 1):
+        sample = projection._sample(  # pyright: ignore[reportPrivateUsage]
+            GridPosition(0, 0),
+            connection_shape,
+            reverse_direction,
+            forward_direction,
+            i / Projection.SAMPLES,
+        )
+        if sample is None:
+            raise projection._error(  # pyright: ignore[reportPrivateUsage]
+                f"can't sample {connection_shape} connection "
+                f"{reverse_direction} -> {forward_direction}"
+            )
+        samples.append(sample)
+    return tuple(
+        (
+            position.x,
+            position.y,
+            next_position.x - position.x,
+            next_position.y - position.y,
+            rotation.radians,
+            (next_rotation - rotation).radians,
+        )
+        for (position, rotation), (next_position, next_rotation) in zip(
+            samples, samples[1:], strict=False
+        )
+    )
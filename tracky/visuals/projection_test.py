@@ -1,7 +1,11 @@
+import math
 from typing import Optional, SupportsFloat
 
+import pytest
+from pytest import approx  # type: ignore
 from pytest_subtests import SubTests
 
+from tracky.core import Error
 from tracky.track import Connection, ConnectionShape, Direction, GridPosition, Piece, TrackPosition
 from tracky.visuals import Position, Projection, Rectangle, Rotation
 
@@ -395,3 +399,68 @@ def test_track_to_screen() -> None:
         Position(25, 25),
         Rotation.from_degrees(-45),
     )
+
+
+def test_connection_corner() -> None:
+    projection = Projection(
+        Rectangle(Position(0, 0), Position(800, 600)),
+        GridPosition(5, 10),
+        tile_size=100,
+    )
+    c = Connection(Direction.LEFT, Direction.UP)
+    assert projection.connection_corner(c) is None
+    Piece(GridPosition(5, 11), connections={c})
+    assert projection.connection_corner(c) == Position(100, 0)
+
+
+def test_connection_lerp_matches_sample() -> None:
+    projection = Projection(
+        Rectangle(Position(0, 0), Position(800, 600)),
+        GridPosition(5, 10),
+        tile_size=100,
+    )
+    for connection_shape in ConnectionShape:
+        for reverse_direction in Direction:
+            for forward_direction in Direction:
+                if reverse_direction == forward_direction:
+                    continue
+                c = Connection(reverse_direction, forward_direction)
+                Piece(GridPosition(6, 11), connections={c}, connection_shape=connection_shape)
+                for i in range(Projection.SAMPLES + 1):
+                    u = i / Projection.SAMPLES
+                    assert projection.connection_lerp(c, u) == projection._sample(  # type: ignore
+                        GridPosition(6, 11),
+                        connection_shape,
+                        reverse_direction,
+                        forward_direction,
+                        u,
+                    )
+
+
+def test_connection_lerp_between_samples() -> None:
+    projection = Projection(
+        Rectangle(Position(0, 0), Position(800, 600)),
+        GridPosition(5, 10),
+        tile_size=100,
+    )
+    c = Connection(Direction.LEFT, Direction.UP)
+    Piece(GridPosition(5, 10), connections={c}, connection_shape=ConnectionShape.CURVED)
+    u = 0.3
+    result = projection.connection_lerp(c, u)
+    assert result is not None
+    position, rotation = result
+    # A quarter circle of radius 50 about the tile's top left corner.
+    assert abs(math.hypot(position.x, position.y) - 50) <= 1
+    assert rotation.degrees == approx(-90 * u, abs=1)
+
+
+def test_connection_lerp_invalid_tile_size() -> None:
+    projection = Projection(
+        Rectangle(Position(0, 0), Position(800, 600)),
+        GridPosition(0, 0),
+        tile_size=0,
+    )
+    c = Connection(Direction.LEFT, Direction.UP)
+    Piece(GridPosition(0, 0), connections={c})
+    with pytest.raises(Error):
+        projection.connection_lerp(c, 0.5)
@@ -1,12 +1,19 @@
 # coverage: skip file
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import pygame
 
 from tracky.sim import Sim
 from tracky.track import Grid, GridPosition, Piece
+from tracky.visuals.position import Position
+from tracky.visuals.projection import Projection
+from tracky.visuals.rectangle import Rectangle
+
+if TYPE_CHECKING:
+    # Batch projection needs the optional numpy dependency, so only import it for typing.
+    from tracky.visuals.batch_projection import BatchProjection
 
 
 @dataclass(frozen=True)
@@ -22,6 +29,19 @@ class Rect:
 
 
 class Visualizer:
+    """Renders a sim with pygame.
+
+    Track rarely changes, so it's drawn once to an off-screen layer and only the tiles the
+    grid reports as changed are redrawn. Each frame the previous frame's cars are erased by
+    copying the layer back over them, and only those areas go to the display.
+
+    The visualizer listens to the sim's grid for changed tiles until it's closed.
+    """
+
+    BACKGROUND = (0, 0, 200)
+    TRACK = (200, 200, 200)
+    CAR = (200, 0, 0)
+
     def __init__(
         self,
         sim: Sim,
@@ -33,10 +53,28 @@ class Visualizer:
         self.__size = size or Vec(800, 600)
         self.__title = title
         self.__fps = fps
+        self.__screen: Optional[pygame.Surface] = None
+        self.__batch_projection: Optional["BatchProjection"] = None
+        # The track layer and the projection it was drawn with.
+        self.__track_layer: Optional[pygame.Surface] = None
+        self.__track_projection: Optional[Projection] = None
+        # Tiles whose pieces changed since the track layer was drawn.
+        self.__dirty_tiles = set[GridPosition]()
+        # Screen areas the cars were drawn to last frame.
+        self.__car_rects: list[pygame.Rect] = []
+        self.__closed = False
+        sim.grid.add_listener(self.__dirty_tiles.add)
+
+    def close(self) -> None:
+        """Stop listening to the grid."""
+        if not self.__closed:
+            self.__closed = True
+            self.__sim.grid.remove_listener(self.__dirty_tiles.add)
 
     def run(self) -> None:
         pygame.init()
         screen = pygame.display.set_mode((self.__size.x, self.__size.y))
+        self.__screen = screen
         pygame.display.set_caption(self.__title)
         clock = pygame.time.Clock()
         t = 0.0
@@ -50,40 +88,101 @@ class Visualizer:
             t += dt
             self._update(t, dt)
 
-            screen.fill((0, 0, 200))
-            self._render()
-            pygame.display.flip()
+            pygame.display.update(self._render())
 
     def _update(self, t: float, dt: float) -> None:
         self.__sim.update(t, dt)
 
-    def _render(self) -> None:
-        self._render_sim(self.__sim, Rect(Vec(0, 0), self.__size))
-
-    def _render_sim(self, sim: Sim, rect: Rect) -> None:
-        self._render_grid(sim.grid, rect)
-
-    def _render_grid(self, grid: Grid, rect: Rect) -> None:
+    def _render(self) -> list[pygame.Rect]:
+        """Render a frame and return the screen areas that changed."""
+        return self._render_sim(self.__sim, Rect(Vec(0, 0), self.__size))
+
+    def _render_sim(self, sim: Sim, rect: Rect) -> list[pygame.Rect]:
+        if self.__screen is None:
+            return []
+        projection = self._projection(sim.grid, rect)
+        dirty_rects: list[pygame.Rect] = []
+        if self.__track_layer is None or projection != self.__track_projection:
+            # The layout or its placement on screen changed, so redraw all of it.
+            self.__track_layer = self._render_grid(sim.grid, projection)
+            self.__track_projection = projection
+            self.__dirty_tiles.clear()
+            self.__screen.blit(self.__track_layer, (0, 0))
+            dirty_rects.append(self.__screen.get_rect())
+        else:
+            for position in self.__dirty_tiles:
+                if tile_rect := self._render_tile(
+                    self.__track_layer, sim.grid, projection, position
+                ):
+                    dirty_rects.append(tile_rect)
+            self.__dirty_tiles.clear()
+            dirty_rects.extend(self.__car_rects)
+            for dirty_rect in dirty_rects:
+                self.__screen.blit(self.__track_layer, dirty_rect, dirty_rect)
+        self.__car_rects = self._render_cars(self.__screen, sim, projection)
+        dirty_rects.extend(self.__car_rects)
+        return dirty_rects
+
+    def _projection(self, grid: Grid, rect: Rect) -> Projection:
         min_pos, max_pos = grid.bounds
-        grid_num_rows = max_pos.row - min_pos.row + 1
-        grid_num_cols = max_pos.col - min_pos.col + 1
-        cell_width: int = int((rect.max.x - rect.min.x) / grid_num_cols)
-        cell_height: int = int((rect.max.y - rect.min.y) / grid_num_rows)
-        for row in range(min_pos.row, max_pos.row + 1):
-            for col in range(min_pos.col, max_pos.col + 1):
-                if piece := grid.get(GridPosition(row, col)):
-                    self._render_piece(
-                        piece,
-                        Rect(
-                            min=Vec(
-                                x=rect.min.x + col * cell_width,
-                                y=rect.min.y + row * cell_height,
-                            ),
-                            max=Vec(
-                                x=rect.min.x + (col + 1) * cell_width,
-                                y=rect.min.y + (row + 1) * cell_height,
-                            ),
-                        ),
-                    )
-
-    def _render_piece(self, piece: Piece, rect: Rect) -> None: ...
+        cell_width = (rect.max.x - rect.min.x) // (max_pos.col - min_pos.col + 1)
+        cell_height = (rect.max.y - rect.min.y) // (max_pos.row - min_pos.row + 1)
+        return Projection(
+            Rectangle(Position(rect.min.x, rect.min.y), Position(rect.max.x, rect.max.y)),
+            min_pos,
+            tile_size=max(1, min(cell_width, cell_height)),
+        )
+
+    def _render_grid(self, grid: Grid, projection: Projection) -> pygame.Surface:
+        layer = pygame.Surface((self.__size.x, self.__size.y))
+        layer.fill(self.BACKGROUND)
+        # Only touch the pieces in the projection's viewport.
+        for piece in grid.pieces_in(projection.grid_origin, projection.grid_max):
+            self._render_piece(layer, piece, projection)
+        return layer
+
+    def _render_tile(
+        self, layer: pygame.Surface, grid: Grid, projection: Projection, position: GridPosition
+    ) -> Optional[pygame.Rect]:
+        """Redraw one tile of the track layer, returning its screen area."""
+        if (origin := projection.grid_to_screen(position)) is None:
+            return None
+        tile_rect = pygame.Rect(origin.x, origin.y, projection.tile_size, projection.tile_size)
+        layer.fill(self.BACKGROUND, tile_rect)
+        if piece := grid.get(position):
+            self._render_piece(layer, piece, projection)
+        return tile_rect
+
+    def _render_piece(self, layer: pygame.Surface, piece: Piece, projection: Projection) -> None:
+        width = max(1, projection.tile_size // 16)
+        for connection in piece.connections:
+            points: list[tuple[int, int]] = []
+            for i in range(Projection.SAMPLES + 1):
+                if result := projection.connection_lerp(connection, i / Projection.SAMPLES):
+                    position, _ = result
+                    points.append((position.x, position.y))
+            if len(points) > 1:
+                pygame.draw.lines(layer, self.TRACK, False, points, width)
+
+    def _render_cars(
+        self, screen: pygame.Surface, sim: Sim, projection: Projection
+    ) -> list[pygame.Rect]:
+        """Draw every car, returning the screen areas drawn to."""
+        radius = max(2, projection.tile_size // 8)
+        if (engine := sim.car_manager.engine) is not None:
+            # The engine keeps cars in arrays, so project them all in one pass.
+            if self.__batch_projection is None or self.__batch_projection.projection != projection:
+                from tracky.visuals.batch_projection import BatchProjection
+
+                self.__batch_projection = BatchProjection(projection)
+            x, y, _, visible = self.__batch_projection.track_to_screen(
+                engine.graph, engine.connection_ids, engine.us
+            )
+            centers = list(zip(x[visible].tolist(), y[visible].tolist(), strict=True))
+        else:
+            centers = [
+                (result[0].x, result[0].y)
+                for car in sim.car_manager
+                if (result := projection.track_to_screen(car.position))
+            ]
+        return [pygame.draw.circle(screen, self.CAR, center, radius) for center in centers]